@@ -0,0 +1,360 @@
+# backends.py - Acceso a datos de la API de consultas (Postgres/Supabase o SQLite local)
+import asyncio
+import json
+import re
+from datetime import date
+
+# ======================================
+# CONSULTAS POR TIPO
+# ======================================
+# tabla: tabla o subconsulta; filtro: condición con $1, $2... (parámetros de main.CONSULTAS)
+# columnas: proyección permitida ('campos'); orden: clave keyset (columna, conversor del cursor)
+PARTIDOS_POSTGRES = [
+    "id", "temporada_id", "fase_id", "jornada", "fecha", "local_id", "visitante_id",
+    "g_local_1t", "g_visitante_1t", "g_local_2t", "g_visitante_2t",
+    "minutos_local_1t", "minutos_visitante_1t", "minutos_local_2t", "minutos_visitante_2t", "status"
+]
+AGREGADOS = [
+    "temporada_id", "equipo_id", "pj", "pg", "pe", "pp", "gf", "gc", "puntos",
+    "gf_1t", "gc_1t", "gf_2t", "gc_2t", "tramos_favor", "tramos_contra"
+]
+
+CONSULTAS_POSTGRES = {
+    "partido_simple": {
+        "tabla": "partidos",
+        "filtro": "local_id = $1 AND visitante_id = $2 AND fecha = $3",
+        "columnas": PARTIDOS_POSTGRES,
+        "orden": [("id", int)],
+        "desc": False
+    },
+    "equipo_historico": {
+        "tabla": "partidos",
+        "filtro": "(local_id = $1 OR visitante_id = $1) AND fecha IS NOT NULL",
+        "columnas": PARTIDOS_POSTGRES,
+        "orden": [("fecha", date.fromisoformat), ("id", int)],
+        "desc": True
+    },
+    "liga_temporada": {
+        "tabla": "partidos",
+        "filtro": "temporada_id = $1 AND fecha IS NOT NULL",
+        "columnas": PARTIDOS_POSTGRES,
+        "orden": [("fecha", date.fromisoformat), ("id", int)],
+        "desc": False
+    },
+    "clasificacion": {
+        "tabla": "agregados_equipo_temporada",
+        "filtro": "temporada_id = $1",
+        "columnas": AGREGADOS,
+        "orden": [("puntos", int), ("gf", int), ("equipo_id", int)],
+        "desc": True
+    },
+    "resumen_equipo": {
+        "tabla": "agregados_equipo_temporada",
+        "filtro": "equipo_id = $1",
+        "columnas": AGREGADOS,
+        "orden": [("temporada_id", int)],
+        "desc": True
+    },
+}
+
+# historico.db (scraper_core/consolidado.py): 'fecha' guarda el texto de Flashscore ("dd.mm. hh:mm")
+# y 'fecha_iso' la fecha completa ("2025-05-25 14:00") calculada al escribir: filtros y orden van por ella.
+# fecha_orden = COALESCE(fecha_iso, ''): los partidos sin fecha también salen (con índice en consolidado.py)
+TABLA_PARTIDOS_SQLITE = "(SELECT p.*, COALESCE(p.fecha_iso, '') AS fecha_orden FROM partidos p)"
+PARTIDOS_SQLITE = [
+    "id", "temporada_id", "fase", "jornada", "fecha", "fecha_iso", "fecha_orden", "local_id", "visitante_id",
+    "g_local_1t", "g_visitante_1t", "g_local_2t", "g_visitante_2t",
+    "minutos_local_1t", "minutos_visitante_1t", "minutos_local_2t", "minutos_visitante_2t"
+]
+
+CONSULTAS_SQLITE = {
+    "partido_simple": {
+        "tabla": TABLA_PARTIDOS_SQLITE,
+        "filtro": "local_id = $1 AND visitante_id = $2 AND fecha_iso >= $3 AND fecha_iso < date($3, '+1 day')",
+        "columnas": PARTIDOS_SQLITE,
+        "orden": [("id", int)],
+        "desc": False
+    },
+    "equipo_historico": {
+        "tabla": TABLA_PARTIDOS_SQLITE,
+        "filtro": "(local_id = $1 OR visitante_id = $1)",
+        "columnas": PARTIDOS_SQLITE,
+        "orden": [("fecha_orden", str), ("id", int)],
+        "desc": True
+    },
+    "liga_temporada": {
+        "tabla": TABLA_PARTIDOS_SQLITE,
+        "filtro": "temporada_id = $1",
+        "columnas": PARTIDOS_SQLITE,
+        "orden": [("fecha_orden", str), ("id", int)],
+        "desc": False
+    },
+}
+
+def construir_sql(consulta, columnas, n, con_cursor):
+    """
+    SELECT con proyección y paginación keyset. Los parámetros tras los n del filtro son
+    los valores del cursor (si lo hay) y el LIMIT.
+    """
+    claves = [columna for columna, _ in consulta["orden"]]
+    direccion = "DESC" if consulta["desc"] else "ASC"
+    sql = f"SELECT {', '.join(columnas)} FROM {consulta['tabla']} WHERE {consulta['filtro']}"
+    if con_cursor:
+        marcas = ", ".join(f"${n + 1 + i}" for i in range(len(claves)))
+        sql += f" AND ({', '.join(claves)}) {'<' if consulta['desc'] else '>'} ({marcas})"
+        n += len(claves)
+    sql += f" ORDER BY {', '.join(f'{c} {direccion}' for c in claves)} LIMIT ${n + 1}"
+    return sql
+
+SQL_VALIDAR = """
+    SELECT c.id, c.saldo, c.limite_diario,
+           p.tipo_consulta, p.coste_base, p.coste_por_fila
+    FROM clientes c
+    LEFT JOIN precios_consultas p ON p.tipo_consulta = $2
+    WHERE c.api_key = $1
+"""
+
+# cache_consultas (sql/003): las entradas de temporadas cerradas no caducan (expira_en NULL)
+SQL_LEER_CACHE = """
+    SELECT resultado, filas FROM cache_consultas
+    WHERE clave = $1 AND (expira_en IS NULL OR expira_en > now())
+"""
+SQL_GUARDAR_CACHE = """
+    INSERT INTO cache_consultas (clave, query_type, temporada_id, equipo_id, resultado, filas, expira_en, creado_en)
+    VALUES ($1, $2, $3, $4, $5::text::jsonb, $6,
+            CASE WHEN EXISTS (SELECT 1 FROM temporadas WHERE id = $3 AND NOT is_current) THEN NULL
+                 ELSE now() + make_interval(mins => $7) END,
+            now())
+    ON CONFLICT (clave) DO UPDATE SET
+        resultado = EXCLUDED.resultado, filas = EXCLUDED.filas,
+        expira_en = EXCLUDED.expira_en, creado_en = EXCLUDED.creado_en
+"""
+
+# ======================================
+# POSTGRES (asyncpg)
+# ======================================
+class BackendPostgres:
+    """Pool asyncpg. Las sentencias se preparan una vez por conexión (caché de asyncpg)"""
+
+    def __init__(self, dsn, min_size=1, max_size=10, prefetch=200):
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.prefetch = prefetch
+        self.consultas = CONSULTAS_POSTGRES
+        self.pool = None
+
+    def adaptar(self, sql):
+        return sql
+
+    async def abrir(self):
+        import asyncpg
+
+        async def init(conn):
+            # jsonb (tramos_*, metadata) como objetos Python y no como texto
+            await conn.set_type_codec("jsonb", encoder=json.dumps, decoder=json.loads, schema="pg_catalog")
+
+        self.pool = await asyncpg.create_pool(
+            self.dsn, min_size=self.min_size, max_size=self.max_size, init=init
+        )
+
+    async def cerrar(self):
+        await self.pool.close()
+
+    async def ping(self):
+        async with self.pool.acquire() as conn:
+            await conn.fetchval("SELECT 1")
+
+    async def validar(self, api_key, tipo):
+        async with self.pool.acquire() as conn:
+            stmt = await conn.prepare(SQL_VALIDAR)
+            fila = await stmt.fetchrow(api_key, tipo)
+        return dict(fila) if fila else None
+
+    async def filas(self, sql, argumentos):
+        """Itera las filas con un cursor de servidor, sin materializar el resultado"""
+        async with self.pool.acquire() as conn:
+            stmt = await conn.prepare(sql)
+            async with conn.transaction(readonly=True):
+                async for fila in stmt.cursor(*argumentos, prefetch=self.prefetch):
+                    yield dict(fila)
+
+    async def cobrar(self, cliente_id, descripcion, coste, metadata):
+        async with self.pool.acquire() as conn:
+            stmt = await conn.prepare(
+                "SELECT saldo, total_consultas, total_gastado FROM realizar_cobro($1, 'consulta', $2, $3, $4::jsonb)"
+            )
+            fila = await stmt.fetchrow(cliente_id, descripcion, coste, metadata)
+        return dict(fila) if fila else None  # None: saldo insuficiente (sql/005)
+
+    async def leer_cache(self, clave):
+        async with self.pool.acquire() as conn:
+            stmt = await conn.prepare(SQL_LEER_CACHE)
+            fila = await stmt.fetchrow(clave)
+        return dict(fila) if fila else None
+
+    async def guardar_cache(self, clave, tipo, temporada_id, equipo_id, resultado, filas, ttl_minutos):
+        """'resultado' llega ya serializado: ::text::jsonb evita el codec jsonb (no sabe de fechas)"""
+        async with self.pool.acquire() as conn:
+            stmt = await conn.prepare(SQL_GUARDAR_CACHE)
+            await stmt.fetch(clave, tipo, temporada_id, equipo_id, resultado, filas, ttl_minutos)
+
+    async def contar_consultas(self, clientes, dia):
+        async with self.pool.acquire() as conn:
+            filas = await conn.fetch(
+                "SELECT cliente_id, consultas FROM contar_consultas_dia($1::bigint[], $2)", clientes, dia
+            )
+        return {fila["cliente_id"]: fila["consultas"] for fila in filas}
+
+# ======================================
+# SQLITE (aiosqlite) - desarrollo y benchmarks locales
+# ======================================
+def a_sqlite(sql):
+    """$1 → ?1 (SQLite admite parámetros numerados reutilizables)"""
+    return re.sub(r"\$(\d+)", r"?\1", sql)
+
+def adaptar_argumentos(argumentos):
+    return [a.isoformat() if isinstance(a, date) else a for a in argumentos]
+
+class BackendSQLite:
+    """
+    Pool de conexiones aiosqlite sobre la base consolidada (historico.db).
+    sqlite3 reutiliza las sentencias preparadas por conexión (cached_statements).
+    Crea tablas mínimas de clientes/precios/transacciones para poder medir el ciclo completo.
+    """
+
+    def __init__(self, db_path, conexiones=4):
+        self.db_path = db_path
+        self.conexiones = conexiones
+        self.consultas = CONSULTAS_SQLITE
+        self.libres = asyncio.Queue()
+        self.lock_cobro = asyncio.Lock()
+
+    def adaptar(self, sql):
+        return a_sqlite(sql)
+
+    async def abrir(self):
+        import aiosqlite
+        for _ in range(self.conexiones):
+            conn = await aiosqlite.connect(self.db_path, cached_statements=256)
+            conn.row_factory = aiosqlite.Row
+            await conn.execute("PRAGMA journal_mode=WAL")
+            await conn.execute("PRAGMA busy_timeout=5000")
+            self.libres.put_nowait(conn)
+
+        conn = await self.libres.get()
+        await conn.executescript("""
+            CREATE TABLE IF NOT EXISTS clientes (
+                id INTEGER PRIMARY KEY,
+                email TEXT,
+                api_key TEXT UNIQUE NOT NULL,
+                saldo REAL NOT NULL DEFAULT 0,
+                limite_diario INTEGER DEFAULT 1000,
+                total_consultas INTEGER NOT NULL DEFAULT 0,
+                total_gastado REAL NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS precios_consultas (
+                tipo_consulta TEXT PRIMARY KEY,
+                coste_base REAL NOT NULL,
+                coste_por_fila REAL NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS transacciones (
+                id INTEGER PRIMARY KEY,
+                cliente_id INTEGER NOT NULL,
+                tipo TEXT NOT NULL,
+                descripcion TEXT,
+                coste REAL NOT NULL,
+                metadata TEXT,
+                created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now'))
+            );
+            CREATE INDEX IF NOT EXISTS idx_transacciones_cliente_tipo_fecha
+                ON transacciones(cliente_id, tipo, created_at);
+        """)
+        await conn.commit()
+        self.libres.put_nowait(conn)
+
+    async def cerrar(self):
+        while not self.libres.empty():
+            await (self.libres.get_nowait()).close()
+
+    async def _conexion(self):
+        return await self.libres.get()
+
+    async def ping(self):
+        conn = await self._conexion()
+        try:
+            await conn.execute("SELECT 1")
+        finally:
+            self.libres.put_nowait(conn)
+
+    async def validar(self, api_key, tipo):
+        conn = await self._conexion()
+        try:
+            async with conn.execute(self.adaptar(SQL_VALIDAR), (api_key, tipo)) as cursor:
+                fila = await cursor.fetchone()
+        finally:
+            self.libres.put_nowait(conn)
+        return dict(fila) if fila else None
+
+    async def filas(self, sql, argumentos):
+        conn = await self._conexion()
+        try:
+            async with conn.execute(sql, adaptar_argumentos(argumentos)) as cursor:
+                async for fila in cursor:
+                    yield dict(fila)
+        finally:
+            self.libres.put_nowait(conn)
+
+    async def cobrar(self, cliente_id, descripcion, coste, metadata):
+        # Un solo escritor: serializar los cobros evita 'database is locked'
+        async with self.lock_cobro:
+            conn = await self._conexion()
+            try:
+                async with conn.execute("""
+                    UPDATE clientes SET saldo = saldo - ?2,
+                        total_consultas = total_consultas + 1,
+                        total_gastado = total_gastado + ?2
+                    WHERE id = ?1 AND saldo >= ?2
+                    RETURNING saldo, total_consultas, total_gastado
+                """, (cliente_id, coste)) as cursor:
+                    fila = await cursor.fetchone()
+                if fila is None:
+                    async with conn.execute("SELECT 1 FROM clientes WHERE id = ?", (cliente_id,)) as cursor:
+                        if await cursor.fetchone() is None:
+                            raise ValueError(f"Cliente {cliente_id} no encontrado")
+                    await conn.rollback()
+                    return None  # Saldo insuficiente: ni cobro ni transacción, igual que sql/005
+                resultado = dict(fila)
+                await conn.execute(
+                    "INSERT INTO transacciones (cliente_id, tipo, descripcion, coste, metadata) VALUES (?, 'consulta', ?, ?, ?)",
+                    (cliente_id, descripcion, coste, json.dumps(metadata))
+                )
+                await conn.commit()
+            except Exception:
+                await conn.rollback()
+                raise
+            finally:
+                self.libres.put_nowait(conn)
+        return resultado
+
+    # historico.db no tiene cache_consultas ni su invalidación (sql/003): en local no hay caché
+    async def leer_cache(self, clave):
+        return None
+
+    async def guardar_cache(self, clave, tipo, temporada_id, equipo_id, resultado, filas, ttl_minutos):
+        pass
+
+    async def contar_consultas(self, clientes, dia):
+        conn = await self._conexion()
+        try:
+            marcas = ",".join("?" * len(clientes))
+            async with conn.execute(f"""
+                SELECT cliente_id, count(*) AS consultas FROM transacciones
+                WHERE cliente_id IN ({marcas}) AND tipo = 'consulta'
+                  AND created_at >= ? AND created_at < date(?, '+1 day')
+                GROUP BY cliente_id
+            """, (*clientes, dia.isoformat(), dia.isoformat())) as cursor:
+                filas = await cursor.fetchall()
+        finally:
+            self.libres.put_nowait(conn)
+        return {fila["cliente_id"]: fila["consultas"] for fila in filas}
@@ -0,0 +1,126 @@
+# benchmark.py - Carga concurrente contra la API de consultas (api/main.py)
+#
+# Local con SQLite (base consolidada de scraper_core/consolidado.py):
+#   python benchmark.py --preparar historico.db
+#   BACKEND=sqlite SQLITE_DB=historico.db uvicorn main:app --port 8000
+#   python benchmark.py --url http://localhost:8000 --peticiones 2000 --concurrencia 32
+#
+# Con Postgres local basta arrancar la API con BACKEND=postgres y DATABASE_URL.
+import argparse
+import asyncio
+import json
+import random
+import sqlite3
+import statistics
+import time
+
+import httpx
+
+API_KEY_BENCH = "bench_key"
+
+# Precios de referencia para el cliente de pruebas
+PRECIOS_BENCH = [
+    ("partido_simple", 0.01, 0.0),
+    ("equipo_historico", 0.10, 0.001),
+    ("liga_temporada", 0.05, 0.001),
+]
+
+def preparar_sqlite(db_path):
+    """Crea el cliente 'bench_key' con saldo y límite de sobra en la base SQLite"""
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    c.executescript("""
+        CREATE TABLE IF NOT EXISTS clientes (
+            id INTEGER PRIMARY KEY,
+            email TEXT,
+            api_key TEXT UNIQUE NOT NULL,
+            saldo REAL NOT NULL DEFAULT 0,
+            limite_diario INTEGER DEFAULT 1000,
+            total_consultas INTEGER NOT NULL DEFAULT 0,
+            total_gastado REAL NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS precios_consultas (
+            tipo_consulta TEXT PRIMARY KEY,
+            coste_base REAL NOT NULL,
+            coste_por_fila REAL NOT NULL DEFAULT 0
+        );
+    """)
+    c.execute("""
+        INSERT INTO clientes (email, api_key, saldo, limite_diario) VALUES ('bench@local', ?, 1e9, 1000000000)
+        ON CONFLICT(api_key) DO UPDATE SET saldo = 1e9, limite_diario = 1000000000
+    """, (API_KEY_BENCH,))
+    c.executemany("INSERT OR REPLACE INTO precios_consultas VALUES (?, ?, ?)", PRECIOS_BENCH)
+    conn.commit()
+    conn.close()
+    print(f"✅ Cliente '{API_KEY_BENCH}' listo en {db_path}")
+
+def cargar_muestras(db_path, n=200):
+    """IDs reales de equipos y temporadas sacados de la base SQLite"""
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    equipos = [r[0] for r in c.execute("SELECT id FROM equipos ORDER BY random() LIMIT ?", (n,))]
+    temporadas = [r[0] for r in c.execute("SELECT id FROM temporadas ORDER BY random() LIMIT ?", (n,))]
+    conn.close()
+    return equipos, temporadas
+
+def generar_peticion(equipos, temporadas):
+    if random.random() < 0.5:
+        return {"query_type": "equipo_historico", "params": {"equipo": random.choice(equipos), "por_pagina": 50}}
+    return {"query_type": "liga_temporada", "params": {"temporada": random.choice(temporadas)}}
+
+async def ejecutar(url, peticiones, concurrencia, equipos, temporadas):
+    latencias = []
+    errores = 0
+    filas = 0
+    semaforo = asyncio.Semaphore(concurrencia)
+
+    async with httpx.AsyncClient(base_url=url, timeout=30) as client:
+        async def una():
+            nonlocal errores, filas
+            payload = {"api_key": API_KEY_BENCH, **generar_peticion(equipos, temporadas)}
+            async with semaforo:
+                inicio = time.perf_counter()
+                try:
+                    response = await client.post("/query", json=payload)
+                    cuerpo = json.loads(response.content)
+                    if response.status_code != 200:
+                        errores += 1
+                    else:
+                        filas += cuerpo["metadata"]["filas"]
+                except Exception:
+                    errores += 1
+                latencias.append(time.perf_counter() - inicio)
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(una() for _ in range(peticiones)))
+        duracion = time.perf_counter() - inicio
+
+    latencias.sort()
+    p = lambda q: latencias[min(int(len(latencias) * q), len(latencias) - 1)] * 1000
+    print(f"\n{'='*50}")
+    print(f"📊 {peticiones} peticiones, concurrencia {concurrencia}")
+    print(f"{'='*50}")
+    print(f"⏱️ Duración: {duracion:.2f}s  →  {peticiones / duracion:.1f} peticiones/segundo")
+    print(f"📈 Latencia p50 {p(0.50):.1f} ms | p95 {p(0.95):.1f} ms | p99 {p(0.99):.1f} ms | media {statistics.mean(latencias) * 1000:.1f} ms")
+    print(f"📦 Filas servidas: {filas}")
+    print(f"❌ Errores: {errores}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la API de consultas")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--db", default="historico.db",
+                        help="Base SQLite de la que sacar parámetros de prueba")
+    parser.add_argument("--peticiones", type=int, default=1000)
+    parser.add_argument("--concurrencia", type=int, default=16)
+    parser.add_argument("--preparar", metavar="DB", help="Solo crear el cliente de pruebas en esta base SQLite")
+    args = parser.parse_args()
+
+    if args.preparar:
+        preparar_sqlite(args.preparar)
+        return
+
+    equipos, temporadas = cargar_muestras(args.db)
+    asyncio.run(ejecutar(args.url, args.peticiones, args.concurrencia, equipos, temporadas))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# cuotas.py - Contadores diarios de consultas por cliente (limite_diario)
+import asyncio
+import sqlite3
+from datetime import date
+
+# ======================================
+# CUOTAS DIARIAS
+# ======================================
+class CuotasDiarias:
+    """
+    Contador local (SQLite) de consultas por cliente y día.
+    El camino caliente hace una lectura + un incremento; la tabla 'transacciones'
+    se reconcilia en segundo plano, en lotes (sql/004_cuotas.sql).
+
+    contar_remoto: corrutina (clientes, dia) -> {cliente_id: consultas}
+    """
+
+    def __init__(self, contar_remoto, db_path="cuotas.db", intervalo_reconciliacion=60):
+        self.contar_remoto = contar_remoto
+        self.intervalo_reconciliacion = intervalo_reconciliacion
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS cuotas_diarias (
+                cliente_id INTEGER NOT NULL,
+                dia TEXT NOT NULL,
+                consultas INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (cliente_id, dia)
+            )
+        """)
+
+    async def _sembrar(self, cliente_id, dia):
+        """Primera vez que se ve al cliente hoy: partir del conteo real"""
+        try:
+            remoto = (await self.contar_remoto([cliente_id], dia)).get(cliente_id, 0)
+        except Exception as e:
+            print(f"⚠️ No se pudo sembrar la cuota del cliente {cliente_id}: {e}")
+            remoto = 0
+        self.conn.execute("""
+            INSERT INTO cuotas_diarias (cliente_id, dia, consultas) VALUES (?, ?, ?)
+            ON CONFLICT(cliente_id, dia) DO UPDATE SET consultas = MAX(consultas, excluded.consultas)
+        """, (cliente_id, dia.isoformat(), remoto))
+
+    async def consumir(self, cliente_id, limite_diario):
+        """Reserva una consulta del cupo diario. Retorna False si el límite ya se alcanzó"""
+        if limite_diario is None:
+            return True
+        if limite_diario <= 0:
+            return False
+
+        dia = date.today()
+        existe = self.conn.execute(
+            "SELECT 1 FROM cuotas_diarias WHERE cliente_id = ? AND dia = ?", (cliente_id, dia.isoformat())
+        ).fetchone()
+        if not existe:
+            await self._sembrar(cliente_id, dia)
+
+        fila = self.conn.execute("""
+            UPDATE cuotas_diarias SET consultas = consultas + 1
+            WHERE cliente_id = ? AND dia = ? AND consultas < ?
+            RETURNING consultas
+        """, (cliente_id, dia.isoformat(), limite_diario)).fetchone()
+        return fila is not None
+
+    def devolver(self, cliente_id):
+        """Devuelve una consulta reservada cuando la consulta o el cobro fallan"""
+        self.conn.execute("""
+            UPDATE cuotas_diarias SET consultas = MAX(consultas - 1, 0)
+            WHERE cliente_id = ? AND dia = ?
+        """, (cliente_id, date.today().isoformat()))
+
+    async def reconciliar(self):
+        """Ajusta en un solo lote los contadores de hoy con 'transacciones' y purga días viejos"""
+        dia = date.today()
+        clientes = [fila[0] for fila in self.conn.execute(
+            "SELECT cliente_id FROM cuotas_diarias WHERE dia = ?", (dia.isoformat(),)
+        )]
+        if not clientes:
+            return 0
+
+        remotos = await self.contar_remoto(clientes, dia)
+        self.conn.executemany("""
+            UPDATE cuotas_diarias SET consultas = MAX(consultas, ?)
+            WHERE cliente_id = ? AND dia = ?
+        """, [(consultas, cliente_id, dia.isoformat()) for cliente_id, consultas in remotos.items()])
+        self.conn.execute("DELETE FROM cuotas_diarias WHERE dia < ?", (dia.isoformat(),))
+        return len(remotos)
+
+    async def bucle_reconciliacion(self):
+        """Tarea en segundo plano que reconcilia periódicamente"""
+        while True:
+            await asyncio.sleep(self.intervalo_reconciliacion)
+            try:
+                await self.reconciliar()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Error reconciliando cuotas: {e}")
@@ -0,0 +1,180 @@
+# equipos.py - Identidad de equipos: nombre → id con índice en memoria, alias y coincidencia aproximada
+import difflib
+import re
+import threading
+import unicodedata
+
+# Palabras que no distinguen a un equipo ("FC Barcelona" = "Barcelona")
+PALABRAS_GENERICAS = {
+    "fc", "cf", "afc", "sc", "ac", "as", "cd", "ud", "sd", "cfc", "fk", "sk", "sv", "kv",
+    "club", "de", "futbol", "calcio", "the"
+}
+# Marcas de filiales/categorías: nunca se fusionan por parecido ("Real Madrid" ≠ "Real Madrid B")
+MARCAS_FILIAL = {"b", "c", "ii", "iii", "u17", "u18", "u19", "u20", "u21", "u23", "w", "women", "fem", "femenino", "juvenil", "reserves"}
+UMBRAL_SIMILITUD = 0.92
+TAMANO_PAGINA = 1000
+
+def normalizar_nombre(nombre):
+    """'Atlético de Madrid' → 'atletico madrid' (sin acentos, signos ni palabras genéricas)"""
+    texto = unicodedata.normalize("NFKD", nombre or "")
+    texto = "".join(c for c in texto if not unicodedata.combining(c)).lower()
+    palabras = re.sub(r"[^a-z0-9]+", " ", texto).split()
+    significativas = [p for p in palabras if p not in PALABRAS_GENERICAS]
+    return " ".join(significativas or palabras)
+
+# ======================================
+# RESOLUTOR DE EQUIPOS
+# ======================================
+class ResolutorEquipos:
+    """
+    Carga una vez 'equipos' y 'equipos_alias' (sql/006_equipos_alias.sql) y resuelve nombres en memoria:
+    1. nombre exacto o alias registrado
+    2. nombre normalizado
+    3. coincidencia aproximada (difflib) sobre los normalizados → se guarda como alias
+    2 y 3 solo comparan con los equipos que ya jugaron en la liga (dos clubes de ligas distintas
+    con nombres casi iguales no se fusionan); sin liga_id solo vale el nombre exacto.
+    Los equipos nuevos y los alias se escriben en lote.
+    """
+
+    def __init__(self, supabase, umbral=UMBRAL_SIMILITUD):
+        self.supabase = supabase
+        self.umbral = umbral
+        self.por_nombre = {}
+        self.normalizados = {}  # id → nombres normalizados del equipo
+        self.por_liga = {}  # liga_id → ids de los equipos con partidos en la liga (se carga al usarla)
+        self.cargado = False
+        self.lock = threading.Lock()  # varias ligas pueden resolver a la vez desde hilos
+
+    def _leer_todo(self, tabla, columnas, filtro=None):
+        filas = []
+        desde = 0
+        while True:
+            consulta = self.supabase.table(tabla).select(columnas)
+            if filtro:
+                consulta = filtro(consulta)
+            response = consulta\
+                .range(desde, desde + TAMANO_PAGINA - 1)\
+                .execute()
+            filas.extend(response.data or [])
+            if len(response.data or []) < TAMANO_PAGINA:
+                return filas
+            desde += TAMANO_PAGINA
+
+    def _indexar(self, nombre, equipo_id):
+        self.por_nombre[nombre] = equipo_id
+        self.normalizados.setdefault(equipo_id, set()).add(normalizar_nombre(nombre))
+
+    def cargar(self):
+        for fila in self._leer_todo("equipos", "id, nombre"):
+            self._indexar(fila["nombre"], fila["id"])
+        try:
+            for fila in self._leer_todo("equipos_alias", "alias, equipo_id"):
+                self.por_nombre[fila["alias"]] = fila["equipo_id"]
+        except Exception as e:
+            print(f"⚠️ Sin tabla equipos_alias: {e}")
+        self.cargado = True
+        print(f"📚 Índice de equipos: {len(self.normalizados)} equipos, {len(self.por_nombre)} nombres")
+
+    def _equipos_liga(self, liga_id):
+        """Ids de los equipos con algún partido en las temporadas de la liga (una lectura por liga)"""
+        if liga_id not in self.por_liga:
+            temporadas = [fila["id"] for fila in self._leer_todo("temporadas", "id", lambda q: q.eq("liga_id", liga_id))]
+            ids = set()
+            if temporadas:
+                for fila in self._leer_todo("partidos", "local_id, visitante_id", lambda q: q.in_("temporada_id", temporadas)):
+                    ids.update((fila["local_id"], fila["visitante_id"]))
+            self.por_liga[liga_id] = ids
+        return self.por_liga[liga_id]
+
+    def _candidatos(self, liga_id):
+        """Normalizado → id entre los equipos de la liga (ante duplicados gana el id más antiguo)"""
+        if liga_id is None:
+            return {}
+        candidatos = {}
+        for equipo_id in sorted(self._equipos_liga(liga_id), reverse=True):
+            for normalizado in self.normalizados.get(equipo_id, ()):
+                candidatos[normalizado] = equipo_id
+        return candidatos
+
+    def _buscar(self, nombre, candidatos):
+        """Retorna (id, es_alias_nuevo) o (None, False)"""
+        if nombre in self.por_nombre:
+            return self.por_nombre[nombre], False
+
+        normalizado = normalizar_nombre(nombre)
+        if normalizado in candidatos:
+            return candidatos[normalizado], True
+
+        palabras = set(normalizado.split())
+        for parecido in difflib.get_close_matches(normalizado, candidatos.keys(), n=3, cutoff=self.umbral):
+            if palabras.symmetric_difference(parecido.split()) & MARCAS_FILIAL:
+                continue
+            print(f"🔗 '{nombre}' ≈ '{parecido}'")
+            return candidatos[parecido], True
+
+        return None, False
+
+    def resolver_lote(self, nombres, liga_id=None):
+        """
+        Resuelve varios nombres de equipos de la liga 'liga_id': como mucho un insert de equipos
+        y un upsert de alias. Los nombres que no se puedan resolver no aparecen en el resultado.
+        """
+        with self.lock:
+            return self._resolver_lote(nombres, liga_id)
+
+    def _resolver_lote(self, nombres, liga_id):
+        if not self.cargado:
+            self.cargar()
+
+        candidatos = self._candidatos(liga_id)
+        resultado = {}
+        alias_nuevos = []
+        pendientes = {}  # normalizado → variantes nuevas (se crea un solo equipo, con la primera)
+        for nombre in dict.fromkeys(nombres):
+            equipo_id, es_alias = self._buscar(nombre, candidatos)
+            if equipo_id is not None:
+                resultado[nombre] = equipo_id
+                if es_alias:
+                    alias_nuevos.append({"alias": nombre, "equipo_id": equipo_id})
+            else:
+                pendientes.setdefault(normalizar_nombre(nombre), []).append(nombre)
+
+        if pendientes:
+            response = self.supabase.table("equipos")\
+                .insert([{"nombre": variantes[0]} for variantes in pendientes.values()])\
+                .execute()
+            for fila in response.data or []:
+                self._indexar(fila["nombre"], fila["id"])
+            # Un insert deduplicado o que devuelve el nombre de otra forma: se relee por nombre
+            faltan = [v[0] for v in pendientes.values() if v[0] not in self.por_nombre]
+            if faltan:
+                releidos = self.supabase.table("equipos").select("id, nombre").in_("nombre", faltan).execute()
+                for fila in releidos.data or []:
+                    self._indexar(fila["nombre"], fila["id"])
+            for variantes in pendientes.values():
+                equipo_id = self.por_nombre.get(variantes[0])
+                if equipo_id is None:
+                    print(f"⚠️ No se pudo crear el equipo '{variantes[0]}'")
+                    continue
+                for nombre in variantes:
+                    resultado[nombre] = equipo_id
+                alias_nuevos.extend({"alias": n, "equipo_id": equipo_id} for n in variantes[1:])
+            print(f"➕ {len(pendientes)} equipos nuevos")
+
+        if alias_nuevos:
+            for alias in alias_nuevos:
+                self.por_nombre[alias["alias"]] = alias["equipo_id"]
+            try:
+                self.supabase.table("equipos_alias")\
+                    .upsert(alias_nuevos, on_conflict="alias")\
+                    .execute()
+            except Exception as e:
+                print(f"⚠️ No se pudieron guardar {len(alias_nuevos)} alias: {e}")
+
+        # Los partidos aún no están escritos: la liga ya cuenta con estos equipos en el siguiente lote
+        if liga_id is not None:
+            self.por_liga[liga_id].update(resultado.values())
+        return resultado
+
+    def resolver(self, nombre, liga_id=None):
+        return self.resolver_lote([nombre], liga_id).get(nombre)
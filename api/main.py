@@ -0,0 +1,435 @@
+# main.py - API de consultas de pago: validar, consultar, cobrar y responder en un solo proceso
+# Sustituye la cadena de nodos de api-gateway.workflow.json (Webhook → Validar → Ejecutar → Cobrar → Responder)
+import asyncio
+import base64
+import json
+import os
+import uuid
+from contextlib import aclosing, asynccontextmanager
+from datetime import date, datetime
+from decimal import Decimal
+
+from dotenv import load_dotenv
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from backends import BackendPostgres, BackendSQLite, construir_sql
+from cuotas import CuotasDiarias
+
+load_dotenv()
+
+# ======================================
+# CONFIGURACIÓN
+# ======================================
+BACKEND = os.getenv("BACKEND", "postgres")  # "postgres" | "sqlite"
+DATABASE_URL = os.getenv("DATABASE_URL")  # postgresql://... (conexión directa o pooler de Supabase)
+SQLITE_DB = os.getenv("SQLITE_DB", "historico.db")  # DB_CONSOLIDADA de scraper_core/config.py
+CUOTAS_DB = os.getenv("CUOTAS_DB", "/tmp/cuotas.db")
+POOL_MIN = int(os.getenv("POOL_MIN", "1"))
+POOL_MAX = int(os.getenv("POOL_MAX", "10"))
+RECONCILIAR_CADA = int(os.getenv("RECONCILIAR_CADA", "60"))  # segundos
+SYNC_TRABAJOS_GUARDADOS = int(os.getenv("SYNC_TRABAJOS_GUARDADOS", "50"))  # historial en memoria de /sync
+
+POR_PAGINA = 100
+POR_PAGINA_MAX = 500
+POR_PAGINA_MAX_NDJSON = 5000  # en NDJSON las filas no se acumulan en memoria
+
+# cache_consultas (sql/003), mismos TTL que el nodo "Ejecutar Consulta" de n8n.
+# Las temporadas cerradas no caducan; refrescar_temporada() invalida al escribir.
+# Solo páginas de hasta POR_PAGINA_MAX filas: las NDJSON grandes no se guardan.
+CACHE_TTL_MINUTOS = {
+    "partido_simple": 60,
+    "equipo_historico": 10,
+    "liga_temporada": 10,
+    "clasificacion": 10,
+    "resumen_equipo": 10,
+}
+
+# Parámetros de cada tipo de consulta, en el orden de $1, $2... (el SQL vive en backends.py)
+CONSULTAS = {
+    "partido_simple": [("local", int), ("visitante", int), ("fecha", date.fromisoformat)],
+    "equipo_historico": [("equipo", int)],
+    "liga_temporada": [("temporada", int)],
+    "clasificacion": [("temporada", int)],
+    "resumen_equipo": [("equipo", int)],
+}
+
+backend = None
+cuotas = None
+
+# Trabajos de /sync: se ejecutan de uno en uno en segundo plano (un solo navegador por proceso)
+trabajos = {}
+cola_sync = asyncio.Queue()
+
+# ======================================
+# FUNCIONES AUXILIARES
+# ======================================
+def a_json(valor):
+    """Serializa fechas y numéricos de asyncpg"""
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return float(valor)
+    raise TypeError(f"No serializable: {type(valor)}")
+
+def dumps(valor):
+    return json.dumps(valor, default=a_json, ensure_ascii=False)
+
+def error(mensaje, code, **extra):
+    return JSONResponse({"error": mensaje, "code": code, **extra}, status_code=code)
+
+def codificar_cursor(fila, consulta):
+    """Cursor opaco: base64url de los valores de la clave de orden de la última fila"""
+    valores = [fila[columna] for columna, _ in consulta["orden"]]
+    texto = json.dumps(valores, default=a_json, separators=(",", ":"))
+    return base64.urlsafe_b64encode(texto.encode()).decode().rstrip("=")
+
+def decodificar_cursor(cursor, consulta):
+    try:
+        texto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        valores = json.loads(texto)
+        return [conversor(valor) for (_, conversor), valor in zip(consulta["orden"], valores, strict=True)]
+    except Exception:
+        raise ValueError("Cursor no válido")
+
+def proyeccion(consulta, params):
+    """Columnas pedidas en 'campos' (lista o texto separado por comas) + las de la clave de orden"""
+    campos = params.get("campos")
+    if not campos:
+        return list(consulta["columnas"])
+    if isinstance(campos, str):
+        campos = campos.split(",")
+    campos = [c.strip() for c in campos if c.strip()]
+    invalidos = [c for c in campos if c not in consulta["columnas"]]
+    if invalidos:
+        raise ValueError(f"Campos no válidos: {', '.join(invalidos)}")
+    claves = [columna for columna, _ in consulta["orden"]]
+    return list(dict.fromkeys(claves + campos))
+
+def filas_asumibles(cliente):
+    """Filas que el saldo paga además del coste base (None si las filas no cuestan)"""
+    if not cliente["coste_por_fila"] or cliente["coste_por_fila"] <= 0:
+        return None
+    return max(int((cliente["saldo"] - cliente["coste_base"]) // cliente["coste_por_fila"]), 0)
+
+def preparar_consulta(tipo, params, ndjson, tope=None):
+    """
+    SQL del backend + argumentos convertidos + cursor + LIMIT (se pide una fila de más para 'siguiente').
+    'tope' limita la página a las filas que el cliente puede pagar: el cobro llega tras el streaming.
+    """
+    consulta = backend.consultas[tipo]
+    argumentos = []
+    for nombre, conversor in CONSULTAS[tipo]:
+        valor = params.get(nombre)
+        if valor is None or valor == "":
+            raise ValueError(f"Falta el parámetro '{nombre}'")
+        argumentos.append(conversor(str(valor).strip()))
+
+    maximo = POR_PAGINA_MAX_NDJSON if ndjson else POR_PAGINA_MAX
+    por_pagina = int(params.get("por_pagina", params.get("limit", POR_PAGINA)))
+    por_pagina = min(max(por_pagina, 1), maximo)
+    if tope is not None:
+        por_pagina = min(por_pagina, tope)
+
+    cursor = params.get("cursor")
+    if cursor:
+        argumentos += decodificar_cursor(str(cursor), consulta)
+
+    sql = construir_sql(consulta, proyeccion(consulta, params), len(CONSULTAS[tipo]), bool(cursor))
+    argumentos.append(por_pagina + 1)
+    return backend.adaptar(sql), argumentos, por_pagina
+
+def clave_cache(tipo, params, por_pagina):
+    """
+    Clave de cache_consultas: tipo + params normalizados + tamaño de página efectivo (el tope
+    por saldo lo cambia). Prefijo propio: cursor y proyección no son los del nodo n8n.
+    """
+    normalizados = {}
+    for nombre in sorted(params):
+        valor = params[nombre]
+        if nombre in ("formato", "por_pagina", "limit") or valor is None or valor == "":
+            continue
+        if isinstance(valor, list):
+            valor = ",".join(str(v).strip() for v in valor)
+        normalizados[nombre] = str(valor).strip()
+    normalizados["por_pagina"] = str(por_pagina)
+    return f"api:{tipo}:{json.dumps(normalizados, ensure_ascii=False, separators=(',', ':'))}"
+
+async def iterar(filas):
+    for fila in filas:
+        yield fila
+
+def crear_backend():
+    if BACKEND == "sqlite":
+        return BackendSQLite(SQLITE_DB, conexiones=POOL_MAX)
+    return BackendPostgres(DATABASE_URL, min_size=POOL_MIN, max_size=POOL_MAX)
+
+# ======================================
+# SINCRONIZACIÓN EN SEGUNDO PLANO (/sync)
+# ======================================
+def ahora_iso():
+    return datetime.now().isoformat(timespec="seconds")
+
+def leer_ligas(valor):
+    """'leagues' llega como lista, texto JSON ('[]') o nombres separados por comas; vacío = todas"""
+    if isinstance(valor, str):
+        valor = valor.strip()
+        valor = json.loads(valor) if valor.startswith("[") else valor.split(",")
+    if valor and not isinstance(valor, list):
+        raise ValueError("'leagues' debe ser una lista")
+    return [str(l).strip() for l in valor or [] if str(l).strip()]
+
+def leer_booleano(valor):
+    if isinstance(valor, str):
+        return valor.strip().lower() in ("1", "true", "si", "sí", "yes")
+    return bool(valor)
+
+def encolar_sync(ligas, completo):
+    """Crea el trabajo (o reutiliza uno igual que aún no ha terminado) y lo deja en la cola"""
+    for trabajo in trabajos.values():
+        if trabajo["estado"] in ("pendiente", "en_curso") \
+                and trabajo["ligas"] == ligas and trabajo["force_full"] == completo:
+            return trabajo, False
+
+    # Se descartan los terminados más antiguos
+    terminados = [t for t in trabajos.values() if t["estado"] in ("completado", "fallido")]
+    for viejo in terminados[:max(len(trabajos) + 1 - SYNC_TRABAJOS_GUARDADOS, 0)]:
+        del trabajos[viejo["job_id"]]
+
+    trabajo = {
+        "job_id": uuid.uuid4().hex,
+        "estado": "pendiente",
+        "ligas": ligas,
+        "force_full": completo,
+        "creado": ahora_iso(),
+        "inicio": None,
+        "fin": None,
+        "progreso": {},
+        "partidos_nuevos": 0,
+        "error": None
+    }
+    trabajos[trabajo["job_id"]] = trabajo
+    cola_sync.put_nowait(trabajo["job_id"])
+    return trabajo, True
+
+async def ejecutar_sync(trabajo):
+    # Importación diferida: Playwright y Supabase solo hacen falta si se usa /sync
+    import scraper_lite
+
+    def al_terminar_liga(nombre, nuevos, error):
+        trabajo["progreso"][nombre] = {
+            "estado": "fallido" if error else "completado",
+            "nuevos": len(nuevos),
+            "error": error
+        }
+        trabajo["partidos_nuevos"] += len(nuevos)
+
+    conocidas = [l["liga"] for l in scraper_lite.LIGAS_MONITOREO]
+    for nombre in trabajo["ligas"] or conocidas:
+        trabajo["progreso"][nombre] = {"estado": "pendiente", "nuevos": 0, "error": None} if nombre in conocidas \
+            else {"estado": "fallido", "nuevos": 0, "error": "Liga no monitorizada"}
+
+    await scraper_lite.sincronizar(trabajo["ligas"] or None, trabajo["force_full"], al_terminar_liga)
+
+    fallidas = [n for n, p in trabajo["progreso"].items() if p["error"]]
+    if fallidas and len(fallidas) == len(trabajo["progreso"]):
+        raise RuntimeError(f"Fallaron todas las ligas: {', '.join(fallidas)}")
+
+async def bucle_sync():
+    """Consume la cola de /sync; los trabajos no comparten navegador ni se solapan"""
+    while True:
+        trabajo = trabajos.get(await cola_sync.get())
+        if not trabajo:
+            continue
+        trabajo.update(estado="en_curso", inicio=ahora_iso())
+        print(f"🔄 Sync {trabajo['job_id']} ({', '.join(trabajo['ligas']) or 'todas'}"
+              f"{', completo' if trabajo['force_full'] else ''})")
+        try:
+            await ejecutar_sync(trabajo)
+            trabajo["estado"] = "completado"
+        except Exception as e:
+            print(f"❌ Sync {trabajo['job_id']} fallido: {e}")
+            trabajo.update(estado="fallido", error=str(e))
+            # Fallo del trabajo entero (p. ej. no arranca el navegador): ninguna liga queda 'pendiente'
+            for progreso in trabajo["progreso"].values():
+                if progreso["estado"] == "pendiente":
+                    progreso.update(estado="fallido", error=str(e))
+        finally:
+            trabajo["fin"] = ahora_iso()
+
+# ======================================
+# APLICACIÓN
+# ======================================
+@asynccontextmanager
+async def lifespan(app):
+    global backend, cuotas
+    backend = crear_backend()
+    await backend.abrir()
+    cuotas = CuotasDiarias(backend.contar_consultas, CUOTAS_DB, RECONCILIAR_CADA)
+    tareas = [
+        asyncio.create_task(cuotas.bucle_reconciliacion()),
+        asyncio.create_task(bucle_sync())
+    ]
+    print(f"✅ Backend {BACKEND} listo (pool {POOL_MIN}-{POOL_MAX})")
+    yield
+    for tarea in tareas:
+        tarea.cancel()
+    await backend.cerrar()
+
+app = FastAPI(title="API Datos Fútbol", lifespan=lifespan)
+
+@app.get("/health")
+async def health():
+    await backend.ping()
+    return {"status": "ok", "backend": BACKEND}
+
+async def transmitir(cliente, tipo, origen, por_pagina, ndjson, en_cache=None, guardar=None):
+    """
+    Escribe la respuesta fila a fila mientras se leen de la base de datos (o de 'en_cache'):
+    un objeto JSON con 'datos' y 'metadata', o NDJSON (una fila por línea y la metadata en la última).
+    El cobro se hace al final, cuando ya se conoce el número de filas.
+    'guardar': (clave, temporada_id, equipo_id) para dejar la página en cache_consultas.
+    """
+    consulta = backend.consultas[tipo]
+    filas = 0
+    ultima = None
+    siguiente = en_cache["resultado"]["siguiente"] if en_cache else None
+    datos = [] if guardar else None
+    try:
+        if not ndjson:
+            yield '{"success": true, "datos": ['
+        async with aclosing(origen) as cursor:
+            async for fila in cursor:
+                if filas == por_pagina:
+                    siguiente = codificar_cursor(ultima, consulta)
+                    break
+                if ndjson:
+                    yield dumps(fila) + "\n"
+                else:
+                    yield ("," if filas else "") + dumps(fila)
+                if datos is not None:
+                    datos.append(fila)
+                ultima = fila
+                filas += 1
+
+        if guardar:
+            clave, temporada_id, equipo_id = guardar
+            try:
+                await backend.guardar_cache(
+                    clave, tipo, temporada_id, equipo_id,
+                    dumps({"datos": datos, "siguiente": siguiente}), filas, CACHE_TTL_MINUTOS[tipo]
+                )
+            except Exception as e:
+                print(f"⚠️ No se pudo guardar en caché {tipo}: {e}")
+
+        coste = cliente["coste_base"] + filas * cliente["coste_por_fila"]
+        cobro = await backend.cobrar(
+            cliente["id"], f"Consulta: {tipo}", coste, {"filas": filas, "tipo": tipo}
+        )
+    except Exception as e:
+        cuotas.devolver(cliente["id"])
+        print(f"❌ Error en consulta {tipo} (cliente {cliente['id']}): {e}")
+        raise
+
+    metadata = {
+        "filas": filas,
+        "coste": coste,
+        "saldo_restante": cobro["saldo"] if cobro else None,
+        "por_pagina": por_pagina,
+        "siguiente": siguiente,
+        "cache": en_cache is not None
+    }
+    if cobro is None:
+        # Solo si otro cobro simultáneo gastó el saldo: la página ya está limitada a lo que paga (filas_asumibles)
+        print(f"⚠️ Saldo insuficiente al cobrar {tipo} (cliente {cliente['id']}, coste {coste})")
+        metadata["error"] = "Saldo insuficiente"
+    if ndjson:
+        yield dumps({"metadata": metadata}) + "\n"
+    else:
+        yield '], "metadata": ' + dumps(metadata) + "}"
+
+@app.post("/query")
+async def query(request: Request):
+    data = await request.json()
+    api_key = data.get("api_key")
+    tipo = data.get("query_type")
+    params = data.get("params") or {}
+
+    if not api_key or not tipo:
+        return error("Faltan parámetros requeridos", 400)
+
+    # 1. Validar API key, precio y saldo (una sola consulta)
+    cliente = await backend.validar(api_key, tipo)
+    if not cliente:
+        return error("API Key inválida", 401)
+    if cliente["tipo_consulta"] is None or tipo not in backend.consultas:
+        return error("Tipo de consulta no válido", 400)
+    tope = filas_asumibles(cliente)
+    if cliente["saldo"] < cliente["coste_base"] or tope == 0:
+        return error(
+            "Saldo insuficiente", 402,
+            saldo_actual=float(cliente["saldo"]),
+            coste_estimado=float(cliente["coste_base"] + (cliente["coste_por_fila"] or 0))
+        )
+
+    ndjson = params.get("formato") == "ndjson" or "application/x-ndjson" in request.headers.get("accept", "")
+    try:
+        sql, argumentos, por_pagina = preparar_consulta(tipo, params, ndjson, tope)
+    except ValueError as e:
+        return error(str(e), 400)
+
+    # Caché de resultados: un fallo al leerla solo hace que se consulte la base de datos
+    en_cache = guardar = None
+    if por_pagina <= POR_PAGINA_MAX:
+        clave = clave_cache(tipo, params, por_pagina)
+        try:
+            en_cache = await backend.leer_cache(clave)
+        except Exception as e:
+            print(f"⚠️ No se pudo leer la caché {tipo}: {e}")
+        if not en_cache:
+            valores = dict(zip((nombre for nombre, _ in CONSULTAS[tipo]), argumentos))
+            guardar = (clave, valores.get("temporada"), valores.get("equipo", valores.get("local")))
+
+    if not await cuotas.consumir(cliente["id"], cliente["limite_diario"]):
+        return error("Límite diario alcanzado", 429)
+
+    # 2-4. Consulta (o caché), cobro y respuesta en streaming
+    origen = iterar(en_cache["resultado"]["datos"]) if en_cache else backend.filas(sql, argumentos)
+    return StreamingResponse(
+        transmitir(cliente, tipo, origen, por_pagina, ndjson, en_cache, guardar),
+        media_type="application/x-ndjson" if ndjson else "application/json"
+    )
+
+@app.post("/sync")
+async def sync(request: Request):
+    """
+    Encola una sincronización del scraper lite y responde al momento con su job_id.
+    force_full=false: solo partidos recientes de la temporada en curso.
+    force_full=true: toda la página de resultados de la temporada en curso.
+    """
+    try:
+        data = await request.json()
+    except ValueError:
+        data = {}
+    if not isinstance(data, dict):
+        return error("El cuerpo debe ser un objeto JSON", 400)
+    try:
+        ligas = leer_ligas(data.get("leagues"))
+    except ValueError:
+        return error("'leagues' no válido", 400)
+    completo = leer_booleano(data.get("force_full", False))
+
+    trabajo, nuevo = encolar_sync(ligas, completo)
+    return JSONResponse({
+        "job_id": trabajo["job_id"],
+        "estado": trabajo["estado"],
+        "estado_url": f"/sync/{trabajo['job_id']}",
+        "message": f"Sync {'encolado' if nuevo else 'ya en cola'}: {trabajo['job_id']}"
+    }, status_code=202)
+
+@app.get("/sync/{job_id}")
+async def sync_estado(job_id: str):
+    trabajo = trabajos.get(job_id)
+    if not trabajo:
+        return error("Trabajo no encontrado", 404)
+    return trabajo
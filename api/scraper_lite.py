@@ -1,18 +1,25 @@
 # scraper_lite.py
 import asyncio
 import json
-from playwright.async_api import async_playwright
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeout
 from supabase import create_client
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import os
+import re
 import sys
 
+from equipos import ResolutorEquipos
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scraper_massive", "scraper_core"))
+from helpers import orden_minuto, parse_minuto
+
 # ======================================
 # CONFIGURACIÓN
 # ======================================
-SUPABASE_URL = "https://mvsnymlcqutxnmnfxdgt.supabase.co"
-SUPABASE_KEY = "TU_SUPABASE_SERVICE_KEY"  # ¡IMPORTANTE! Consíguela en Settings > API
+SUPABASE_URL = os.getenv("SUPABASE_URL", "https://mvsnymlcqutxnmnfxdgt.supabase.co")
+SUPABASE_KEY = os.getenv("SUPABASE_KEY", "TU_SUPABASE_SERVICE_KEY")  # ¡IMPORTANTE! Consíguela en Settings > API
 supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+equipos = ResolutorEquipos(supabase)
 
 # LIGAS A MONITOREAR (ajusta según necesites)
 LIGAS_MONITOREO = [
@@ -33,14 +40,37 @@ LIGAS_MONITOREO = [
     }
 ]
 
+# Ligas scrapeadas a la vez (una página cada una en el mismo navegador)
+MAX_LIGAS_CONCURRENTES = 3
+
+# Sondeo incremental: resultados de hoy y de los N días anteriores (el resto ya se guardó)
+DIAS_RESULTADOS = 1
+
+# MODO DAEMON (--daemon): navegador y clientes residentes + disparador HTTP local para n8n
+# Los resultados se piden según el calendario de cada liga, no a intervalos fijos
+PUERTO_DAEMON = 8765
+DURACION_PARTIDO = 115     # minutos desde el inicio hasta buscar el resultado
+REINTENTO_RESULTADO = 15   # minutos entre reintentos si el resultado aún no aparece
+MAX_REINTENTOS = 6         # después se da por aplazado/suspendido y se olvida
+REFRESCO_CALENDARIO = 12   # horas entre lecturas del calendario (/partidos/)
+DIAS_CALENDARIO = 7        # solo se planifican los partidos de los próximos días
+INTERVALO_REPOSO = 6       # horas: sondeo de seguridad aunque no haya partidos planificados
+
+# MODO EN VIVO (--daemon --vivo): goles de los partidos en juego con páginas abiertas (sql/007)
+INTERVALO_VIVO = 30        # segundos entre lecturas de las páginas abiertas
+MAX_PARTIDOS_VIVO = 6      # páginas de partido abiertas a la vez
+ANTELACION_VIVO = 5        # minutos antes del primer inicio en que se abre la página de la liga
+DURACION_MAX_VIVO = 4      # horas: se deja de seguir un partido aunque no conste como terminado
+
 # ======================================
 # FUNCIONES AUXILIARES
 # ======================================
-def obtener_temporada_actual():
-    """Obtiene ID de temporada actual desde Supabase"""
+def obtener_temporada_actual(liga_id):
+    """Obtiene ID de la temporada en curso de la liga desde Supabase"""
     try:
         response = supabase.table("temporadas")\
             .select("id")\
+            .eq("liga_id", liga_id)\
             .eq("is_current", True)\
             .limit(1)\
             .execute()
@@ -52,217 +82,335 @@ def obtener_temporada_actual():
     
     return None
 
-def partido_existe(liga_id, temporada_id, fecha, local, visitante):
-    """Verifica si partido ya existe en Supabase"""
-    try:
-        response = supabase.table("partidos")\
-            .select("id")\
-            .eq("liga_id", liga_id)\
-            .eq("temporada_id", temporada_id)\
-            .eq("fecha", fecha)\
-            .eq("local_id", local)\
-            .eq("visitante_id", visitante)\
-            .execute()
-        
-        return len(response.data) > 0
-    except:
-        return False
+def partidos_existentes(temporada_id, fechas, equipo_ids):
+    """Claves (fecha, local_id, visitante_id) ya guardadas: una sola consulta por liga-temporada"""
+    if not fechas or not equipo_ids:
+        return set()
+    response = supabase.table("partidos")\
+        .select("fecha, local_id, visitante_id")\
+        .eq("temporada_id", temporada_id)\
+        .in_("fecha", sorted(fechas))\
+        .in_("local_id", sorted(equipo_ids))\
+        .execute()
+    return {(r["fecha"], r["local_id"], r["visitante_id"]) for r in response.data or []}
 
-def obtener_equipo_id(nombre):
-    """Obtiene o crea equipo en Supabase"""
+def refrescar_temporada(temporada_id):
+    """Recalcula los agregados de la temporada e invalida su caché de consultas (sql/003)"""
     try:
-        # Buscar equipo
-        response = supabase.table("equipos")\
-            .select("id")\
-            .eq("nombre", nombre)\
-            .limit(1)\
-            .execute()
-        
-        if response.data and len(response.data) > 0:
-            return response.data[0]["id"]
-        
-        # Crear equipo si no existe
-        insert = supabase.table("equipos")\
-            .insert({"nombre": nombre})\
-            .execute()
-        
-        return insert.data[0]["id"]
+        supabase.rpc("refrescar_temporada", {"p_temporada_id": temporada_id}).execute()
     except Exception as e:
-        print(f"Error con equipo {nombre}: {e}")
-        return None
+        print(f"Error refrescando temporada: {e}")
 
 # ======================================
 # SCRAPER PRINCIPAL
 # ======================================
-async def scrape_liga_actualizada(liga_config):
-    """Scrapea partidos RECIENTES de una liga específica"""
-    pais = liga_config["pais"]
-    liga = liga_config["liga"]
-    liga_id = liga_config["liga_id"]
-    
-    print(f"🔍 Scrapeando {pais}/{liga}...")
-    
-    partidos_nuevos = []
-    
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        context = await browser.new_context(
-            viewport={'width': 1280, 'height': 720},
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        )
-        page = await context.new_page()
-        
+async def crear_contexto(browser):
+    """Contexto compartido por todas las ligas (sin imágenes, CSS ni fuentes)"""
+    context = await browser.new_context(
+        viewport={'width': 1280, 'height': 720},
+        user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+    )
+    await context.route("**/*.{png,jpg,jpeg,gif,svg,webp}", lambda r: r.abort())
+    await context.route("**/*.{css,woff,woff2}", lambda r: r.abort())
+    return context
+
+async def mostrar_todos_los_partidos(page):
+    """Pulsa 'Mostrar más partidos' hasta que la página de resultados está completa"""
+    boton = page.locator("a[data-testid='wcl-buttonLink']", has_text="Mostrar más partidos")
+    while await boton.count() > 0:
         try:
-            # Ir a resultados de la liga
-            url = f"https://www.flashscore.co/futbol/{pais}/{liga}/resultados/"
-            await page.goto(url, wait_until="networkidle", timeout=30000)
-            
-            # Esperar a que carguen los partidos
-            await page.wait_for_selector('.event__match', timeout=10000)
-            
-            # Obtener partidos de las últimas 48 horas
-            partidos = await page.evaluate("""
-                () => {
-                    const partidos = [];
-                    const hoy = new Date();
-                    const ayer = new Date(hoy);
-                    ayer.setDate(ayer.getDate() - 1);
-                    
-                    const elementos = document.querySelectorAll('.event__match');
-                    
-                    for (const el of elementos) {
-                        try {
-                            // Extraer datos básicos
-                            const timeElem = el.querySelector('.event__time');
-                            const homeElem = el.querySelector('.event__homeParticipant .participant__participantName');
-                            const awayElem = el.querySelector('.event__awayParticipant .participant__participantName');
-                            const scoreElem = el.querySelector('.event__score');
-                            
-                            if (!homeElem || !awayElem) continue;
-                            
-                            const fechaTexto = timeElem ? timeElem.textContent.trim() : '';
-                            const local = homeElem.textContent.trim();
-                            const visitante = awayElem.textContent.trim();
-                            const resultado = scoreElem ? scoreElem.textContent.trim() : '0-0';
-                            
-                            // Solo partidos recientes (hoy o ayer)
-                            if (fechaTexto.toLowerCase().includes('today') || 
-                                fechaTexto.toLowerCase().includes('ayer') ||
-                                fechaTexto.toLowerCase().includes('hoy') ||
-                                fechaTexto.toLowerCase().includes('yesterday')) {
-                                
-                                // Convertir fecha
-                                let fecha = new Date();
-                                if (fechaTexto.toLowerCase().includes('ayer') || 
-                                    fechaTexto.toLowerCase().includes('yesterday')) {
-                                    fecha.setDate(fecha.getDate() - 1);
-                                }
-                                
-                                const fechaISO = fecha.toISOString().split('T')[0];
-                                
-                                // Parsear resultado
-                                let goles_local = 0;
-                                let goles_visitante = 0;
-                                
-                                if (resultado.includes('-')) {
-                                    const [golL, golV] = resultado.split('-').map(g => parseInt(g.trim()) || 0);
-                                    goles_local = golL;
-                                    goles_visitante = golV;
-                                }
-                                
-                                partidos.push({
-                                    fecha: fechaISO,
-                                    local: local,
-                                    visitante: visitante,
-                                    goles_local: goles_local,
-                                    goles_visitante: goles_visitante,
-                                    resultado: resultado
-                                });
-                            }
-                        } catch (e) {
-                            console.error('Error parseando partido:', e);
-                        }
-                    }
-                    
-                    return partidos.slice(0, 10); // Máximo 10 partidos por ejecución
-                }
-            """)
-            
-            print(f"  📊 Encontrados {len(partidos)} partidos recientes")
-            
-            # Obtener temporada actual
-            temporada_id = obtener_temporada_actual()
-            if not temporada_id:
-                print("  ⚠️  No se encontró temporada actual")
-                return []
+            await boton.first.click()
+            await page.wait_for_timeout(1500)
+        except Exception:
+            break
+
+async def extraer_partidos_recientes(page, pais, liga, completo=False):
+    """
+    Partidos de hoy y de los DIAS_RESULTADOS días anteriores de la página de resultados de la liga.
+    Con completo=True, todos los de la página de resultados (temporada en curso).
+    """
+    # Ir a resultados de la liga
+    url = f"https://www.flashscore.co/futbol/{pais}/{liga}/resultados/"
+    await page.goto(url, wait_until="networkidle", timeout=30000)
+
+    # Esperar a que carguen los partidos
+    await page.wait_for_selector('.event__match', timeout=10000)
+    if completo:
+        await mostrar_todos_los_partidos(page)
+
+    # Filas de la página; la fecha se interpreta en Python (misma regla que el calendario)
+    filas = await page.evaluate("""
+        () => {
+            const partidos = [];
+            const elementos = document.querySelectorAll('.event__match');
             
-            # Procesar cada partido
-            for partido in partidos:
-                try:
-                    # Verificar si ya existe
-                    existe = partido_existe(
-                        liga_id, 
-                        temporada_id, 
-                        partido["fecha"], 
-                        partido["local"], 
-                        partido["visitante"]
-                    )
+            for (const el of elementos) {
+                try {
+                    // Extraer datos básicos
+                    const timeElem = el.querySelector('.event__time');
+                    const homeElem = el.querySelector('.event__homeParticipant .participant__participantName');
+                    const awayElem = el.querySelector('.event__awayParticipant .participant__participantName');
+                    const scoreElem = el.querySelector('.event__score');
                     
-                    if existe:
-                        print(f"  ⏭️  Partido ya existe: {partido['local']} vs {partido['visitante']}")
-                        continue
+                    if (!homeElem || !awayElem) continue;
                     
-                    # Obtener IDs de equipos
-                    local_id = obtener_equipo_id(partido["local"])
-                    visitante_id = obtener_equipo_id(partido["visitante"])
+                    const fechaTexto = timeElem ? timeElem.textContent.trim() : '';
+                    const local = homeElem.textContent.trim();
+                    const visitante = awayElem.textContent.trim();
+                    const resultado = scoreElem ? scoreElem.textContent.trim() : '0-0';
                     
-                    if not local_id or not visitante_id:
-                        print(f"  ⚠️  Error obteniendo IDs de equipos")
-                        continue
+                    // Parsear resultado
+                    let goles_local = 0;
+                    let goles_visitante = 0;
                     
-                    # Preparar datos para Supabase
-                    partido_data = {
-                        "liga_id": liga_id,
-                        "temporada_id": temporada_id,
-                        "fase_id": 1,  # ID de fase "Temporada Regular" (ajusta según tu DB)
-                        "jornada": 0,  # Se actualizará manualmente si es necesario
-                        "fecha": partido["fecha"],
-                        "local_id": local_id,
-                        "visitante_id": visitante_id,
-                        "g_local_1t": partido["goles_local"],  # Asumimos goles totales (ajustable)
-                        "g_visitante_1t": partido["goles_visitante"],
-                        "g_local_2t": 0,
-                        "g_visitante_2t": 0,
-                        "minutos_local_1t": "",
-                        "minutos_visitante_1t": "",
-                        "minutos_local_2t": "",
-                        "minutos_visitante_2t": "",
-                        "status": "FINISHED"
+                    if (resultado.includes('-')) {
+                        const [golL, golV] = resultado.split('-').map(g => parseInt(g.trim()) || 0);
+                        goles_local = golL;
+                        goles_visitante = golV;
                     }
                     
-                    # Insertar en Supabase
-                    response = supabase.table("partidos")\
-                        .insert(partido_data)\
-                        .execute()
-                    
-                    if response.data:
-                        print(f"  ✅ Nuevo: {partido['local']} {partido['resultado']} {partido['visitante']}")
-                        partidos_nuevos.append({
-                            "liga": liga,
-                            "partido": f"{partido['local']} vs {partido['visitante']}",
-                            "resultado": partido["resultado"]
-                        })
-                        
-                except Exception as e:
-                    print(f"  ❌ Error procesando partido: {e}")
-                    continue
-            
+                    partidos.push({
+                        hora: fechaTexto,
+                        local: local,
+                        visitante: visitante,
+                        goles_local: goles_local,
+                        goles_visitante: goles_visitante,
+                        resultado: resultado
+                    });
+                } catch (e) {
+                    console.error('Error parseando partido:', e);
+                }
+            }
+            return partidos;
+        }
+    """)
+
+    # Fecha local de la página, como el 'inicio' del calendario (ver resolver_vencidos)
+    hoy = date.today()
+    desde = (hoy - timedelta(days=DIAS_RESULTADOS)).isoformat()
+    partidos = []
+    for fila in filas:
+        fecha = parsear_fecha_resultado(fila.pop("hora"), hoy)
+        if not fecha or (not completo and fecha < desde):
+            continue
+        partidos.append({"fecha": fecha, **fila})
+    return partidos
+
+def parsear_fecha_resultado(texto, hoy):
+    """'18.10. 20:00', '18.10.2024', 'Hoy' o 'Ayer' de la página de resultados → 'YYYY-MM-DD'"""
+    texto = texto.lower()
+    if "hoy" in texto or "today" in texto:
+        return hoy.isoformat()
+    if "ayer" in texto or "yesterday" in texto:
+        return (hoy - timedelta(days=1)).isoformat()
+    m = re.match(r"(\d{1,2})\.(\d{1,2})\.(\d{4})?", texto)
+    if not m:
+        return None
+    dia, mes, anio = int(m.group(1)), int(m.group(2)), m.group(3)
+    # Sin año y "en el futuro": es del año anterior (temporada a caballo)
+    anio = int(anio) if anio else hoy.year - ((mes, dia) > (hoy.month, hoy.day))
+    try:
+        return date(anio, mes, dia).isoformat()
+    except ValueError:
+        return None
+
+def parsear_inicio(texto, ahora):
+    """'19.10. 20:00' → datetime local; sin año se toma el de ahora (o el siguiente si ya pasó hace días)"""
+    m = re.match(r"(\d{1,2})\.(\d{1,2})\.(\d{4})?\s*(\d{1,2}):(\d{2})", texto)
+    if not m:
+        return None
+    dia, mes, anio, hora, minuto = m.groups()
+    inicio = datetime(int(anio or ahora.year), int(mes), int(dia), int(hora), int(minuto))
+    if not anio and inicio < ahora - timedelta(days=30):
+        inicio = inicio.replace(year=ahora.year + 1)
+    return inicio
+
+async def extraer_calendario(page, pais, liga):
+    """Próximos partidos de la liga (página /partidos/) con su hora de inicio"""
+    url = f"https://www.flashscore.co/futbol/{pais}/{liga}/partidos/"
+    await page.goto(url, wait_until="networkidle", timeout=30000)
+    try:
+        await page.wait_for_selector('.event__match', timeout=10000)
+    except PlaywrightTimeout:
+        return []  # fin de temporada o parón: no hay partidos programados
+
+    filas = await page.evaluate("""
+        () => {
+            const filas = [];
+            for (const el of document.querySelectorAll('.event__match')) {
+                const timeElem = el.querySelector('.event__time');
+                const homeElem = el.querySelector('.event__homeParticipant .participant__participantName');
+                const awayElem = el.querySelector('.event__awayParticipant .participant__participantName');
+                const stageElem = el.querySelector('.event__stage');
+                if (!timeElem || !homeElem || !awayElem) continue;
+                filas.push({
+                    hora: timeElem.textContent.trim(),
+                    local: homeElem.textContent.trim(),
+                    visitante: awayElem.textContent.trim(),
+                    estado: stageElem ? stageElem.textContent.trim() : ''
+                });
+            }
+            return filas;
+        }
+    """)
+
+    ahora = datetime.now()
+    calendario = []
+    for fila in filas:
+        inicio = parsear_inicio(fila["hora"], ahora)
+        if not inicio or inicio > ahora + timedelta(days=DIAS_CALENDARIO):
+            continue
+        if re.search(r"aplaz|postp|cancel|suspend", fila["estado"], re.I):
+            print(f"  ⏸️  {fila['local']} vs {fila['visitante']}: {fila['estado']}")
+            continue
+        calendario.append({"local": fila["local"], "visitante": fila["visitante"], "inicio": inicio})
+    return calendario
+
+def guardar_partidos(liga_config, partidos):
+    """Escribe en Supabase los partidos nuevos de una liga (síncrono, se ejecuta en un hilo)"""
+    liga = liga_config["liga"]
+    liga_id = liga_config["liga_id"]
+
+    # Obtener temporada actual
+    temporada_id = obtener_temporada_actual(liga_id)
+    if not temporada_id:
+        print("  ⚠️  No se encontró temporada actual")
+        return []
+
+    # IDs de equipos en lote (índice en memoria, ver equipos.py)
+    equipo_ids = equipos.resolver_lote(
+        [x["local"] for x in partidos] + [x["visitante"] for x in partidos], liga_id
+    )
+
+    # Existencia de todos los candidatos en una sola consulta
+    existentes = partidos_existentes(
+        temporada_id,
+        {x["fecha"] for x in partidos},
+        set(equipo_ids.values())
+    )
+
+    payload = []
+    resumen = []
+    for partido in partidos:
+        local_id = equipo_ids.get(partido["local"])
+        visitante_id = equipo_ids.get(partido["visitante"])
+
+        if not local_id or not visitante_id:
+            print(f"  ⚠️  Error obteniendo IDs de equipos")
+            continue
+
+        if (partido["fecha"], local_id, visitante_id) in existentes:
+            print(f"  ⏭️  Partido ya existe: {partido['local']} vs {partido['visitante']}")
+            continue
+
+        payload.append({
+            "liga_id": liga_id,
+            "temporada_id": temporada_id,
+            "fase_id": 1,  # ID de fase "Temporada Regular" (ajusta según tu DB)
+            "jornada": 0,  # Se actualizará manualmente si es necesario
+            "fecha": partido["fecha"],
+            "local_id": local_id,
+            "visitante_id": visitante_id,
+            "g_local_1t": partido["goles_local"],  # Asumimos goles totales (ajustable)
+            "g_visitante_1t": partido["goles_visitante"],
+            "g_local_2t": 0,
+            "g_visitante_2t": 0,
+            "minutos_local_1t": "",
+            "minutos_visitante_1t": "",
+            "minutos_local_2t": "",
+            "minutos_visitante_2t": "",
+            "status": "FINISHED"
+        })
+        resumen.append({
+            "liga": liga,
+            "partido": f"{partido['local']} vs {partido['visitante']}",
+            "resultado": partido["resultado"]
+        })
+
+    if not payload:
+        return []
+
+    # Un solo upsert por liga; no pisa filas que ya cargó el exportador completo
+    supabase.table("partidos")\
+        .upsert(
+            payload,
+            on_conflict="temporada_id,fase_id,jornada,fecha,local_id,visitante_id",
+            ignore_duplicates=True
+        )\
+        .execute()
+
+    for nuevo in resumen:
+        print(f"  ✅ Nuevo: {nuevo['partido']} ({nuevo['resultado']})")
+
+    refrescar_temporada(temporada_id)
+    return resumen
+
+async def scrape_liga_actualizada(liga_config, context, semaforo, completo=False):
+    """
+    Scrapea partidos RECIENTES de una liga (o toda su página de resultados si completo=True)
+    en su propia página del contexto compartido. Los errores se propagan al llamador.
+    """
+    _, nuevos = await leer_y_guardar(liga_config, context, semaforo, completo)
+    return nuevos
+
+async def leer_y_guardar(liga_config, context, semaforo, completo=False):
+    """Retorna (partidos leídos en la página de resultados, partidos nuevos guardados)"""
+    pais = liga_config["pais"]
+    liga = liga_config["liga"]
+
+    async with semaforo:
+        print(f"🔍 Scrapeando {pais}/{liga}{' (completo)' if completo else ''}...")
+        page = await context.new_page()
+        try:
+            partidos = await extraer_partidos_recientes(page, pais, liga, completo)
         except Exception as e:
             print(f"  ❌ Error scrapeando {liga}: {e}")
+            raise
+        finally:
+            await page.close()
+
+    print(f"  📊 {liga}: {len(partidos)} partidos {'en resultados' if completo else 'recientes'}")
+    if not partidos:
+        return partidos, []
+
+    try:
+        return partidos, await asyncio.to_thread(guardar_partidos, liga_config, partidos)
+    except Exception as e:
+        print(f"  ❌ Error guardando {liga}: {e}")
+        raise
+
+async def sincronizar(ligas=None, completo=False, al_terminar_liga=None):
+    """
+    Sincroniza las ligas indicadas por nombre (todas si None) en un navegador con como mucho
+    MAX_LIGAS_CONCURRENTES páginas a la vez. Solo toca la temporada en curso de cada liga.
+    al_terminar_liga(nombre, nuevos, error) se llama al acabar cada una.
+    Retorna {liga: lista de partidos nuevos}; las ligas fallidas quedan con lista vacía.
+    """
+    seleccion = [l for l in LIGAS_MONITOREO if not ligas or l["liga"] in ligas]
+    resultados = {}
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        try:
+            context = await crear_contexto(browser)
+            semaforo = asyncio.Semaphore(MAX_LIGAS_CONCURRENTES)
+
+            async def una(liga_config):
+                nombre = liga_config["liga"]
+                nuevos, error = [], None
+                try:
+                    nuevos = await scrape_liga_actualizada(liga_config, context, semaforo, completo)
+                except Exception as e:
+                    error = str(e)
+                resultados[nombre] = nuevos
+                if al_terminar_liga:
+                    al_terminar_liga(nombre, nuevos, error)
+
+            await asyncio.gather(*(una(liga) for liga in seleccion))
         finally:
             await browser.close()
-    
-    return partidos_nuevos
+
+    return resultados
 
 async def main():
     """Función principal"""
@@ -270,12 +418,10 @@ async def main():
     print(f"🔄 SCRAPER LITE - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("=" * 50)
     
-    todos_partidos = []
-    
-    # Scrapear cada liga
-    for liga in LIGAS_MONITOREO:
-        partidos = await scrape_liga_actualizada(liga)
-        todos_partidos.extend(partidos)
+    # Un solo navegador; las ligas se scrapean a la vez, cada una en su página
+    resultados = await sincronizar()
+
+    todos_partidos = [partido for partidos in resultados.values() for partido in partidos]
     
     # Resumen
     print("\n" + "=" * 50)
@@ -301,10 +447,458 @@ async def main():
     
     return todos_partidos
 
+# ======================================
+# MODO EN VIVO
+# ======================================
+def goles_por_parte(goles):
+    """Eventos [{lado, mitad, minuto}] → columnas g_*/minutos_* de 'partidos'"""
+    datos = {}
+    for mitad in (1, 2):
+        for lado in ("local", "visitante"):
+            minutos = sorted(
+                (g["minuto"] for g in goles if g["mitad"] == mitad and g["lado"] == lado),
+                key=orden_minuto
+            )
+            datos[f"g_{lado}_{mitad}t"] = len(minutos)
+            datos[f"minutos_{lado}_{mitad}t"] = ", ".join(minutos)
+    return datos
+
+async def leer_partidos_en_juego(page):
+    """Partidos en juego de la página de la liga (se actualiza sola, no hace falta recargar)"""
+    partidos = await page.evaluate("""
+        () => Array.from(document.querySelectorAll('.event__match--live')).map(el => {
+            const homeElem = el.querySelector('.event__homeParticipant .participant__participantName');
+            const awayElem = el.querySelector('.event__awayParticipant .participant__participantName');
+            const linkElem = el.querySelector('a.eventRowLink');
+            if (!homeElem || !awayElem || !linkElem) return null;
+            return {
+                local: homeElem.textContent.trim(),
+                visitante: awayElem.textContent.trim(),
+                url: linkElem.href
+            };
+        }).filter(Boolean)
+    """)
+    for partido in partidos:
+        if partido["url"].startswith("/"):
+            partido["url"] = f"https://www.flashscore.co{partido['url']}"
+    return partidos
+
+async def leer_goles_en_vivo(page):
+    """Goles (lado, mitad, minuto) del resumen del partido y si ya ha terminado"""
+    return await page.evaluate("""
+        () => {
+            const goles = [];
+            let mitad = null;
+            for (const sec of document.querySelectorAll('.smv__verticalSections > div')) {
+                if (sec.classList.contains('wclHeaderSection--summary')) {
+                    const txt = sec.textContent;
+                    mitad = txt.includes('1er') ? 1 : txt.includes('2º') ? 2 : null;
+                    continue;
+                }
+                const timeElem = sec.querySelector('.smv__timeBox');
+                if (!mitad || !timeElem || !sec.querySelector("[data-testid='wcl-icon-soccer']")) continue;
+                goles.push({
+                    lado: sec.classList.contains('smv__homeParticipant') ? 'local' : 'visitante',
+                    mitad: mitad,
+                    minuto: timeElem.textContent.trim().replace(/'$/, '')
+                });
+            }
+            const estadoElem = document.querySelector('.fixedHeaderDuel__detailStatus, .detailScore__status');
+            const estado = estadoElem ? estadoElem.textContent.trim() : '';
+            return { goles: goles, terminado: /finaliz|finished|terminad/i.test(estado) };
+        }
+    """)
+
+def guardar_goles_vivo(liga_config, partido, goles, terminado):
+    """
+    Escribe el estado de un partido en juego: su fila de 'partidos' (goles y minutos por parte)
+    y los goles nuevos en 'goles_partido'. Los que desaparecen (anulados por VAR) se borran.
+    'partido' guarda entre llamadas el id de la fila y los goles ya escritos.
+    """
+    if not partido.get("id"):
+        temporada_id = obtener_temporada_actual(liga_config["liga_id"])
+        if not temporada_id:
+            print("  ⚠️  No se encontró temporada actual")
+            return
+        equipo_ids = equipos.resolver_lote([partido["local"], partido["visitante"]], liga_config["liga_id"])
+        local_id = equipo_ids.get(partido["local"])
+        visitante_id = equipo_ids.get(partido["visitante"])
+        if not local_id or not visitante_id:
+            print(f"  ⚠️  Error obteniendo IDs de equipos: {partido['local']} vs {partido['visitante']}")
+            return
+
+        response = supabase.table("partidos")\
+            .select("id")\
+            .eq("temporada_id", temporada_id)\
+            .eq("fecha", partido["fecha"])\
+            .eq("local_id", local_id)\
+            .eq("visitante_id", visitante_id)\
+            .limit(1)\
+            .execute()
+        if not response.data:
+            response = supabase.table("partidos").insert({
+                "liga_id": liga_config["liga_id"],
+                "temporada_id": temporada_id,
+                "fase_id": 1,  # Igual que guardar_partidos
+                "jornada": 0,
+                "fecha": partido["fecha"],
+                "local_id": local_id,
+                "visitante_id": visitante_id,
+                "status": "LIVE"
+            }).execute()
+        partido.update(id=response.data[0]["id"], temporada_id=temporada_id, eventos=set())
+
+    supabase.table("partidos")\
+        .update({**goles_por_parte(goles), "status": "FINISHED" if terminado else "LIVE"})\
+        .eq("id", partido["id"])\
+        .execute()
+
+    # Clave de cada gol (sql/007): (mitad, lado, minuto, minuto_extra, orden dentro del mismo minuto)
+    actuales = set()
+    for gol in goles:
+        minuto = parse_minuto(gol["minuto"])
+        if not minuto:
+            continue
+        minuto, minuto_extra = minuto
+        orden = 1
+        while (gol["mitad"], gol["lado"], minuto, minuto_extra, orden) in actuales:
+            orden += 1
+        actuales.add((gol["mitad"], gol["lado"], minuto, minuto_extra, orden))
+
+    nuevos = actuales - partido["eventos"]
+    if nuevos:
+        supabase.table("goles_partido")\
+            .upsert(
+                [
+                    {"partido_id": partido["id"], "mitad": mi, "lado": la, "minuto": m, "minuto_extra": me, "orden": o}
+                    for mi, la, m, me, o in nuevos
+                ],
+                on_conflict="partido_id,mitad,lado,minuto,minuto_extra,orden",
+                ignore_duplicates=True
+            )\
+            .execute()
+        for mitad, lado, minuto, minuto_extra, _ in sorted(nuevos):
+            nombre = partido["local"] if lado == "local" else partido["visitante"]
+            texto = f"{minuto}+{minuto_extra}" if minuto_extra else f"{minuto}"
+            print(f"  ⚽ {partido['local']} vs {partido['visitante']}: gol de {nombre} ({texto}', {mitad}T)")
+
+    for mitad, lado, minuto, minuto_extra, orden in partido["eventos"] - actuales:
+        supabase.table("goles_partido")\
+            .delete()\
+            .eq("partido_id", partido["id"])\
+            .eq("mitad", mitad)\
+            .eq("lado", lado)\
+            .eq("minuto", minuto)\
+            .eq("minuto_extra", minuto_extra)\
+            .eq("orden", orden)\
+            .execute()
+        texto = f"{minuto}+{minuto_extra}" if minuto_extra else f"{minuto}"
+        print(f"  ↩️  {partido['local']} vs {partido['visitante']}: gol anulado ({texto}')")
+
+    partido["eventos"] = actuales
+    if terminado:
+        refrescar_temporada(partido["temporada_id"])
+
+# ======================================
+# MODO DAEMON
+# ======================================
+class DaemonLite:
+    """
+    Proceso residente: un navegador y un contexto calientes y sondeos guiados por el calendario.
+    Lee los próximos partidos de cada liga (/partidos/) y solo pide resultados cuando alguno
+    acaba de terminar, reintentando si aún no aparece (aplazados, prórrogas, retrasos).
+    Endpoint local para que n8n dispare un sondeo inmediato:
+        POST /scrape  {"ligas": ["laliga"]}   (sin cuerpo = todas)
+        GET  /estado
+    Con vivo=True, mientras una liga tiene partidos en juego según el calendario se deja
+    abierta su página y una por partido (hasta MAX_PARTIDOS_VIVO) para escribir los goles al momento.
+    """
+
+    def __init__(self, ligas=LIGAS_MONITOREO, puerto=PUERTO_DAEMON, vivo=False):
+        self.ligas = {l["liga"]: l for l in ligas}
+        self.puerto = puerto
+        self.vivo = vivo
+        self.paginas_liga = {}
+        self.siguiendo = {}  # url del partido → tarea que lo sigue
+        self.proxima = {nombre: 0.0 for nombre in self.ligas}
+        self.en_curso = {}
+        self.calendario = {nombre: [] for nombre in self.ligas}
+        self.calendario_leido = {nombre: 0.0 for nombre in self.ligas}
+        self.ultimo_sondeo = {nombre: 0.0 for nombre in self.ligas}
+        self.forzadas = set()
+        self.estado = {
+            nombre: {"ultima": None, "proxima": None, "nuevos": 0, "planificados": 0, "en_vivo": [], "error": None}
+            for nombre in self.ligas
+        }
+        self.despertar = asyncio.Event()
+        self.playwright = None
+        self.browser = None
+        self.context = None
+        self.semaforo = asyncio.Semaphore(MAX_LIGAS_CONCURRENTES)
+
+    async def asegurar_navegador(self):
+        """Lanza (o relanza si se cayó) el navegador compartido"""
+        if self.browser and self.browser.is_connected():
+            return
+        if not self.playwright:
+            self.playwright = await async_playwright().start()
+        self.browser = await self.playwright.chromium.launch(headless=True)
+        self.context = await crear_contexto(self.browser)
+        print("🌐 Navegador listo")
+
+    def vencimiento(self, partido):
+        """Momento (timestamp) en que toca buscar el resultado del partido"""
+        if partido["reintento"]:
+            return partido["reintento"]
+        return (partido["inicio"] + timedelta(minutes=DURACION_PARTIDO)).timestamp()
+
+    def planificar(self, nombre):
+        """Siguiente sondeo: primer resultado pendiente, relectura del calendario o sondeo de seguridad"""
+        candidatos = [
+            self.calendario_leido[nombre] + REFRESCO_CALENDARIO * 3600,
+            self.ultimo_sondeo[nombre] + INTERVALO_REPOSO * 3600
+        ]
+        candidatos += [self.vencimiento(p) for p in self.calendario[nombre]]
+        return min(candidatos)
+
+    async def leer_calendario(self, nombre):
+        liga_config = self.ligas[nombre]
+        async with self.semaforo:
+            page = await self.context.new_page()
+            try:
+                leidos = await extraer_calendario(page, liga_config["pais"], nombre)
+            finally:
+                await page.close()
+
+        # Los ya empezados no salen en /partidos/: se conservan hasta tener su resultado
+        ahora = datetime.now()
+        calendario = {
+            (p["local"], p["visitante"]): p for p in self.calendario[nombre] if p["inicio"] <= ahora
+        }
+        for partido in leidos:
+            calendario[(partido["local"], partido["visitante"])] = {**partido, "intentos": 0, "reintento": None}
+        self.calendario[nombre] = sorted(calendario.values(), key=lambda p: p["inicio"])
+        self.calendario_leido[nombre] = ahora.timestamp()
+        print(f"📅 {nombre}: {len(self.calendario[nombre])} partidos planificados")
+
+    def resolver_vencidos(self, nombre, vencidos, partidos):
+        """
+        Quita del calendario los partidos con resultado; el resto se reintenta más tarde.
+        Se casan por fecha y equipos: el mismo cruce puede estar en resultados de otra jornada.
+        """
+        terminados = {(p["fecha"], p["local"], p["visitante"]) for p in partidos}
+        for partido in vencidos:
+            if (partido["inicio"].date().isoformat(), partido["local"], partido["visitante"]) in terminados:
+                self.calendario[nombre].remove(partido)
+                continue
+            partido["intentos"] += 1
+            partido["reintento"] = datetime.now().timestamp() + REINTENTO_RESULTADO * 60
+            if partido["intentos"] > MAX_REINTENTOS:
+                print(f"  ⏸️  {partido['local']} vs {partido['visitante']}: sin resultado, se da por aplazado")
+                self.calendario[nombre].remove(partido)
+
+    async def sondear(self, nombre):
+        liga_config = self.ligas[nombre]
+        reintentar = False
+        try:
+            await self.asegurar_navegador()
+            if datetime.now().timestamp() >= self.calendario_leido[nombre] + REFRESCO_CALENDARIO * 3600:
+                await self.leer_calendario(nombre)
+
+            ahora = datetime.now().timestamp()
+            vencidos = [p for p in self.calendario[nombre] if self.vencimiento(p) <= ahora]
+            if vencidos or nombre in self.forzadas or ahora >= self.ultimo_sondeo[nombre] + INTERVALO_REPOSO * 3600:
+                self.forzadas.discard(nombre)
+                partidos, nuevos = await leer_y_guardar(liga_config, self.context, self.semaforo)
+                self.ultimo_sondeo[nombre] = datetime.now().timestamp()
+                self.resolver_vencidos(nombre, vencidos, partidos)
+                self.estado[nombre].update(
+                    nuevos=len(nuevos),
+                    ultima=datetime.now().isoformat(timespec="seconds")
+                )
+            self.estado[nombre]["error"] = None
+        except Exception as e:
+            print(f"  ❌ Error en sondeo de {nombre}: {e}")
+            self.estado[nombre]["error"] = str(e)
+            reintentar = True
+        finally:
+            # Un POST /scrape llegado durante este sondeo (sigue en forzadas) no se pierde;
+            # tras un error se respeta la espera y sigue forzada para el reintento
+            self.proxima[nombre] = 0.0 if nombre in self.forzadas else self.planificar(nombre)
+            if reintentar:
+                self.proxima[nombre] = max(self.proxima[nombre], datetime.now().timestamp() + REINTENTO_RESULTADO * 60)
+            self.estado[nombre].update(
+                planificados=len(self.calendario[nombre]),
+                proxima=datetime.fromtimestamp(self.proxima[nombre]).isoformat(timespec="seconds")
+            )
+            self.en_curso.pop(nombre, None)
+            self.despertar.set()
+
+    def disparar(self, ligas=None):
+        """Adelanta el sondeo de resultados de las ligas indicadas (o de todas) a ahora mismo"""
+        nombres = [n for n in (ligas or self.ligas) if n in self.ligas]
+        for nombre in nombres:
+            self.forzadas.add(nombre)
+            self.proxima[nombre] = 0.0
+        self.despertar.set()
+        return nombres
+
+    def en_juego(self, nombre):
+        """Algún partido del calendario ha empezado (o está a punto) y aún no tiene resultado"""
+        umbral = datetime.now() + timedelta(minutes=ANTELACION_VIVO)
+        return any(p["inicio"] <= umbral for p in self.calendario[nombre])
+
+    async def cerrar_pagina_liga(self, nombre):
+        page = self.paginas_liga.pop(nombre, None)
+        if page and not page.is_closed():
+            await page.close()
+
+    async def vigilar_liga(self, nombre):
+        """Abre (o cierra) la página de la liga y lanza el seguimiento de cada partido en juego"""
+        if not self.en_juego(nombre):
+            await self.cerrar_pagina_liga(nombre)
+            return
+
+        page = self.paginas_liga.get(nombre)
+        if not page or page.is_closed():
+            await self.asegurar_navegador()
+            page = await self.context.new_page()
+            self.paginas_liga[nombre] = page
+            pais = self.ligas[nombre]["pais"]
+            await page.goto(f"https://www.flashscore.co/futbol/{pais}/{nombre}/", wait_until="networkidle", timeout=30000)
+
+        for partido in await leer_partidos_en_juego(page):
+            if partido["url"] in self.siguiendo or len(self.siguiendo) >= MAX_PARTIDOS_VIVO:
+                continue
+            self.siguiendo[partido["url"]] = asyncio.create_task(self.seguir_partido(nombre, partido))
+
+    def fecha_partido(self, nombre, partido):
+        """
+        Fecha del partido según su 'inicio' en el calendario (hora local de Flashscore), la misma
+        que da parsear_fecha_resultado: la fila en vivo y la del resultado comparten clave
+        """
+        for fijo in self.calendario[nombre]:
+            if (fijo["local"], fijo["visitante"]) == (partido["local"], partido["visitante"]):
+                return fijo["inicio"].date().isoformat()
+        return date.today().isoformat()
+
+    async def seguir_partido(self, nombre, partido):
+        """Relee el resumen del partido cada INTERVALO_VIVO segundos y escribe cada cambio"""
+        texto = f"{partido['local']} vs {partido['visitante']}"
+        partido["fecha"] = self.fecha_partido(nombre, partido)
+        self.estado[nombre]["en_vivo"].append(texto)
+        print(f"🔴 En vivo: {texto}")
+        page = None
+        try:
+            page = await self.context.new_page()
+            await page.goto(partido["url"], wait_until="domcontentloaded", timeout=30000)
+            limite = datetime.now() + timedelta(hours=DURACION_MAX_VIVO)
+            while True:
+                lectura = await leer_goles_en_vivo(page)
+                # Solo se escribe si algo cambió (la primera lectura crea la fila 'LIVE')
+                firma = (sorted((g["mitad"], g["lado"], g["minuto"]) for g in lectura["goles"]), lectura["terminado"])
+                if firma != partido.get("firma"):
+                    await asyncio.to_thread(guardar_goles_vivo, self.ligas[nombre], partido, lectura["goles"], lectura["terminado"])
+                    partido["firma"] = firma
+                if lectura["terminado"] or datetime.now() > limite:
+                    print(f"🏁 Fin del seguimiento: {texto}")
+                    return
+                await asyncio.sleep(INTERVALO_VIVO)
+        except Exception as e:
+            print(f"  ❌ Error siguiendo {texto}: {e}")
+        finally:
+            if page and not page.is_closed():
+                await page.close()
+            self.estado[nombre]["en_vivo"].remove(texto)
+            self.siguiendo.pop(partido["url"], None)
+
+    async def bucle_vivo(self):
+        while True:
+            for nombre in self.ligas:
+                try:
+                    await self.vigilar_liga(nombre)
+                except Exception as e:
+                    print(f"  ❌ Error en vivo ({nombre}): {e}")
+                    await self.cerrar_pagina_liga(nombre)
+            await asyncio.sleep(INTERVALO_VIVO)
+
+    async def bucle(self):
+        while True:
+            ahora = datetime.now().timestamp()
+            for nombre, cuando in self.proxima.items():
+                if cuando <= ahora and nombre not in self.en_curso:
+                    self.en_curso[nombre] = asyncio.create_task(self.sondear(nombre))
+
+            pendientes = [c for n, c in self.proxima.items() if n not in self.en_curso]
+            espera = max(min(pendientes) - ahora, 1) if pendientes else None
+            self.despertar.clear()
+            try:
+                await asyncio.wait_for(self.despertar.wait(), timeout=espera)
+            except asyncio.TimeoutError:
+                pass
+
+    async def atender(self, reader, writer):
+        """Servidor HTTP mínimo (solo escucha en localhost)"""
+        codigo, respuesta = 404, {"error": "Ruta no encontrada"}
+        try:
+            cabecera = await reader.readuntil(b"\r\n\r\n")
+            linea, *cabeceras = cabecera.decode("latin-1").split("\r\n")
+            metodo, ruta, _ = linea.split(" ", 2)
+            largo = 0
+            for h in cabeceras:
+                if h.lower().startswith("content-length:"):
+                    largo = int(h.split(":", 1)[1])
+            cuerpo = json.loads(await reader.readexactly(largo)) if largo else {}
+
+            if metodo == "POST" and ruta == "/scrape":
+                codigo, respuesta = 202, {"encoladas": self.disparar(cuerpo.get("ligas"))}
+            elif metodo == "GET" and ruta == "/estado":
+                codigo, respuesta = 200, self.estado
+        except Exception as e:
+            codigo, respuesta = 400, {"error": str(e)}
+
+        datos = json.dumps(respuesta, ensure_ascii=False).encode()
+        razones = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found"}
+        writer.write(
+            f"HTTP/1.1 {codigo} {razones[codigo]}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(datos)}\r\n"
+            f"Connection: close\r\n\r\n".encode() + datos
+        )
+        await writer.drain()
+        writer.close()
+
+    async def ejecutar(self):
+        print("=" * 50)
+        print(f"🛰️ SCRAPER LITE (daemon) - http://127.0.0.1:{self.puerto}")
+        print("=" * 50)
+        await self.asegurar_navegador()
+        await asyncio.to_thread(equipos.cargar)
+        servidor = await asyncio.start_server(self.atender, "127.0.0.1", self.puerto)
+        tarea_vivo = asyncio.create_task(self.bucle_vivo()) if self.vivo else None
+        try:
+            async with servidor:
+                await self.bucle()
+        finally:
+            if tarea_vivo:
+                tarea_vivo.cancel()
+            if self.browser:
+                await self.browser.close()
+            if self.playwright:
+                await self.playwright.stop()
+
 # ======================================
 # EJECUCIÓN
 # ======================================
 if __name__ == "__main__":
+    # Proceso residente: python scraper_lite.py --daemon [--vivo] [--puerto=8765]
+    if "--daemon" in sys.argv:
+        puerto = PUERTO_DAEMON
+        for arg in sys.argv:
+            if arg.startswith("--puerto="):
+                puerto = int(arg.split("=", 1)[1])
+        asyncio.run(DaemonLite(puerto=puerto, vivo="--vivo" in sys.argv).ejecutar())
+        sys.exit(0)
+
     # Para ejecutar desde n8n o línea de comandos
     result = asyncio.run(main())
     
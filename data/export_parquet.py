@@ -0,0 +1,194 @@
+# export_parquet.py - Exportación columnar (Parquet) del histórico de partidos
+import glob
+import json
+import os
+import sqlite3
+import sys
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+MINUTOS_COLUMNAS = [
+    "minutos_local_1t", "minutos_visitante_1t",
+    "minutos_local_2t", "minutos_visitante_2t",
+]
+
+ESQUEMA = pa.schema([
+    ("pais", pa.string()),
+    ("liga", pa.string()),
+    ("temporada", pa.string()),
+    ("id", pa.int64()),
+    ("fase", pa.string()),
+    ("jornada", pa.int32()),
+    ("fecha", pa.string()),
+    ("fecha_iso", pa.string()),  # "2025-05-25 14:00" (scraper_core/helpers.fecha_iso)
+    ("local", pa.string()),
+    ("visitante", pa.string()),
+    ("g_local_1t", pa.int16()),
+    ("g_visitante_1t", pa.int16()),
+    ("g_local_2t", pa.int16()),
+    ("g_visitante_2t", pa.int16()),
+    # "4, 45+2" -> minutos [4, 45] y tiempo añadido [0, 2] (listas alineadas)
+    *[(col, pa.list_(pa.int16())) for col in MINUTOS_COLUMNAS],
+    *[(col.replace("minutos_", "extra_"), pa.list_(pa.int16())) for col in MINUTOS_COLUMNAS],
+    ("updated_at", pa.string()),
+])
+
+PARTICION = ds.partitioning(
+    pa.schema([("pais", pa.string()), ("liga", pa.string()), ("temporada", pa.string())]),
+    flavor="hive",
+)
+
+ESTADO = ".parquet_estado.json"
+
+# -------------------------------------------------
+# HELPERS
+# -------------------------------------------------
+
+def parse_minutos(texto):
+    """'4, 8, 45+2' -> ([4, 8, 45], [0, 0, 2])"""
+    minutos, extras = [], []
+    for parte in (texto or "").split(","):
+        parte = parte.strip().rstrip("'")
+        if not parte:
+            continue
+        base, _, extra = parte.partition("+")
+        try:
+            minutos.append(int(base))
+            extras.append(int(extra) if extra else 0)
+        except ValueError:
+            continue
+    return minutos, extras
+
+
+def cargar_estado(salida):
+    try:
+        with open(os.path.join(salida, ESTADO), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def guardar_estado(salida, estado):
+    ruta = os.path.join(salida, ESTADO)
+    with open(ruta + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(estado, f, indent=2, ensure_ascii=False)
+    os.replace(ruta + ".tmp", ruta)
+
+
+def tabla_origen(conn):
+    """'v_partidos' en la base consolidada, 'partidos' en los archivos por temporada"""
+    vista = conn.execute("SELECT name FROM sqlite_master WHERE type='view' AND name='v_partidos'").fetchone()
+    if vista:
+        return "v_partidos"
+    tabla = conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='partidos'").fetchone()
+    return "partidos" if tabla else None
+
+
+def filas_a_tabla(filas):
+    """Convierte filas de 'partidos' a una tabla Arrow con los minutos como listas de enteros"""
+    columnas = {campo.name: [] for campo in ESQUEMA}
+    for fila in filas:
+        for campo in ESQUEMA:
+            if campo.name in fila.keys():
+                if campo.name in MINUTOS_COLUMNAS:
+                    minutos, extras = parse_minutos(fila[campo.name])
+                    columnas[campo.name].append(minutos)
+                    columnas[campo.name.replace("minutos_", "extra_")].append(extras)
+                else:
+                    columnas[campo.name].append(fila[campo.name])
+            elif campo.name in ("updated_at", "fecha_iso"):  # Archivos anteriores a esas columnas
+                columnas[campo.name].append(None)
+    return pa.Table.from_pydict(columnas, schema=ESQUEMA)
+
+# -------------------------------------------------
+# EXPORTACIÓN
+# -------------------------------------------------
+
+def temporadas_modificadas(conn, tabla, marca):
+    """(pais, liga, temporada) con filas nuevas o modificadas desde la marca"""
+    if marca:
+        cur = conn.execute(
+            f"SELECT DISTINCT pais, liga, temporada FROM {tabla} WHERE updated_at > ?", (marca,)
+        )
+    else:
+        cur = conn.execute(f"SELECT DISTINCT pais, liga, temporada FROM {tabla}")
+    return [tuple(fila) for fila in cur.fetchall()]
+
+
+def exportar_archivo(db_path, salida, marca):
+    """
+    Reescribe las particiones de las temporadas que cambiaron en un .db.
+    Retorna (partidos exportados, nueva marca).
+    """
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        tabla = tabla_origen(conn)
+        if not tabla:
+            return 0, marca
+
+        columnas = [fila[1] for fila in conn.execute(f"PRAGMA table_info({tabla})")]
+        tiene_marca = "updated_at" in columnas
+        if tiene_marca:
+            if marca and marca.startswith("mtime:"):
+                marca = None  # El archivo acaba de ganar 'updated_at': exportarlo entero una vez
+            temporadas = temporadas_modificadas(conn, tabla, marca)
+        else:
+            # Archivos anteriores al seguimiento de cambios: la marca es la fecha de modificación
+            mtime = f"mtime:{os.path.getmtime(db_path)}"
+            temporadas = [] if marca == mtime else temporadas_modificadas(conn, tabla, None)
+
+        exportados = 0
+        for pais, liga, temporada in temporadas:
+            # Se reescribe la temporada completa: así las filas modificadas no se duplican
+            filas = conn.execute(
+                f"SELECT * FROM {tabla} WHERE pais = ? AND liga = ? AND temporada = ? ORDER BY id",
+                (pais, liga, temporada),
+            ).fetchall()
+            ds.write_dataset(
+                filas_a_tabla(filas),
+                salida,
+                format="parquet",
+                partitioning=PARTICION,
+                existing_data_behavior="delete_matching",
+                basename_template="partidos-{i}.parquet",
+            )
+            exportados += len(filas)
+
+        if tiene_marca:
+            nueva_marca = conn.execute(f"SELECT MAX(updated_at) FROM {tabla}").fetchone()[0] or marca
+        else:
+            nueva_marca = mtime
+        return exportados, nueva_marca
+    finally:
+        conn.close()
+
+
+def exportar(carpeta, salida, completo=False):
+    os.makedirs(salida, exist_ok=True)
+    estado = {} if completo else cargar_estado(salida)
+
+    total = 0
+    for db_path in sorted(glob.glob(os.path.join(carpeta, "*.db"))):
+        nombre = os.path.basename(db_path)
+        exportados, nueva_marca = exportar_archivo(db_path, salida, estado.get(nombre))
+        if exportados:
+            print(f"   ✅ {nombre}: {exportados} partidos")
+        total += exportados
+        if nueva_marca:
+            estado[nombre] = nueva_marca
+            guardar_estado(salida, estado)
+
+    print(f"🏁 Exportación completada: {total} partidos -> {salida}")
+    return total
+
+# -------------------------------------------------
+# MAIN
+# -------------------------------------------------
+
+if __name__ == "__main__":
+    # Uso: python export_parquet.py [carpeta_datos] [carpeta_salida] [--completo]
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    carpeta = args[0] if args else "X:/prueba n8n/data"
+    salida = args[1] if len(args) > 1 else os.path.join(carpeta, "parquet")
+    exportar(carpeta, salida, completo="--completo" in sys.argv)
@@ -3,10 +3,17 @@ import sqlite3
 from supabase import create_client
 from datetime import datetime
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scraper_massive", "scraper_core"))
+from equipos import ResolutorEquipos
+from helpers import fecha_iso, goles_ok
 
 SUPABASE_URL = "https://mvsnymlcqutxnmnfxdgt.supabase.co"  # Cambiar por tu URL
 SUPABASE_KEY = "sb_secret_Wo7RzDpb1DZitr-_1Dy8PA_LDq0SoME"  # Cambiar por tu service_role key
 supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+equipos_resolutor = ResolutorEquipos(supabase)
 
 # -------------------------------------------------
 # HELPERS
@@ -24,6 +31,11 @@ def insert_ignore(table, data):
     return supabase.table(table).insert(data).execute()
 
 
+def refrescar_temporada(temporada_id):
+    """Recalcula los agregados de una temporada e invalida su caché de consultas (sql/003)"""
+    supabase.rpc("refrescar_temporada", {"p_temporada_id": temporada_id}).execute()
+
+
 # -------------------------------------------------
 # GET OR CREATE (SIMPLES)
 # -------------------------------------------------
@@ -71,40 +83,8 @@ def get_fase(liga_id, nombre):
     return r.data[0]["id"]
 
 
-def get_equipo(nombre):
-    eid = one("equipos", nombre=nombre)
-    if eid:
-        return eid
-    r = insert_ignore("equipos", {"nombre": nombre})
-    return r.data[0]["id"]
-
-def is_leap(year: int) -> bool:
-    return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
-
-
-def parse_fecha_flashscore(fecha_raw: str, temporada: str) -> str:
-    if not fecha_raw:
-        return None
-
-    fecha_raw = fecha_raw.split()[0].rstrip(".")
-    dia, mes = map(int, fecha_raw.split("."))
-
-    y1, y2 = map(int, temporada.split("-"))
-
-    # año por regla general
-    year = y1 if mes >= 7 else y2
-
-    # corrección específica para 29 de febrero
-    if mes == 2 and dia == 29 and not is_leap(year):
-        # usar el otro año de la temporada si es bisiesto
-        alt = y1 if year == y2 else y2
-        if is_leap(alt):
-            year = alt
-        else:
-            # fallback ultra seguro (no debería pasar)
-            return None
-
-    return f"{year:04d}-{mes:02d}-{dia:02d}"
+def get_equipo(liga_id, nombre):
+    return equipos_resolutor.resolver(nombre, liga_id)
 
 
 
@@ -118,7 +98,8 @@ def migrate_db(db_path):
     cur = conn.cursor()
 
     cur.execute("SELECT * FROM partidos")
-    rows = cur.fetchall()
+    # Los partidos sin goles ('pendiente'/'fallido') no se exportan como FINISHED 0-0
+    rows = [r for r in cur.fetchall() if goles_ok(r)]
 
     if not rows:
         return
@@ -137,21 +118,24 @@ def migrate_db(db_path):
         equipos.add(r["visitante"])
         fases.add(r["fase"] or "Temporada Regular")
 
-    equipos_map = {n: get_equipo(n) for n in equipos}
+    equipos_map = equipos_resolutor.resolver_lote(equipos, liga_id)
     fases_map = {n: get_fase(liga_id, n) for n in fases}
 
     partidos_payload = []
 
     for r in rows:
-        fecha = r["fecha"]
-        if "-" not in fecha:
-            fecha = parse_fecha_flashscore(r["fecha"], base["temporada"])
+        if r["local"] not in equipos_map or r["visitante"] not in equipos_map:
+            print(f"⚠️ Equipos sin resolver: {r['local']} vs {r['visitante']}")
+            continue
+
+        # 'fecha_iso' la escribe el scraper; las bases sin migrar (backfill.py) usan la misma regla
+        fecha = r["fecha_iso"] if "fecha_iso" in r.keys() else fecha_iso(r["fecha"], base["temporada"], base["pais"], base["liga"])
 
         partidos_payload.append({
             "temporada_id": temporada_id,
             "fase_id": fases_map[r["fase"] or "Temporada Regular"],
             "jornada": r["jornada"],
-            "fecha": fecha,
+            "fecha": fecha[:10] if fecha else None,
             "local_id": equipos_map[r["local"]],
             "visitante_id": equipos_map[r["visitante"]],
             "g_local_1t": r["g_local_1t"],
@@ -170,6 +154,8 @@ def migrate_db(db_path):
         on_conflict="temporada_id,fase_id,jornada,fecha,local_id,visitante_id"
     ).execute()
 
+    refrescar_temporada(temporada_id)
+
     conn.close()
 
 
@@ -8,14 +8,26 @@ from datetime import datetime
 import json
 from tqdm import tqdm  # Para barra de progreso
 import time
-import calendar  # Añadido para manejar días del mes
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scraper_massive", "scraper_core"))
+from helpers import fecha_iso, goles_ok
+from db import _asegurar_columnas
 
 # Cargar variables de entorno
 load_dotenv()
 
 class BatchSupabaseMigrator:
-    def __init__(self, supabase_url, supabase_key):
+    # Archivo (dentro de la carpeta de datos) con la marca de agua de cada .db
+    STATE_FILE = '.migracion_estado.json'
+    # Claves únicas de 'matches' usadas por los upserts (ver sql/001_matches_upsert.sql):
+    # el ID de Flashscore si la fila lo tiene; si no, fecha y equipos dentro de la temporada
+    MATCH_CONFLICT = 'flashscore_id'
+    MATCH_CONFLICT_FECHA = 'season_id,date,home_team,away_team'
+    
+    def __init__(self, supabase_url, supabase_key, full_sync=False):
         self.supabase = create_client(supabase_url, supabase_key)
+        self.full_sync = full_sync  # Ignorar marcas de agua y reenviar todo
         self.stats = {
             'total_files': 0,
             'processed_files': 0,
@@ -207,44 +219,108 @@ class BatchSupabaseMigrator:
             self.stats['errors'] += 1
             return None
     
-    def parse_date(self, fecha_str, year_start):
-        """Parsear fecha del formato SQLite y asegurar que sea válida"""
+    def parse_date(self, match_data, year_start):
+        """Fecha YYYY-MM-DD: la columna 'fecha_iso' del scraper o, en bases sin migrar, la misma regla (helpers.fecha_iso)"""
+        fecha = match_data.get('fecha_iso') or fecha_iso(
+            match_data.get('fecha'), f"{year_start}-{year_start + 1}", match_data.get('pais'), match_data.get('liga')
+        )
+        return fecha[:10] if fecha else None
+    
+    def resolve_season_years(self, temporada, filename):
+        """Obtener (year_start, year_end) de la temporada o, si falla, del nombre del archivo"""
+        year_start, year_end = None, None
+        if temporada and '-' in temporada:
+            try:
+                year_start, year_end = map(int, temporada.split('-'))
+            except:
+                pass
+        
+        # Si no se pudo de la temporada, intentar del nombre del archivo
+        if not year_start:
+            year_start, year_end = self.extract_year_from_filename(filename)
+        
+        if not year_start:
+            year_start, year_end = 2023, 2024  # Default
+        
+        return year_start, year_end
+    
+    def build_match_payload(self, match_data, season_id, home_team_id, away_team_id, year_start):
+        """Construir el registro de 'matches' a partir de una fila de 'partidos'"""
+        match_date = self.parse_date(match_data, year_start)
+        home_ft = (match_data.get('g_local_1t') or 0) + (match_data.get('g_local_2t') or 0)
+        away_ft = (match_data.get('g_visitante_1t') or 0) + (match_data.get('g_visitante_2t') or 0)
+        
+        return {
+            'season_id': season_id,
+            'flashscore_id': match_data.get('match_id'),
+            'matchday': match_data.get('jornada') or 1,
+            'date': match_date,  # NULL si no se pudo interpretar (ver match_key)
+            'home_team': home_team_id,
+            'away_team': away_team_id,
+            'home_ht': match_data.get('g_local_1t'),
+            'away_ht': match_data.get('g_visitante_1t'),
+            'home_ft': home_ft,
+            'away_ft': away_ft,
+            'status': 'FINISHED',
+            'updated_at': datetime.now().isoformat()
+        }
+    
+    def load_state(self, data_folder):
+        """Cargar las marcas de agua (último updated_at migrado) por archivo"""
+        self.state_path = os.path.join(data_folder, self.STATE_FILE)
         try:
-            if not fecha_str:
-                return None
-            
-            # Formato: "22.05. 11:30" o "08.11. 19:30"
-            parts = fecha_str.split()
-            if not parts:
-                return None
-            
-            date_part = parts[0]
-            if date_part.endswith('.'):
-                date_part = date_part[:-1]
-            
-            # Separar día y mes
-            day, month = map(int, date_part.split('.'))
-            
-            # Determinar año (temporada cruza años)
-            if month >= 8:  # Agosto en adelante
-                year = year_start
-            else:  # Enero a Julio
-                year = year_start + 1
-            
-            # Obtener el último día del mes
-            last_day = calendar.monthrange(year, month)[1]
-            
-            # Ajustar día si es inválido
-            if day > last_day:
-                print(f" ⚠️ Ajustando fecha inválida: {year}-{month:02d}-{day:02d} a {year}-{month:02d}-{last_day:02d}")
-                day = last_day
-            
-            return f"{year}-{month:02d}-{day:02d}"
-        except:
-            return None
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                self.state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.state = {}
+    
+    def save_state(self):
+        """Persistir las marcas de agua de forma atómica"""
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+    
+    def state_key(self, db_path):
+        """Clave del archivo dentro del estado (ruta relativa a la carpeta de datos)"""
+        return os.path.relpath(db_path, os.path.dirname(self.state_path)).replace(os.sep, '/')
+    
+    def ensure_change_tracking(self, conn):
+        """Migrar archivos antiguos al esquema actual del scraper (updated_at, estado_goles, match_id, fecha_iso)"""
+        _asegurar_columnas(conn.cursor())
+        conn.commit()
+    
+    def source_table(self, conn):
+        """'v_partidos' en la base consolidada (mismas columnas que 'partidos' por temporada)"""
+        cursor = conn.execute("SELECT name FROM sqlite_master WHERE type='view' AND name='v_partidos'")
+        return 'v_partidos' if cursor.fetchone() else 'partidos'
+    
+    def read_changed_rows(self, conn, db_path):
+        """Leer solo las filas nuevas o modificadas desde la última migración -> (filas, nueva marca)"""
+        mark = None if self.full_sync else self.state.get(self.state_key(db_path))
+        table = self.source_table(conn)
+        
+        cursor = conn.cursor()
+        if mark:
+            cursor.execute(f"SELECT * FROM {table} WHERE updated_at > ? ORDER BY updated_at", (mark,))
+        else:
+            cursor.execute(f"SELECT * FROM {table} ORDER BY updated_at")
+        
+        columns = [desc[0] for desc in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        new_mark = max((row['updated_at'] for row in rows if row.get('updated_at')), default=mark)
+        # Sin goles todavía ('pendiente'/'fallido'): no se envían como FINISHED 0-0.
+        # Cuando se completen, update_match renueva su updated_at y entran en otra migración
+        return [row for row in rows if goles_ok(row)], new_mark
+    
+    def advance_mark(self, db_path, new_mark):
+        """Guardar la nueva marca de agua de un archivo migrado sin errores"""
+        if new_mark:
+            self.state[self.state_key(db_path)] = new_mark
+            self.save_state()
     
     def process_sqlite_file(self, db_path):
-        """Procesar un archivo SQLite completo"""
+        """Procesar los partidos nuevos o modificados de un archivo SQLite"""
         filename = os.path.basename(db_path)
         print(f"\n📂 Procesando: {filename}")
         
@@ -259,22 +335,24 @@ class BatchSupabaseMigrator:
                 conn.close()
                 return False
             
-            # Contar partidos
-            cursor.execute("SELECT COUNT(*) FROM partidos")
-            total_matches = cursor.fetchone()[0]
-            print(f" 📊 {total_matches:,} partidos encontrados")
+            # Obtener solo los partidos nuevos o modificados
+            self.ensure_change_tracking(conn)
+            rows, new_mark = self.read_changed_rows(conn, db_path)
+            conn.close()
             
-            # Obtener todos los partidos
-            cursor.execute("SELECT * FROM partidos")
-            columns = [desc[0] for desc in cursor.description]
+            total_matches = len(rows)
+            if not total_matches:
+                print(f" ✅ Sin cambios desde la última migración")
+                self.stats['processed_files'] += 1
+                return True
+            print(f" 📊 {total_matches:,} partidos nuevos o modificados")
             
             # Procesar cada partido
             processed_matches = 0
+            failed_matches = 0
             batch_matches = []
             
-            for row in cursor.fetchall():
-                match_data = dict(zip(columns, row))
-                
+            for match_data in rows:
                 # Extraer datos básicos
                 pais = match_data.get('pais', '')
                 liga = match_data.get('liga', '')
@@ -288,28 +366,18 @@ class BatchSupabaseMigrator:
                 liga_norm = self.normalize_league_name(liga)
                 
                 # Extraer años de la temporada
-                year_start, year_end = None, None
-                if temporada and '-' in temporada:
-                    try:
-                        year_start, year_end = map(int, temporada.split('-'))
-                    except:
-                        pass
-                
-                # Si no se pudo de la temporada, intentar del nombre del archivo
-                if not year_start:
-                    year_start, year_end = self.extract_year_from_filename(filename)
-                
-                if not year_start:
-                    year_start, year_end = 2023, 2024  # Default
+                year_start, year_end = self.resolve_season_years(temporada, filename)
                 
                 # Obtener o crear liga
                 league_id = self.get_or_create_league(pais_norm, liga_norm)
                 if not league_id:
+                    failed_matches += 1
                     continue
                 
                 # Obtener o crear temporada
                 season_id = self.get_or_create_season(league_id, year_start, year_end)
                 if not season_id:
+                    failed_matches += 1
                     continue
                 
                 # Obtener o crear equipos
@@ -320,44 +388,35 @@ class BatchSupabaseMigrator:
                 away_team_id = self.get_or_create_team(league_id, away_team)
                 
                 if not home_team_id or not away_team_id:
+                    failed_matches += 1
                     continue
                 
-                # Preparar partido para batch insert
-                match_date = self.parse_date(match_data.get('fecha'), year_start)
-                home_ft = (match_data.get('g_local_1t') or 0) + (match_data.get('g_local_2t') or 0)
-                away_ft = (match_data.get('g_visitante_1t') or 0) + (match_data.get('g_visitante_2t') or 0)
-                
-                batch_matches.append({
-                    'season_id': season_id,
-                    'matchday': match_data.get('jornada') or 1,
-                    'date': match_date or f'{year_start}-01-01',
-                    'home_team': home_team_id,
-                    'away_team': away_team_id,
-                    'home_ht': match_data.get('g_local_1t'),
-                    'away_ht': match_data.get('g_visitante_1t'),
-                    'home_ft': home_ft,
-                    'away_ft': away_ft,
-                    'status': 'FINISHED',
-                    'created_at': datetime.now().isoformat(),
-                    'updated_at': datetime.now().isoformat()
-                })
+                # Preparar partido para batch upsert
+                batch_matches.append(self.build_match_payload(
+                    match_data, season_id, home_team_id, away_team_id, year_start
+                ))
                 
                 processed_matches += 1
                 
-                # Insertar en lotes de 100
+                # Enviar en lotes de 100
                 if len(batch_matches) >= 100:
-                    self.insert_batch_matches(batch_matches)
+                    failed_matches += self.insert_batch_matches(batch_matches)
                     batch_matches = []
                     print(f" 📈 {processed_matches}/{total_matches} partidos procesados...")
             
-            # Insertar los restantes
+            # Enviar los restantes
             if batch_matches:
-                self.insert_batch_matches(batch_matches)
+                failed_matches += self.insert_batch_matches(batch_matches)
             
-            conn.close()
             self.stats['processed_files'] += 1
             self.stats['matches_created'] += processed_matches
             
+            # Solo se avanza la marca si no se perdió ningún partido
+            if failed_matches == 0:
+                self.advance_mark(db_path, new_mark)
+            else:
+                print(f" ⚠️ {failed_matches} partidos fallidos: se reintentarán en la próxima migración")
+            
             print(f" ✅ {processed_matches:,} partidos migrados")
             return True
             
@@ -366,18 +425,64 @@ class BatchSupabaseMigrator:
             self.stats['errors'] += 1
             return False
     
-    def insert_batch_matches(self, matches_batch):
-        """Insertar lote de partidos"""
+    def match_key(self, match):
+        """
+        (clave de conflicto, valores) con la que se hace upsert de un partido, o None si no tiene
+        ID ni fecha: con date NULL la clave por fecha no choca nunca y cada migración lo duplicaría
+        """
+        if match.get('flashscore_id'):
+            return self.MATCH_CONFLICT, (match['flashscore_id'],)
+        if not match.get('date'):
+            return None
+        return self.MATCH_CONFLICT_FECHA, (match['season_id'], match['date'], match['home_team'], match['away_team'])
+    
+    def upsert_match(self, match):
+        """
+        Upsert de un partido suelto. Un partido con ID que choca por fecha y equipos con una fila
+        migrada antes de existir el ID adopta esa fila (upsert por la clave de fecha, que le pone el ID)
+        """
         try:
-            self.supabase.table('matches').insert(matches_batch).execute()
-        except Exception as e:
-            print(f" ⚠️ Error en batch insert: {e}")
-            # Intentar uno por uno si falla el batch
-            for match in matches_batch:
-                try:
-                    self.supabase.table('matches').insert(match).execute()
-                except:
-                    self.stats['errors'] += 1
+            self.supabase.table('matches').upsert(match, on_conflict=self.match_key(match)[0]).execute()
+        except Exception:
+            if not match.get('flashscore_id') or not match.get('date'):
+                raise
+            self.supabase.table('matches').upsert(match, on_conflict=self.MATCH_CONFLICT_FECHA).execute()
+    
+    def upsert_batch(self, matches_batch):
+        """Upsert de un lote de partidos (un upsert por clave). Retorna el número de partidos fallidos"""
+        # Un upsert no puede tocar dos veces la misma fila: dentro del lote gana la última versión
+        groups = {}
+        unkeyed = 0
+        for match in matches_batch:
+            entry = self.match_key(match)
+            if entry is None:
+                unkeyed += 1
+                continue
+            conflict, key = entry
+            groups.setdefault(conflict, {})[key] = match
+        if unkeyed:
+            # Vuelven a migrarse cuando el scraper les asigna match_id (save_empty_match renueva updated_at)
+            print(f" ⚠️ {unkeyed} partidos sin fecha ni ID de Flashscore: no se migran")
+        
+        failed = 0
+        for conflict, matches in groups.items():
+            try:
+                self.supabase.table('matches').upsert(list(matches.values()), on_conflict=conflict).execute()
+            except Exception as e:
+                print(f" ⚠️ Error en batch upsert: {e}")
+                # Intentar uno por uno si falla el batch
+                for match in matches.values():
+                    try:
+                        self.upsert_match(match)
+                    except Exception:
+                        failed += 1
+        return failed
+    
+    def insert_batch_matches(self, matches_batch):
+        """Upsert de un lote de partidos. Retorna el número de partidos fallidos"""
+        failed = self.upsert_batch(matches_batch)
+        self.stats['errors'] += failed
+        return failed
     
     def find_all_db_files(self, folder_path):
         """Buscar todos los archivos .db en una carpeta"""
@@ -394,48 +499,8 @@ class BatchSupabaseMigrator:
         
         return sorted(db_files)
     
-    def run_migration(self, data_folder):
-        """Ejecutar migración completa de toda la carpeta"""
-        print("🚀 MIGRACIÓN MASIVA - TODA LA CARPETA")
-        print("=" * 70)
-        
-        # Buscar archivos
-        db_files = self.find_all_db_files(data_folder)
-        self.stats['total_files'] = len(db_files)
-        
-        if not db_files:
-            print("❌ No se encontraron archivos .db en la carpeta")
-            return False
-        
-        print(f"📂 Encontrados {len(db_files)} archivos .db:")
-        for i, db_file in enumerate(db_files[:10], 1):
-            print(f" {i}. {os.path.basename(db_file)}")
-        
-        if len(db_files) > 10:
-            print(f" ... y {len(db_files) - 10} más")
-        
-        print(f"\n📍 Carpeta: {data_folder}")
-        print(f"🌐 Supabase: {self.supabase.supabase_url[:30]}...")
-        print("=" * 70)
-        
-        # Confirmar
-        confirm = input("\n⚠️ ¿Migrar TODOS estos archivos a Supabase? (SI/NO): ")
-        if confirm.upper() != 'SI':
-            print("❌ Migración cancelada")
-            return False
-        
-        # Procesar cada archivo
-        print("\n🔄 Iniciando migración...")
-        start_time = datetime.now()
-        
-        for i, db_file in enumerate(db_files, 1):
-            print(f"\n[{i}/{len(db_files)}] ", end="")
-            self.process_sqlite_file(db_file)
-        
-        # Estadísticas finales
-        self.stats['end_time'] = datetime.now()
-        duration = (self.stats['end_time'] - start_time).total_seconds()
-        
+    def print_final_stats(self, duration):
+        """Imprimir el resumen final de la migración"""
         print("\n" + "=" * 70)
         print("📊 ESTADÍSTICAS FINALES DE MIGRACIÓN")
         print("=" * 70)
@@ -448,7 +513,9 @@ class BatchSupabaseMigrator:
         print(f"⏱️ Duración: {duration:.2f} segundos")
         print(f"📈 Promedio: {self.stats['matches_created']/max(duration, 1):.1f} partidos/segundo")
         print("=" * 70)
-        
+    
+    def save_migration_log(self):
+        """Guardar estadísticas de la migración en las tablas 'logs' y 'config'"""
         # Preparar stats para JSON (convertir datetimes a strings)
         stats_json = {
             k: v.isoformat() if isinstance(v, datetime) else v
@@ -474,6 +541,369 @@ class BatchSupabaseMigrator:
             
         except Exception as e:
             print(f"⚠️ No se pudo guardar log: {e}")
+    
+    def confirm_migration(self, db_files, data_folder):
+        """Mostrar los archivos encontrados y pedir confirmación al usuario"""
+        print(f"📂 Encontrados {len(db_files)} archivos .db:")
+        for i, db_file in enumerate(db_files[:10], 1):
+            print(f" {i}. {os.path.basename(db_file)}")
+        
+        if len(db_files) > 10:
+            print(f" ... y {len(db_files) - 10} más")
+        
+        print(f"\n📍 Carpeta: {data_folder}")
+        print(f"🌐 Supabase: {self.supabase.supabase_url[:30]}...")
+        print("=" * 70)
+        
+        # Confirmar
+        confirm = input("\n⚠️ ¿Migrar TODOS estos archivos a Supabase? (SI/NO): ")
+        if confirm.upper() != 'SI':
+            print("❌ Migración cancelada")
+            return False
+        
+        return True
+    
+    def run_migration(self, data_folder):
+        """Ejecutar migración completa de toda la carpeta"""
+        print("🚀 MIGRACIÓN MASIVA - TODA LA CARPETA")
+        print("=" * 70)
+        
+        # Buscar archivos
+        db_files = self.find_all_db_files(data_folder)
+        self.stats['total_files'] = len(db_files)
+        
+        if not db_files:
+            print("❌ No se encontraron archivos .db en la carpeta")
+            return False
+        
+        if not self.confirm_migration(db_files, data_folder):
+            return False
+        
+        self.load_state(data_folder)
+        
+        # Procesar cada archivo
+        print("\n🔄 Iniciando migración...")
+        start_time = datetime.now()
+        
+        for i, db_file in enumerate(db_files, 1):
+            print(f"\n[{i}/{len(db_files)}] ", end="")
+            self.process_sqlite_file(db_file)
+        
+        # Estadísticas finales
+        self.stats['end_time'] = datetime.now()
+        duration = (self.stats['end_time'] - start_time).total_seconds()
+        
+        self.print_final_stats(duration)
+        self.save_migration_log()
+        
+        print("\n🎉 ¡MIGRACIÓN MASIVA COMPLETADA!")
+        return True
+
+class ConcurrentSupabaseMigrator(BatchSupabaseMigrator):
+    """
+    Variante concurrente del migrador:
+    1. Lee todos los .db en paralelo
+    2. Resuelve ligas, temporadas y equipos distintos en una sola pasada masiva
+    3. Envía los lotes de partidos a través de un pool acotado de workers
+    """
+    
+    def __init__(self, supabase_url, supabase_key, max_workers=4, batch_size=500, full_sync=False):
+        super().__init__(supabase_url, supabase_key, full_sync=full_sync)
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.page_size = 1000  # Máximo de filas que devuelve PostgREST por consulta
+        self.in_chunk_size = 100  # Valores por filtro .in_() para no exceder la URL
+    
+    def fetch_all(self, table, columns, column, values):
+        """SELECT ... WHERE column IN (values) paginado y troceado"""
+        rows = []
+        values = sorted(set(values))
+        
+        for i in range(0, len(values), self.in_chunk_size):
+            chunk = values[i:i + self.in_chunk_size]
+            offset = 0
+            while True:
+                result = self.supabase.table(table)\
+                    .select(columns)\
+                    .in_(column, chunk)\
+                    .range(offset, offset + self.page_size - 1)\
+                    .execute()
+                rows.extend(result.data)
+                if len(result.data) < self.page_size:
+                    break
+                offset += self.page_size
+        
+        return rows
+    
+    def read_sqlite_file(self, db_path):
+        """Leer las filas nuevas o modificadas de un archivo (se ejecuta en un hilo)"""
+        conn = sqlite3.connect(db_path)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='partidos'")
+            if not cursor.fetchone():
+                return None, None
+            
+            self.ensure_change_tracking(conn)
+            return self.read_changed_rows(conn, db_path)
+        finally:
+            conn.close()
+    
+    def read_all_files(self, db_files):
+        """Leer todos los archivos en paralelo -> ({db_path: filas}, {db_path: nueva marca})"""
+        rows_by_file = {}
+        marks = {}
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(self.read_sqlite_file, db_file): db_file for db_file in db_files}
+            
+            for future in as_completed(futures):
+                db_path = futures[future]
+                filename = os.path.basename(db_path)
+                try:
+                    rows, new_mark = future.result()
+                except Exception as e:
+                    print(f" ❌ Error leyendo {filename}: {e}")
+                    self.stats['errors'] += 1
+                    continue
+                
+                if rows is None:
+                    print(f" ⚠️ Saltando {filename}: No tiene tabla 'partidos'")
+                    continue
+                
+                rows_by_file[db_path] = rows
+                marks[db_path] = new_mark
+                print(f" 📂 {filename}: {len(rows):,} partidos nuevos o modificados")
+        
+        return rows_by_file, marks
+    
+    def collect_keys(self, rows_by_file):
+        """Recorrer todas las filas y reunir las ligas, temporadas y equipos distintos"""
+        leagues = set()  # (pais, liga)
+        seasons = set()  # ((pais, liga), year_start, year_end)
+        teams = set()  # ((pais, liga), team_name)
+        prepared = []  # (db_path, league_key, year_start, year_end, match_data)
+        
+        for db_path, rows in rows_by_file.items():
+            filename = os.path.basename(db_path)
+            for match_data in rows:
+                pais = match_data.get('pais', '')
+                liga = match_data.get('liga', '')
+                
+                if not pais or not liga:
+                    continue
+                
+                league_key = (self.normalize_country_name(pais), self.normalize_league_name(liga))
+                year_start, year_end = self.resolve_season_years(match_data.get('temporada', ''), filename)
+                
+                leagues.add(league_key)
+                seasons.add((league_key, year_start, year_end))
+                teams.add((league_key, match_data.get('local', '')))
+                teams.add((league_key, match_data.get('visitante', '')))
+                prepared.append((db_path, league_key, year_start, year_end, match_data))
+        
+        return leagues, seasons, teams, prepared
+    
+    def resolve_leagues(self, league_keys):
+        """Resolver todas las ligas con un SELECT y un INSERT masivos"""
+        pending = [key for key in league_keys if key not in self.league_cache]
+        if not pending:
+            return
+        
+        try:
+            for row in self.fetch_all('leagues', 'id, name, country', 'name', [liga for _, liga in pending]):
+                self.league_cache.setdefault((row['country'], row['name']), row['id'])
+            
+            missing = [key for key in pending if key not in self.league_cache]
+            if missing:
+                new_leagues = [{
+                    'name': liga,
+                    'country': pais,
+                    'flashscore_id': f"{pais.lower().replace(' ', '-')}/{liga.lower().replace(' ', '-')}",
+                    'is_active': True
+                } for pais, liga in missing]
+                
+                result = self.supabase.table('leagues').insert(new_leagues).execute()
+                for row in result.data:
+                    self.league_cache[(row['country'], row['name'])] = row['id']
+                self.stats['leagues_created'] += len(result.data)
+        except Exception as e:
+            print(f" ⚠️ Error resolviendo ligas en bloque, se resuelven una a una: {e}")
+        
+        # Lo que no se pudo resolver en bloque se intenta por la vía normal
+        for pais, liga in pending:
+            if (pais, liga) not in self.league_cache:
+                self.get_or_create_league(pais, liga)
+    
+    def resolve_seasons(self, season_keys):
+        """Resolver todas las temporadas con un SELECT y un INSERT masivos"""
+        pending = {}
+        for league_key, year_start, year_end in season_keys:
+            league_id = self.league_cache.get(league_key)
+            if league_id and (league_id, year_start, year_end) not in self.season_cache:
+                pending[(league_id, year_start, year_end)] = True
+        
+        if not pending:
+            return
+        
+        try:
+            for row in self.fetch_all('seasons', 'id, league_id, year_start, year_end', 'league_id',
+                                      [league_id for league_id, _, _ in pending]):
+                self.season_cache.setdefault((row['league_id'], row['year_start'], row['year_end']), row['id'])
+            
+            missing = [key for key in pending if key not in self.season_cache]
+            if missing:
+                new_seasons = [{
+                    'league_id': league_id,
+                    'year_start': year_start,
+                    'year_end': year_end,
+                    'is_current': False
+                } for league_id, year_start, year_end in missing]
+                
+                result = self.supabase.table('seasons').insert(new_seasons).execute()
+                for row in result.data:
+                    self.season_cache[(row['league_id'], row['year_start'], row['year_end'])] = row['id']
+                self.stats['seasons_created'] += len(result.data)
+        except Exception as e:
+            print(f" ⚠️ Error resolviendo temporadas en bloque, se resuelven una a una: {e}")
+        
+        for league_id, year_start, year_end in pending:
+            if (league_id, year_start, year_end) not in self.season_cache:
+                self.get_or_create_season(league_id, year_start, year_end)
+    
+    def resolve_teams(self, team_keys):
+        """Resolver todos los equipos con un SELECT y un INSERT masivos"""
+        pending = {}
+        for league_key, team_name in team_keys:
+            league_id = self.league_cache.get(league_key)
+            if league_id and (league_id, team_name) not in self.team_cache:
+                pending[(league_id, team_name)] = True
+        
+        if not pending:
+            return
+        
+        try:
+            for row in self.fetch_all('teams', 'id, league_id, name', 'league_id',
+                                      [league_id for league_id, _ in pending]):
+                self.team_cache.setdefault((row['league_id'], row['name']), row['id'])
+            
+            missing = [key for key in pending if key not in self.team_cache]
+            if missing:
+                new_teams = [{'league_id': league_id, 'name': team_name} for league_id, team_name in missing]
+                
+                result = self.supabase.table('teams').insert(new_teams).execute()
+                for row in result.data:
+                    self.team_cache[(row['league_id'], row['name'])] = row['id']
+                self.stats['teams_created'] += len(result.data)
+        except Exception as e:
+            print(f" ⚠️ Error resolviendo equipos en bloque, se resuelven uno a uno: {e}")
+        
+        for league_id, team_name in pending:
+            if (league_id, team_name) not in self.team_cache:
+                self.get_or_create_team(league_id, team_name)
+    
+    def send_batch(self, db_path, matches_batch):
+        """Upsert de un lote (se ejecuta en un hilo). Retorna (db_path, enviados, fallidos)"""
+        failed = self.upsert_batch(matches_batch)
+        return db_path, len(matches_batch) - failed, failed
+    
+    def send_all(self, matches_by_file):
+        """
+        Enviar todos los partidos en lotes a través del pool de workers.
+        Los lotes no mezclan archivos para saber qué marcas de agua se pueden avanzar.
+        Retorna el conjunto de archivos con algún partido fallido.
+        """
+        batches = [
+            (db_path, matches[i:i + self.batch_size])
+            for db_path, matches in matches_by_file.items()
+            for i in range(0, len(matches), self.batch_size)
+        ]
+        total = sum(len(matches) for matches in matches_by_file.values())
+        failed_files = set()
+        start = time.perf_counter()
+        sent = 0
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = [pool.submit(self.send_batch, db_path, batch) for db_path, batch in batches]
+            
+            for future in as_completed(futures):
+                db_path, inserted, failed = future.result()
+                sent += inserted
+                self.stats['matches_created'] += inserted
+                self.stats['errors'] += failed
+                if failed:
+                    failed_files.add(db_path)
+                
+                elapsed = time.perf_counter() - start
+                print(f" 📈 {sent:,}/{total:,} partidos enviados ({sent / max(elapsed, 0.001):.1f} partidos/segundo)")
+        
+        return failed_files
+    
+    def run_migration(self, data_folder):
+        """Ejecutar migración concurrente de toda la carpeta"""
+        print("🚀 MIGRACIÓN MASIVA CONCURRENTE - TODA LA CARPETA")
+        print("=" * 70)
+        
+        db_files = self.find_all_db_files(data_folder)
+        self.stats['total_files'] = len(db_files)
+        
+        if not db_files:
+            print("❌ No se encontraron archivos .db en la carpeta")
+            return False
+        
+        if not self.confirm_migration(db_files, data_folder):
+            return False
+        
+        self.load_state(data_folder)
+        start_time = datetime.now()
+        
+        # 1. Lectura paralela (solo filas nuevas o modificadas)
+        print(f"\n📖 Leyendo archivos ({self.max_workers} workers)...")
+        rows_by_file, marks = self.read_all_files(db_files)
+        self.stats['processed_files'] = len(rows_by_file)
+        
+        # 2. Resolución masiva de ligas, temporadas y equipos
+        print("\n🔎 Resolviendo ligas, temporadas y equipos...")
+        leagues, seasons, teams, prepared = self.collect_keys(rows_by_file)
+        self.resolve_leagues(leagues)
+        self.resolve_seasons(seasons)
+        self.resolve_teams(teams)
+        print(f" ✅ {len(leagues)} ligas, {len(seasons)} temporadas, {len(teams)} equipos")
+        
+        # 3. Construcción de partidos (sin llamadas de red)
+        matches_by_file = {db_path: [] for db_path in rows_by_file}
+        failed_files = set()
+        for db_path, league_key, year_start, year_end, match_data in prepared:
+            league_id = self.league_cache.get(league_key)
+            season_id = self.season_cache.get((league_id, year_start, year_end))
+            home_team_id = self.team_cache.get((league_id, match_data.get('local', '')))
+            away_team_id = self.team_cache.get((league_id, match_data.get('visitante', '')))
+            
+            if not season_id or not home_team_id or not away_team_id:
+                failed_files.add(db_path)
+                continue
+            
+            matches_by_file[db_path].append(self.build_match_payload(
+                match_data, season_id, home_team_id, away_team_id, year_start
+            ))
+        
+        # 4. Envío en lotes con pool acotado
+        total = sum(len(matches) for matches in matches_by_file.values())
+        print(f"\n🔄 Enviando {total:,} partidos en lotes de {self.batch_size}...")
+        failed_files |= self.send_all(matches_by_file)
+        
+        # 5. Avanzar marcas de agua de los archivos migrados sin errores
+        for db_path, new_mark in marks.items():
+            if db_path in failed_files:
+                print(f" ⚠️ {os.path.basename(db_path)}: con fallos, se reintentará en la próxima migración")
+            else:
+                self.advance_mark(db_path, new_mark)
+        
+        self.stats['end_time'] = datetime.now()
+        duration = (self.stats['end_time'] - start_time).total_seconds()
+        
+        self.print_final_stats(duration)
+        self.save_migration_log()
         
         print("\n🎉 ¡MIGRACIÓN MASIVA COMPLETADA!")
         return True
@@ -492,9 +922,19 @@ def main():
         print("SUPABASE_KEY=tu_clave_completa_aqui")
         return
     
+    # Opciones: --concurrente, --workers=N y --completo (ignorar marcas de agua)
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    flags = [a for a in sys.argv[1:] if a.startswith("--")]
+    concurrente = "--concurrente" in flags
+    completo = "--completo" in flags
+    workers = 4
+    for flag in flags:
+        if flag.startswith("--workers="):
+            workers = int(flag.split("=", 1)[1])
+    
     # Definir carpeta de datos
-    if len(sys.argv) > 1:
-        data_folder = sys.argv[1]
+    if args:
+        data_folder = args[0]
     else:
         # Rutas comunes
         possible_paths = [
@@ -510,7 +950,7 @@ def main():
                 break
         else:
             print("❌ No se encontró la carpeta 'data'")
-            print("💡 Especifica la ruta: python migrate_all.py <ruta_carpeta>")
+            print("💡 Especifica la ruta: python migracion.py <ruta_carpeta> [--concurrente] [--workers=N] [--completo]")
             return
     
     # Verificar que la carpeta existe
@@ -521,7 +961,10 @@ def main():
     print(f"📁 Carpeta de datos: {data_folder}")
     
     # Crear migrador
-    migrator = BatchSupabaseMigrator(supabase_url, supabase_key)
+    if concurrente:
+        migrator = ConcurrentSupabaseMigrator(supabase_url, supabase_key, max_workers=workers, full_sync=completo)
+    else:
+        migrator = BatchSupabaseMigrator(supabase_url, supabase_key, full_sync=completo)
     
     # Ejecutar migración
     migrator.run_migration(data_folder)
@@ -0,0 +1,27 @@
+# backfill.py - Aplica el esquema actual a bases de datos ya existentes
+import glob
+import os
+import sqlite3
+import sys
+from config import DB_FOLDER
+from db import init_db, backfill_goal_events, backfill_fecha_iso, analizar
+
+def backfill_carpeta(carpeta=DB_FOLDER):
+    """Migra el esquema (columnas e índices), reconstruye goal_events y fecha_iso y ejecuta ANALYZE en todos los .db por temporada"""
+    archivos = sorted(glob.glob(os.path.join(carpeta, "*.db")))
+    print(f"🔧 Backfill de {len(archivos)} bases de datos en {carpeta}")
+
+    for db_name in archivos:
+        init_db(db_name)  # Añade columnas, tablas e índices que falten
+        goles = backfill_goal_events(db_name)
+        fechas = backfill_fecha_iso(db_name)  # Recoge cambios de LIGAS_AÑO_NATURAL
+        analizar(db_name)
+        # Las URLs no se guardan: las filas antiguas reciben su match_id la próxima vez que se extraen
+        conn = sqlite3.connect(db_name)
+        sin_id = conn.execute("SELECT COUNT(*) FROM partidos WHERE match_id IS NULL").fetchone()[0]
+        conn.close()
+        print(f"   ✅ {os.path.basename(db_name)}: {goles} goles, {fechas} fechas corregidas, {sin_id} partidos sin match_id")
+
+if __name__ == "__main__":
+    # Uso: python backfill.py [carpeta]
+    backfill_carpeta(sys.argv[1] if len(sys.argv) > 1 else DB_FOLDER)
@@ -0,0 +1,106 @@
+# benchmark_indices.py - Planes de consulta y tiempos de 'partidos' antes/después de los índices secundarios
+#
+# Trabaja sobre copias temporales: los .db de la carpeta no se modifican.
+#   python benchmark_indices.py [carpeta] [repeticiones]
+import glob
+import os
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from config import DB_FOLDER
+from db import INDICES_PARTIDOS, init_db, analizar
+
+# Patrones de acceso reales: (nombre, SQL, función que saca los parámetros de una fila de ejemplo)
+CONSULTAS = [
+    ("equipo", "SELECT * FROM partidos WHERE local = ? OR visitante = ?",
+     lambda m: (m["local"], m["local"])),
+    ("fecha (día)", "SELECT * FROM partidos WHERE fecha_iso >= ? AND fecha_iso < date(?, '+1 day')",
+     lambda m: (m["fecha_iso"][:10], m["fecha_iso"][:10])),
+    ("fase/jornada", "SELECT * FROM partidos WHERE fase = ? AND jornada = ?",
+     lambda m: (m["fase"], m["jornada"])),
+    ("sin goles", "SELECT * FROM partidos WHERE estado_goles != 'ok'",
+     lambda m: ()),
+]
+
+def _plan(conn, sql, parametros):
+    return " | ".join(fila[3] for fila in conn.execute(f"EXPLAIN QUERY PLAN {sql}", parametros))
+
+def _medir(conn, sql, parametros, repeticiones):
+    """Mediana en microsegundos de ejecutar la consulta y leer todas las filas"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        conn.execute(sql, parametros).fetchall()
+        tiempos.append((time.perf_counter() - inicio) * 1e6)
+    return statistics.median(tiempos)
+
+def _ejecutar(db_name, muestra, repeticiones):
+    conn = sqlite3.connect(db_name)
+    resultado = {}
+    for nombre, sql, parametros in CONSULTAS:
+        valores = parametros(muestra)
+        resultado[nombre] = (_plan(conn, sql, valores), _medir(conn, sql, valores, repeticiones))
+    conn.close()
+    return resultado
+
+def benchmark_archivo(archivo, carpeta_tmp, repeticiones=200):
+    """Compara una copia sin índices secundarios ni estadísticas con la misma copia migrada"""
+    copia = os.path.join(carpeta_tmp, os.path.basename(archivo))
+    shutil.copyfile(archivo, copia)
+
+    # Antes: esquema actual (columnas) pero sin los índices de INDICES_PARTIDOS ni sqlite_stat1
+    init_db(copia)
+    conn = sqlite3.connect(copia)
+    for nombre in INDICES_PARTIDOS:
+        conn.execute(f"DROP INDEX IF EXISTS {nombre}")
+    conn.execute("DROP TABLE IF EXISTS sqlite_stat1")
+    conn.commit()
+    conn.row_factory = sqlite3.Row
+    muestra = conn.execute("SELECT * FROM partidos WHERE fecha_iso IS NOT NULL ORDER BY id LIMIT 1 OFFSET 10").fetchone()
+    conn.close()
+    if muestra is None:
+        return None
+    antes = _ejecutar(copia, dict(muestra), repeticiones)
+
+    # Después: la migración completa (init_db crea los índices) + ANALYZE
+    init_db(copia)
+    analizar(copia)
+    despues = _ejecutar(copia, dict(muestra), repeticiones)
+    return antes, despues
+
+def benchmark_carpeta(carpeta=DB_FOLDER, repeticiones=200):
+    archivos = sorted(glob.glob(os.path.join(carpeta, "*.db")))
+    print(f"📊 Benchmark de índices sobre {len(archivos)} bases de datos en {carpeta}")
+    totales = {nombre: [0.0, 0.0] for nombre, _, _ in CONSULTAS}
+
+    with tempfile.TemporaryDirectory() as carpeta_tmp:
+        for i, archivo in enumerate(archivos):
+            resultado = benchmark_archivo(archivo, carpeta_tmp, repeticiones)
+            if resultado is None:
+                print(f"   ⚠️ {os.path.basename(archivo)}: sin partidos, se omite")
+                continue
+            antes, despues = resultado
+            for nombre in totales:
+                totales[nombre][0] += antes[nombre][1]
+                totales[nombre][1] += despues[nombre][1]
+
+            # Los planes se repiten entre archivos con el mismo esquema: se muestran los del primero
+            if i == 0:
+                print(f"\n🔍 Planes ({os.path.basename(archivo)}):")
+                for nombre in totales:
+                    print(f"   {nombre}:")
+                    print(f"      antes:   {antes[nombre][0]}")
+                    print(f"      después: {despues[nombre][0]}")
+
+    print(f"\n⏱️ Tiempo total por consulta (mediana de {repeticiones} repeticiones, suma de archivos):")
+    for nombre, (antes, despues) in totales.items():
+        mejora = antes / despues if despues else 0
+        print(f"   {nombre:<14} {antes:>9.0f} µs → {despues:>9.0f} µs  (x{mejora:.1f})")
+
+if __name__ == "__main__":
+    carpeta = sys.argv[1] if len(sys.argv) > 1 else DB_FOLDER
+    repeticiones = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    benchmark_carpeta(carpeta, repeticiones)
@@ -0,0 +1,108 @@
+# colas.py - Colas con prioridad para temporadas y partidos
+import asyncio
+import itertools
+import json
+import math
+import os
+import random
+from datetime import datetime
+from config import get_temporada_actual, PESOS_LIGA, PESO_LIGA_DEFECTO, RETRIES, BACKOFF_BASE, BACKOFF_MAX, LOG_FOLDER
+
+def antiguedad(temporada, pais=None, liga=None):
+    """Temporadas transcurridas desde la actual ("2025-2026" → 0, "2023-2024" → 2)"""
+    try:
+        return max(int(get_temporada_actual(pais, liga)[:4]) - int(str(temporada)[:4]), 0)
+    except ValueError:
+        return math.inf
+
+def prioridad(item):
+    """
+    Menor = antes: temporada actual, luego las más recientes y al final el histórico.
+    El peso de la liga (PESOS_LIGA) divide la antigüedad y desempata entre ligas.
+    Los reintentos van detrás de todo el trabajo pendiente de la pasada principal.
+    Vale para temporadas ('año') y partidos ('temporada'); ambos llevan 'liga_nombre'.
+    """
+    peso = PESOS_LIGA.get(item.get("liga_nombre"), PESO_LIGA_DEFECTO)
+    temporada = item.get("año", item.get("temporada"))
+    return (1 if item.get("reintento") else 0, antiguedad(temporada, item.get("pais"), item.get("liga")) / peso, -peso)
+
+class ColaPrioridad(asyncio.PriorityQueue):
+    """
+    PriorityQueue que recibe y entrega los diccionarios tal cual (put(item) / get() → item).
+    A igual prioridad se respeta el orden de llegada (en /resultados/, la jornada más reciente primero).
+    None (señal de terminación) sale siempre detrás de todo lo pendiente.
+    """
+
+    def __init__(self, maxsize=0, clave=prioridad):
+        super().__init__(maxsize)
+        self.clave = clave
+        self.contador = itertools.count()
+
+    def _put(self, item):
+        orden = (math.inf,) if item is None else self.clave(item)
+        super()._put((orden, next(self.contador), item))
+
+    def _get(self):
+        return super()._get()[2]
+
+class Reintentos:
+    """
+    Reintentos diferidos de partidos fallidos: cada uno espera BACKOFF_BASE * 2^intento segundos
+    (hasta BACKOFF_MAX, con ±50% de jitter) y vuelve a la cola con prioridad baja.
+    Tras RETRIES reintentos el partido pasa a 'muertos' (resumen al final de la ejecución).
+    """
+
+    def __init__(self, cola, max_intentos=RETRIES):
+        self.cola = cola
+        self.max_intentos = max_intentos
+        self.pendientes = set()
+        self.muertos = []
+
+    def programar(self, item, motivo):
+        """True si se reintentará; False si ya agotó los reintentos"""
+        intentos = item.get("intentos", 0)
+        if intentos >= self.max_intentos:
+            self.descartar(item, motivo)
+            return False
+        espera = min(BACKOFF_BASE * 2 ** intentos, BACKOFF_MAX) * random.uniform(0.5, 1.5)
+        item.update(intentos=intentos + 1, reintento=True, espera=round(espera, 1))
+        tarea = asyncio.create_task(self._devolver(item, espera))
+        self.pendientes.add(tarea)
+        tarea.add_done_callback(self.pendientes.discard)
+        return True
+
+    def descartar(self, item, motivo):
+        """Pasa el item a 'muertos' sin reintentos (fallos que reintentar no arregla)"""
+        self.muertos.append({**item, "motivo": motivo})
+
+    async def _devolver(self, item, espera):
+        await asyncio.sleep(espera)
+        await self.cola.put(item)
+
+    async def vaciar(self):
+        """Espera a que la cola y los reintentos programados se agoten"""
+        while True:
+            await self.cola.join()
+            if not self.pendientes:
+                return
+            await asyncio.gather(*list(self.pendientes), return_exceptions=True)
+
+    def resumen(self):
+        """Imprime los partidos sin datos tras todos los reintentos y los guarda en LOG_FOLDER"""
+        if not self.muertos:
+            print("   ✅ Ningún partido agotó los reintentos")
+            return None
+        print(f"   ☠️ {len(self.muertos)} partidos sin goles tras {self.max_intentos} reintentos:")
+        for item in self.muertos[:20]:
+            print(f"      {item.get('liga_nombre')} {item.get('temporada')}: "
+                  f"{item.get('local')} vs {item.get('visitante')} ({item['motivo']})")
+        if len(self.muertos) > 20:
+            print(f"      ... y {len(self.muertos) - 20} más")
+
+        os.makedirs(LOG_FOLDER, exist_ok=True)
+        ruta = os.path.join(LOG_FOLDER, f"partidos_fallidos_{datetime.now():%Y%m%d_%H%M%S}.json")
+        campos = ("liga_nombre", "temporada", "fase", "jornada", "fecha", "local", "visitante", "url", "match_id", "intentos", "motivo")
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump([{k: item.get(k) for k in campos} for item in self.muertos], f, ensure_ascii=False, indent=2)
+        print(f"   📝 Detalle en {ruta}")
+        return ruta
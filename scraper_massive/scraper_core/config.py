@@ -10,6 +10,23 @@ MEMORY_MANAGEMENT = {
     'CHECK_INTERVAL_SECONDS': 15,  # Segundos entre chequeos de memoria
 }
 
+# Límite de peticiones por host (rate_limiter.py): token bucket con ajuste AIMD
+RATE_LIMIT = {
+    'TASA_INICIAL': 3.0,     # Peticiones por segundo al arrancar
+    'TASA_MINIMA': 0.3,
+    'TASA_MAXIMA': 8.0,
+    'INCREMENTO': 0.05,      # Subida aditiva por cada petición correcta
+    'FACTOR_FRENADO': 0.5,   # Bajada multiplicativa ante timeout o 429/503
+    'RAFAGA': 3,             # Peticiones que se pueden encadenar sin esperar
+}
+
+# Cortacircuitos por etapa (archivo, temporadas, goles): pausa si se disparan los errores
+CORTACIRCUITOS = {
+    'VENTANA': 20,           # Últimas peticiones evaluadas
+    'UMBRAL_ERRORES': 0.5,   # Fracción de fallos que abre el circuito
+    'PAUSA_SEGUNDOS': 60,    # Tiempo que la etapa deja de pedir páginas
+}
+
 # Workers ajustados
 SEASON_WORKERS = 1  # Reducir temporadas en paralelo
 GOALS_WORKERS = 2   # Reducir workers de goles
@@ -18,15 +35,40 @@ MAX_PARTIDOS_POR_PAGINA = 10  # Reducir partidos por página
 # VARIABLES DE CONFIGURACIÓN
 PAGE_TIMEOUT = 60000          # Tiempo máximo de espera para cargar páginas (60 segundos)
 RETRIES = 2                   # Número de reintentos por fallo
+BACKOFF_BASE = 30             # Segundos antes del primer reintento (se duplica en cada uno, ±50% de jitter)
+BACKOFF_MAX = 600             # Espera máxima entre reintentos
 MAX_TEMPORADAS = 5           # Máximo de temporadas por liga a procesar
 GOLES_WORKERS = 4            # Número de workers para procesar goles
+DESCUBRIMIENTO_CONCURRENTE = 3  # Páginas /archivo/ abiertas a la vez al descubrir temporadas
 QUEUE_MAXSIZE = 200          # Tamaño máximo de las colas internas
+
+# PRIORIDADES (colas.py): temporada actual → temporadas recientes → histórico
+# Peso por liga (nombre base de URLS_BASE): 2.0 adelanta su histórico al de las ligas con peso 1.0
+PESOS_LIGA = {
+    # "España_LaLiga": 2.0,
+}
+PESO_LIGA_DEFECTO = 1.0
 MAX_PARTIDOS_POR_PAGINA = 20 # Cada worker reinicia su página cada 20 partidos
 
 # RUTAS
 DB_FOLDER = "X:/prueba n8n/data"  # Carpeta para bases de datos SQLite
 LOG_FOLDER = "logs"               # Carpeta para archivos de log
 
+# ALMACENAMIENTO
+# "por_temporada": un .db por liga-temporada (ej. España_LaLiga_2024_2025.db)
+# "consolidado": una sola base normalizada con todas las ligas y temporadas
+MODO_ALMACENAMIENTO = "por_temporada"
+DB_CONSOLIDADA = f"{DB_FOLDER}/historico.db"
+
+# FECHAS (helpers.fecha_iso): Flashscore no da el año; desde este mes el partido es del primer
+# año de la temporada ("2024-2025": 07.2024 ... 06.2025). Julio: arranques como el de Bélgica
+MES_INICIO_TEMPORADA = 7
+# Ligas de año natural (pais, liga de la URL): su temporada "2024" se guarda como "2024-2025"
+# (extraer_año_url) y todos sus partidos son del primer año. Tras cambiarla: python backfill.py
+LIGAS_AÑO_NATURAL = {
+    ("colombia", "primera-a"),
+}
+
 # CONFIGURACIÓN DEL NAVEGADOR
 BROWSER_ARGS = [
     "--disable-gpu", "--no-sandbox", "--disable-dev-shm-usage",
@@ -37,9 +79,11 @@ BROWSER_ARGS = [
     "--disable-notifications",
 ]
 
-def get_temporada_actual():
-    """Obtiene la temporada actual"""
+def get_temporada_actual(pais=None, liga=None):
+    """Temporada en curso con la misma regla que helpers.fecha_iso (MES_INICIO_TEMPORADA, LIGAS_AÑO_NATURAL)"""
     ahora = datetime.now()
     año = ahora.year
     mes = ahora.month
-    return f"{año}-{año+1}" if mes >= 8 else f"{año-1}-{año}"
\ No newline at end of file
+    if (pais, liga) in LIGAS_AÑO_NATURAL or mes >= MES_INICIO_TEMPORADA:
+        return f"{año}-{año+1}"
+    return f"{año-1}-{año}"
\ No newline at end of file
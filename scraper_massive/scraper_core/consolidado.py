@@ -0,0 +1,351 @@
+# consolidado.py - Almacenamiento consolidado (una sola base de datos para todas las temporadas)
+import glob
+import os
+import sqlite3
+import sys
+from config import DB_FOLDER, DB_CONSOLIDADA
+from db import AHORA_SQL, _asegurar_columnas, crear_tabla_goal_events, guardar_eventos_gol, backfill_goal_events, analizar
+from helpers import fecha_iso
+
+# Caché de IDs por base de datos: {(db_name, tabla, clave): id}
+_ids = {}
+
+def _conectar(db_name):
+    conn = sqlite3.connect(db_name)
+    conn.execute("PRAGMA foreign_keys = ON")
+    return conn
+
+def init_consolidado(db_name=DB_CONSOLIDADA):
+    """Crea las tablas normalizadas (ligas, temporadas, equipos, partidos) y sus índices"""
+    os.makedirs(os.path.dirname(db_name) or ".", exist_ok=True)
+
+    conn = _conectar(db_name)
+    c = conn.cursor()
+    c.executescript(f"""
+        CREATE TABLE IF NOT EXISTS ligas (
+            id INTEGER PRIMARY KEY,
+            pais TEXT NOT NULL,
+            liga TEXT NOT NULL,
+            UNIQUE(pais, liga)
+        );
+
+        CREATE TABLE IF NOT EXISTS temporadas (
+            id INTEGER PRIMARY KEY,
+            liga_id INTEGER NOT NULL REFERENCES ligas(id),
+            temporada TEXT NOT NULL,
+            UNIQUE(liga_id, temporada)
+        );
+
+        CREATE TABLE IF NOT EXISTS equipos (
+            id INTEGER PRIMARY KEY,
+            pais TEXT NOT NULL,
+            nombre TEXT NOT NULL,
+            UNIQUE(pais, nombre)
+        );
+
+        CREATE TABLE IF NOT EXISTS partidos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            temporada_id INTEGER NOT NULL REFERENCES temporadas(id),
+            fase TEXT,
+            jornada INTEGER,
+            fecha TEXT,
+            local_id INTEGER NOT NULL REFERENCES equipos(id),
+            visitante_id INTEGER NOT NULL REFERENCES equipos(id),
+            g_local_1t INTEGER,
+            g_visitante_1t INTEGER,
+            g_local_2t INTEGER,
+            g_visitante_2t INTEGER,
+            minutos_local_1t TEXT,
+            minutos_visitante_1t TEXT,
+            minutos_local_2t TEXT,
+            minutos_visitante_2t TEXT,
+            updated_at TEXT DEFAULT ({AHORA_SQL}),
+            estado_goles TEXT NOT NULL DEFAULT 'pendiente',  -- 'pendiente' | 'ok' | 'fallido'
+            match_id TEXT,                        -- ID de Flashscore (helpers.extraer_match_id)
+            fecha_iso TEXT,                       -- "2025-05-25 14:00" (helpers.fecha_iso)
+            UNIQUE(temporada_id, fase, jornada, fecha, local_id, visitante_id)
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_partidos_local ON partidos(local_id, temporada_id);
+        CREATE INDEX IF NOT EXISTS idx_partidos_visitante ON partidos(visitante_id, temporada_id);
+        CREATE INDEX IF NOT EXISTS idx_partidos_temporada ON partidos(temporada_id, jornada);
+    """)
+    _asegurar_columnas(c)
+    c.executescript("""
+        -- Equipo y fase/jornada ya los cubren los índices anteriores y la clave UNIQUE.
+        -- Los de (equipo|temporada, fecha_orden) sirven el orden cronológico paginado de la API
+        -- (api/backends.py: COALESCE para no perder los partidos sin fecha)
+        CREATE INDEX IF NOT EXISTS idx_partidos_fecha_iso ON partidos(fecha_iso);
+        DROP INDEX IF EXISTS idx_partidos_temporada_fecha;
+        DROP INDEX IF EXISTS idx_partidos_local_fecha;
+        DROP INDEX IF EXISTS idx_partidos_visitante_fecha;
+        CREATE INDEX IF NOT EXISTS idx_partidos_temporada_orden ON partidos(temporada_id, COALESCE(fecha_iso, ''));
+        CREATE INDEX IF NOT EXISTS idx_partidos_local_orden ON partidos(local_id, COALESCE(fecha_iso, ''));
+        CREATE INDEX IF NOT EXISTS idx_partidos_visitante_orden ON partidos(visitante_id, COALESCE(fecha_iso, ''));
+        CREATE INDEX IF NOT EXISTS idx_partidos_sin_goles ON partidos(estado_goles) WHERE estado_goles != 'ok';
+
+        -- Vista con las mismas columnas que la tabla 'partidos' de los archivos por temporada
+        DROP VIEW IF EXISTS v_partidos;
+        CREATE VIEW v_partidos AS
+        SELECT p.id, l.pais, l.liga, t.temporada, p.fase, p.jornada, p.fecha,
+               el.nombre AS local, ev.nombre AS visitante,
+               p.g_local_1t, p.g_visitante_1t, p.g_local_2t, p.g_visitante_2t,
+               p.minutos_local_1t, p.minutos_visitante_1t,
+               p.minutos_local_2t, p.minutos_visitante_2t,
+               p.updated_at, p.estado_goles, p.match_id, p.fecha_iso
+        FROM partidos p
+        JOIN temporadas t ON t.id = p.temporada_id
+        JOIN ligas l ON l.id = t.liga_id
+        JOIN equipos el ON el.id = p.local_id
+        JOIN equipos ev ON ev.id = p.visitante_id;
+    """)
+    crear_tabla_goal_events(c)
+    conn.commit()
+    conn.close()
+
+def _obtener_id(c, db_name, tabla, columnas, valores):
+    """INSERT OR IGNORE + SELECT del id, con caché en memoria"""
+    clave = (db_name, tabla, valores)
+    if clave in _ids:
+        return _ids[clave]
+
+    marcadores = ", ".join("?" for _ in columnas)
+    condicion = " AND ".join(f"{col} = ?" for col in columnas)
+    c.execute(f"INSERT OR IGNORE INTO {tabla} ({', '.join(columnas)}) VALUES ({marcadores})", valores)
+    c.execute(f"SELECT id FROM {tabla} WHERE {condicion}", valores)
+    _ids[clave] = c.fetchone()[0]
+    return _ids[clave]
+
+def _ids_partido(c, db_name, pais, liga, temporada, local, visitante):
+    """Resuelve (temporada_id, local_id, visitante_id) creando lo que falte"""
+    liga_id = _obtener_id(c, db_name, "ligas", ("pais", "liga"), (pais, liga))
+    temporada_id = _obtener_id(c, db_name, "temporadas", ("liga_id", "temporada"), (liga_id, temporada))
+    local_id = _obtener_id(c, db_name, "equipos", ("pais", "nombre"), (pais, local))
+    visitante_id = _obtener_id(c, db_name, "equipos", ("pais", "nombre"), (pais, visitante))
+    return temporada_id, local_id, visitante_id
+
+CLAVE_PARTIDO = "temporada_id = ? AND fase = ? AND jornada = ? AND fecha = ? " \
+                "AND local_id = ? AND visitante_id = ?"
+
+def _donde(c, db_name, pais, liga, temporada, fase, jornada, fecha, local, visitante, match_id):
+    """Condición WHERE de un partido: por match_id si se conoce, si no por la clave normalizada"""
+    if match_id:
+        return "match_id = ?", (match_id,)
+    temporada_id, local_id, visitante_id = _ids_partido(c, db_name, pais, liga, temporada, local, visitante)
+    return CLAVE_PARTIDO, (temporada_id, fase, jornada, fecha, local_id, visitante_id)
+
+def save_empty_match(db_name, pais, liga, temporada, fase, jornada, fecha, local, visitante, match_id=None):
+    """Equivalente a db.save_empty_match para el almacenamiento consolidado"""
+    conn = _conectar(db_name)
+    c = conn.cursor()
+    temporada_id, local_id, visitante_id = _ids_partido(c, db_name, pais, liga, temporada, local, visitante)
+    clave = (temporada_id, fase, jornada, fecha, local_id, visitante_id)
+    iso = fecha_iso(fecha, temporada, pais, liga)
+    if match_id:
+        c.execute(f"""
+            UPDATE OR IGNORE partidos SET match_id = ?
+            WHERE {CLAVE_PARTIDO} AND match_id IS NULL
+        """, (match_id,) + clave)
+        c.execute(f"""
+            UPDATE OR IGNORE partidos SET fase = ?, jornada = ?, fecha = ?, fecha_iso = ?, updated_at = {AHORA_SQL}
+            WHERE match_id = ? AND (fase IS NOT ? OR jornada IS NOT ? OR fecha IS NOT ?)
+        """, (fase, jornada, fecha, iso, match_id, fase, jornada, fecha))
+    c.execute(f"""
+        INSERT OR IGNORE INTO partidos
+        (temporada_id, fase, jornada, fecha, local_id, visitante_id,
+         g_local_1t, g_visitante_1t, g_local_2t, g_visitante_2t,
+         minutos_local_1t, minutos_visitante_1t, minutos_local_2t, minutos_visitante_2t,
+         updated_at, match_id, fecha_iso)
+        VALUES (?, ?, ?, ?, ?, ?, NULL, NULL, NULL, NULL, '', '', '', '', {AHORA_SQL}, ?, ?)
+    """, clave + (match_id, iso))
+    conn.commit()
+    conn.close()
+
+def update_match(db_name, pais, liga, temporada, fase, jornada, fecha, local, visitante, datos, match_id=None):
+    """Equivalente a db.update_match para el almacenamiento consolidado (marca el partido como 'ok')"""
+    valores = (
+        datos["g_local_1t"], datos["g_visitante_1t"],
+        datos["g_local_2t"], datos["g_visitante_2t"],
+        datos["minutos_local_1t"], datos["minutos_visitante_1t"],
+        datos["minutos_local_2t"], datos["minutos_visitante_2t"],
+    )
+    conn = _conectar(db_name)
+    c = conn.cursor()
+    condicion, parametros = _donde(c, db_name, pais, liga, temporada, fase, jornada, fecha, local, visitante, match_id)
+    c.execute(f"""
+        UPDATE partidos SET
+            g_local_1t = ?, g_visitante_1t = ?, g_local_2t = ?, g_visitante_2t = ?,
+            minutos_local_1t = ?, minutos_visitante_1t = ?,
+            minutos_local_2t = ?, minutos_visitante_2t = ?,
+            estado_goles = 'ok', updated_at = {AHORA_SQL}
+        WHERE {condicion}
+          AND (g_local_1t IS NOT ? OR g_visitante_1t IS NOT ?
+               OR g_local_2t IS NOT ? OR g_visitante_2t IS NOT ?
+               OR minutos_local_1t IS NOT ? OR minutos_visitante_1t IS NOT ?
+               OR minutos_local_2t IS NOT ? OR minutos_visitante_2t IS NOT ?
+               OR estado_goles != 'ok')
+    """, valores + parametros + valores)
+
+    if c.rowcount:
+        c.execute(f"SELECT id FROM partidos WHERE {condicion}", parametros)
+        fila = c.fetchone()
+        if fila:
+            guardar_eventos_gol(c, fila[0], datos)
+    conn.commit()
+    conn.close()
+
+def mark_failed(db_name, pais, liga, temporada, fase, jornada, fecha, local, visitante, match_id=None):
+    """Equivalente a db.mark_failed para el almacenamiento consolidado"""
+    conn = _conectar(db_name)
+    c = conn.cursor()
+    condicion, parametros = _donde(c, db_name, pais, liga, temporada, fase, jornada, fecha, local, visitante, match_id)
+    c.execute(f"""
+        UPDATE partidos SET estado_goles = 'fallido'
+        WHERE {condicion} AND estado_goles = 'pendiente'
+    """, parametros)
+    conn.commit()
+    conn.close()
+
+def historial_equipo(db_name, pais, equipo):
+    """Todos los partidos de un equipo en todas las temporadas (búsqueda por índice)"""
+    conn = _conectar(db_name)
+    conn.row_factory = sqlite3.Row
+    c = conn.cursor()
+    c.execute("""
+        SELECT v.* FROM v_partidos v
+        WHERE v.id IN (
+            SELECT p.id FROM partidos p JOIN equipos e ON e.id = p.local_id
+            WHERE e.pais = ? AND e.nombre = ?
+            UNION ALL
+            SELECT p.id FROM partidos p JOIN equipos e ON e.id = p.visitante_id
+            WHERE e.pais = ? AND e.nombre = ?
+        )
+        ORDER BY v.temporada, v.id
+    """, (pais, equipo, pais, equipo))
+    filas = [dict(fila) for fila in c.fetchall()]
+    conn.close()
+    return filas
+
+# Columnas que la importación copia de un archivo por temporada (fase/jornada/fecha incluidas:
+# save_empty_match las corrige y un partido con match_id debe seguir siendo la misma fila)
+SET_IMPORTACION = "fase = ?, jornada = ?, fecha = ?, " \
+                  "g_local_1t = ?, g_visitante_1t = ?, g_local_2t = ?, g_visitante_2t = ?, " \
+                  "minutos_local_1t = ?, minutos_visitante_1t = ?, minutos_local_2t = ?, minutos_visitante_2t = ?, " \
+                  "estado_goles = ?, fecha_iso = ?"
+
+def _importar_con_id(c, registro, match_id):
+    """
+    Importa un partido con match_id: actualiza la fila que ya tiene ese ID, si no adopta la fila
+    antigua sin ID con la misma clave y si no lo inserta. False si choca con otra fila y no se guarda.
+    """
+    clave = registro[:6]
+    datos = registro[1:4] + registro[6:]
+    c.execute(f"UPDATE OR IGNORE partidos SET {SET_IMPORTACION}, updated_at = {AHORA_SQL} WHERE match_id = ?",
+              datos + (match_id,))
+    if c.rowcount:
+        return True
+    c.execute(f"""
+        UPDATE OR IGNORE partidos SET match_id = ?, {SET_IMPORTACION}, updated_at = {AHORA_SQL}
+        WHERE {CLAVE_PARTIDO} AND match_id IS NULL
+    """, (match_id,) + datos + clave)
+    if c.rowcount:
+        return True
+    c.execute(f"""
+        INSERT OR IGNORE INTO partidos
+        (temporada_id, fase, jornada, fecha, local_id, visitante_id,
+         g_local_1t, g_visitante_1t, g_local_2t, g_visitante_2t,
+         minutos_local_1t, minutos_visitante_1t, minutos_local_2t, minutos_visitante_2t,
+         estado_goles, fecha_iso, match_id, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, {AHORA_SQL})
+    """, registro + (match_id,))
+    return c.rowcount > 0
+
+def importar_archivos(carpeta=DB_FOLDER, destino=DB_CONSOLIDADA):
+    """Importa (una sola vez) todos los .db por temporada al almacenamiento consolidado"""
+    init_consolidado(destino)
+
+    archivos = sorted(
+        f for f in glob.glob(os.path.join(carpeta, "*.db"))
+        if os.path.abspath(f) != os.path.abspath(destino)
+    )
+    print(f"📦 Importando {len(archivos)} archivos a {destino}")
+
+    conn = _conectar(destino)
+    c = conn.cursor()
+    total = 0
+
+    for archivo in archivos:
+        origen = sqlite3.connect(archivo)
+        origen.row_factory = sqlite3.Row
+        try:
+            existe = origen.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name='partidos'"
+            ).fetchone()
+            if not existe:
+                print(f"   ⚠️ {os.path.basename(archivo)}: sin tabla 'partidos', se omite")
+                continue
+            filas = origen.execute("SELECT * FROM partidos").fetchall()
+        finally:
+            origen.close()
+
+        registros = []  # Sin match_id: clave de 6 columnas
+        con_id = []  # (registro, match_id)
+        for fila in filas:
+            temporada_id, local_id, visitante_id = _ids_partido(
+                c, destino, fila["pais"], fila["liga"], fila["temporada"], fila["local"], fila["visitante"]
+            )
+            registro = (
+                temporada_id, fila["fase"], fila["jornada"], fila["fecha"], local_id, visitante_id,
+                fila["g_local_1t"], fila["g_visitante_1t"], fila["g_local_2t"], fila["g_visitante_2t"],
+                fila["minutos_local_1t"], fila["minutos_visitante_1t"],
+                fila["minutos_local_2t"], fila["minutos_visitante_2t"],
+                fila["estado_goles"] if "estado_goles" in fila.keys()
+                else ("ok" if fila["g_local_1t"] is not None else "pendiente"),
+                fecha_iso(fila["fecha"], fila["temporada"], fila["pais"], fila["liga"]),
+            )
+            if "match_id" in fila.keys() and fila["match_id"]:
+                con_id.append((registro, fila["match_id"]))
+            else:
+                registros.append(registro)
+
+        # Re-importar un archivo actualiza los datos de goles sin duplicar partidos
+        c.executemany(f"""
+            INSERT INTO partidos
+            (temporada_id, fase, jornada, fecha, local_id, visitante_id,
+             g_local_1t, g_visitante_1t, g_local_2t, g_visitante_2t,
+             minutos_local_1t, minutos_visitante_1t, minutos_local_2t, minutos_visitante_2t,
+             estado_goles, fecha_iso, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, {AHORA_SQL})
+            ON CONFLICT(temporada_id, fase, jornada, fecha, local_id, visitante_id) DO UPDATE SET
+                g_local_1t = excluded.g_local_1t, g_visitante_1t = excluded.g_visitante_1t,
+                g_local_2t = excluded.g_local_2t, g_visitante_2t = excluded.g_visitante_2t,
+                minutos_local_1t = excluded.minutos_local_1t,
+                minutos_visitante_1t = excluded.minutos_visitante_1t,
+                minutos_local_2t = excluded.minutos_local_2t,
+                minutos_visitante_2t = excluded.minutos_visitante_2t,
+                estado_goles = excluded.estado_goles,
+                fecha_iso = excluded.fecha_iso,
+                updated_at = excluded.updated_at
+        """, registros)
+        # Con match_id se casa por el ID: fase/jornada/fecha corregidas no crean otro partido
+        omitidos = sum(not _importar_con_id(c, registro, match_id) for registro, match_id in con_id)
+        conn.commit()
+
+        importados = len(registros) + len(con_id) - omitidos
+        total += importados
+        print(f"   ✅ {os.path.basename(archivo)}: {importados} partidos"
+              + (f" ({omitidos} omitidos por chocar con otra fila)" if omitidos else ""))
+
+    conn.commit()
+    conn.close()
+
+    goles = backfill_goal_events(destino)
+    analizar(destino)
+    print(f"🏁 Importación completada: {total} partidos, {goles} goles")
+    return total
+
+if __name__ == "__main__":
+    # Uso: python consolidado.py [carpeta_origen] [db_destino]
+    carpeta = sys.argv[1] if len(sys.argv) > 1 else DB_FOLDER
+    destino = sys.argv[2] if len(sys.argv) > 2 else DB_CONSOLIDADA
+    importar_archivos(carpeta, destino)
@@ -1,12 +1,135 @@
 # db.py
 import sqlite3
 import os
-from config import DB_FOLDER
+from helpers import eventos_gol, fecha_iso
+
+# Marca de tiempo con milisegundos para el seguimiento de cambios (updated_at)
+AHORA_SQL = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+def _asegurar_columnas(c):
+    """Añade a bases de datos existentes las columnas que no existían al crearlas"""
+    columnas = [fila[1] for fila in c.execute("PRAGMA table_info(partidos)")]
+    if "updated_at" not in columnas:
+        c.execute("ALTER TABLE partidos ADD COLUMN updated_at TEXT")
+        c.execute(f"UPDATE partidos SET updated_at = {AHORA_SQL} WHERE updated_at IS NULL")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_partidos_updated_at ON partidos(updated_at)")
+    if "estado_goles" not in columnas:
+        # Filas anteriores: con goles escritos → 'ok' (no se distinguen los 0-0 de fallos antiguos)
+        c.execute("ALTER TABLE partidos ADD COLUMN estado_goles TEXT NOT NULL DEFAULT 'pendiente'")
+        c.execute("UPDATE partidos SET estado_goles = 'ok' WHERE g_local_1t IS NOT NULL")
+    if "match_id" not in columnas:
+        # Filas anteriores sin URL guardada: quedan en NULL y se adoptan al volver a verlas (save_empty_match)
+        c.execute("ALTER TABLE partidos ADD COLUMN match_id TEXT")
+    c.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_partidos_match_id
+        ON partidos(match_id) WHERE match_id IS NOT NULL
+    """)
+    if "fecha_iso" not in columnas:
+        c.execute("ALTER TABLE partidos ADD COLUMN fecha_iso TEXT")
+        recalcular_fecha_iso(c)
+
+def recalcular_fecha_iso(c):
+    """
+    Calcula fecha_iso de las filas existentes con la misma función que usan las escrituras.
+    Las filas que cambian actualizan updated_at para que los exportadores las reenvíen.
+    Sirve para los archivos por temporada y para la base consolidada (pais/liga/temporada por id).
+    """
+    c.connection.create_function("fecha_iso", 4, fecha_iso, deterministic=True)
+    columnas = [fila[1] for fila in c.execute("PRAGMA table_info(partidos)")]
+    if "temporada" in columnas:
+        nueva = "fecha_iso(fecha, temporada, pais, liga)"
+    else:
+        nueva = """(
+            SELECT fecha_iso(partidos.fecha, t.temporada, l.pais, l.liga)
+            FROM temporadas t JOIN ligas l ON l.id = t.liga_id
+            WHERE t.id = partidos.temporada_id
+        )"""
+    c.execute(f"UPDATE partidos SET fecha_iso = {nueva}, updated_at = {AHORA_SQL} WHERE fecha_iso IS NOT {nueva}")
+    return c.rowcount
+
+def backfill_fecha_iso(db_name):
+    """Recalcula fecha_iso (p. ej. tras cambiar LIGAS_AÑO_NATURAL). Retorna las filas corregidas"""
+    conn = sqlite3.connect(db_name)
+    cambiadas = recalcular_fecha_iso(conn.cursor())
+    conn.commit()
+    conn.close()
+    return cambiadas
+
+# Índices secundarios de 'partidos' en los archivos por temporada, según cómo se consulta:
+# por equipo, por fecha, por fase/jornada y los partidos aún sin goles (parcial: solo esas filas)
+INDICES_PARTIDOS = {
+    "idx_partidos_local": "partidos(local)",
+    "idx_partidos_visitante": "partidos(visitante)",
+    "idx_partidos_fecha_iso": "partidos(fecha_iso)",
+    "idx_partidos_fase_jornada": "partidos(fase, jornada)",
+    "idx_partidos_sin_goles": "partidos(estado_goles) WHERE estado_goles != 'ok'",
+}
+
+def crear_indices(c):
+    """Crea los índices de INDICES_PARTIDOS que falten"""
+    for nombre, definicion in INDICES_PARTIDOS.items():
+        c.execute(f"CREATE INDEX IF NOT EXISTS {nombre} ON {definicion}")
+
+def analizar(db_name):
+    """
+    Actualiza las estadísticas del planificador (sqlite_stat1) para que elija bien entre índices.
+    analysis_limit acota el coste en bases grandes (muestrea ~1000 filas por índice).
+    """
+    conn = sqlite3.connect(db_name)
+    conn.execute("PRAGMA analysis_limit = 1000")
+    conn.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+
+def crear_tabla_goal_events(c):
+    """Tabla normalizada con un registro por gol (sirve para partidos por temporada y consolidados)"""
+    c.executescript("""
+        CREATE TABLE IF NOT EXISTS goal_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            partido_id INTEGER NOT NULL REFERENCES partidos(id) ON DELETE CASCADE,
+            mitad INTEGER NOT NULL,               -- 1 o 2
+            lado TEXT NOT NULL,                   -- 'local' o 'visitante'
+            minuto INTEGER NOT NULL,              -- 45 en "45+2"
+            minuto_extra INTEGER NOT NULL DEFAULT 0,  -- 2 en "45+2"
+            orden INTEGER NOT NULL,               -- posición dentro de (mitad, lado)
+            UNIQUE(partido_id, mitad, lado, orden)
+        );
+        CREATE INDEX IF NOT EXISTS idx_goal_events_minuto ON goal_events(minuto, minuto_extra);
+        CREATE INDEX IF NOT EXISTS idx_goal_events_partido ON goal_events(partido_id);
+    """)
+
+def guardar_eventos_gol(c, partido_id, datos):
+    """Reemplaza los eventos de gol de un partido a partir de sus columnas minutos_*"""
+    c.execute("DELETE FROM goal_events WHERE partido_id = ?", (partido_id,))
+    c.executemany("""
+        INSERT INTO goal_events (partido_id, mitad, lado, minuto, minuto_extra, orden)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, [(partido_id,) + evento for evento in eventos_gol(datos)])
+
+def backfill_goal_events(db_name):
+    """Reconstruye goal_events desde las columnas minutos_* de todos los partidos"""
+    conn = sqlite3.connect(db_name)
+    conn.row_factory = sqlite3.Row
+    c = conn.cursor()
+    crear_tabla_goal_events(c)
+    c.execute("DELETE FROM goal_events")
+    filas = c.execute("""
+        SELECT id, minutos_local_1t, minutos_visitante_1t, minutos_local_2t, minutos_visitante_2t
+        FROM partidos
+    """).fetchall()
+    registros = [(fila["id"],) + evento for fila in filas for evento in eventos_gol(dict(fila))]
+    c.executemany("""
+        INSERT INTO goal_events (partido_id, mitad, lado, minuto, minuto_extra, orden)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, registros)
+    conn.commit()
+    conn.close()
+    return len(registros)
 
 def init_db(db_name):
     """Crea la tabla de partidos si no existe"""
     # Asegurar que la carpeta existe
-    os.makedirs(DB_FOLDER, exist_ok=True)
+    os.makedirs(os.path.dirname(db_name) or ".", exist_ok=True)
     
     conn = sqlite3.connect(db_name)
     c = conn.cursor()
@@ -29,43 +152,107 @@ def init_db(db_name):
             minutos_visitante_1t TEXT,
             minutos_local_2t TEXT,
             minutos_visitante_2t TEXT,
+            updated_at TEXT,
+            estado_goles TEXT NOT NULL DEFAULT 'pendiente',  -- 'pendiente' | 'ok' | 'fallido'
+            match_id TEXT,                        -- ID de Flashscore (helpers.extraer_match_id)
+            fecha_iso TEXT,                       -- "2025-05-25 14:00" (helpers.fecha_iso)
             UNIQUE(pais, liga, temporada, fase, jornada, fecha, local, visitante)
         )
     """)
+    _asegurar_columnas(c)
+    crear_indices(c)
+    crear_tabla_goal_events(c)
     conn.commit()
     conn.close()
 
-def save_empty_match(db_name, pais, liga, temporada, fase, jornada, fecha, local, visitante):
-    """Guarda un partido sin datos de goles (para ser actualizado después)"""
+CLAVE_PARTIDO = "pais = ? AND liga = ? AND temporada = ? AND fase = ? AND jornada = ? " \
+                "AND fecha = ? AND local = ? AND visitante = ?"
+
+def _donde(clave, match_id):
+    """Condición WHERE de un partido: por match_id si se conoce, si no por la clave de 8 columnas"""
+    if match_id:
+        return "match_id = ?", (match_id,)
+    return CLAVE_PARTIDO, clave
+
+def save_empty_match(db_name, pais, liga, temporada, fase, jornada, fecha, local, visitante, match_id=None):
+    """
+    Guarda un partido sin datos de goles (para ser actualizado después).
+    Con match_id el partido no se duplica aunque cambie el texto de fase o fecha entre ejecuciones.
+    """
+    clave = (pais, liga, temporada, fase, jornada, fecha, local, visitante)
+    iso = fecha_iso(fecha, temporada, pais, liga)
     conn = sqlite3.connect(db_name)
     c = conn.cursor()
-    c.execute("""
+    if match_id:
+        # Fila guardada antes de existir match_id: se adopta en vez de crear otra
+        c.execute(f"""
+            UPDATE OR IGNORE partidos SET match_id = ?
+            WHERE {CLAVE_PARTIDO} AND match_id IS NULL
+        """, (match_id,) + clave)
+        # Mismo partido con otra fase/jornada/fecha: se corrige la fila existente
+        c.execute(f"""
+            UPDATE OR IGNORE partidos SET fase = ?, jornada = ?, fecha = ?, fecha_iso = ?, updated_at = {AHORA_SQL}
+            WHERE match_id = ? AND (fase IS NOT ? OR jornada IS NOT ? OR fecha IS NOT ?)
+        """, (fase, jornada, fecha, iso, match_id, fase, jornada, fecha))
+    c.execute(f"""
         INSERT OR IGNORE INTO partidos
         (pais, liga, temporada, fase, jornada, fecha, local, visitante,
          g_local_1t, g_visitante_1t, g_local_2t, g_visitante_2t,
-         minutos_local_1t, minutos_visitante_1t, minutos_local_2t, minutos_visitante_2t)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, NULL, NULL, NULL, NULL, '', '', '', '')
-    """, (pais, liga, temporada, fase, jornada, fecha, local, visitante))
+         minutos_local_1t, minutos_visitante_1t, minutos_local_2t, minutos_visitante_2t,
+         updated_at, match_id, fecha_iso)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, NULL, NULL, NULL, NULL, '', '', '', '', {AHORA_SQL}, ?, ?)
+    """, clave + (match_id, iso))
     conn.commit()
     conn.close()
 
-def update_match(db_name, pais, liga, temporada, fase, jornada, fecha, local, visitante, datos):
-    """Actualiza los goles y minutos de un partido"""
+def update_match(db_name, pais, liga, temporada, fase, jornada, fecha, local, visitante, datos, match_id=None):
+    """
+    Actualiza los goles y minutos de un partido y lo marca como 'ok'.
+    Solo toca la fila (y su updated_at) si algún dato cambió realmente.
+    Con match_id la fila se busca solo por él (índice único).
+    """
+    valores = (
+        datos["g_local_1t"], datos["g_visitante_1t"],
+        datos["g_local_2t"], datos["g_visitante_2t"],
+        datos["minutos_local_1t"], datos["minutos_visitante_1t"],
+        datos["minutos_local_2t"], datos["minutos_visitante_2t"],
+    )
+    condicion, parametros = _donde((pais, liga, temporada, fase, jornada, fecha, local, visitante), match_id)
     conn = sqlite3.connect(db_name)
     c = conn.cursor()
-    c.execute("""
+    c.execute(f"""
         UPDATE partidos SET
             g_local_1t = ?, g_visitante_1t = ?, g_local_2t = ?, g_visitante_2t = ?,
             minutos_local_1t = ?, minutos_visitante_1t = ?,
-            minutos_local_2t = ?, minutos_visitante_2t = ?
-        WHERE pais = ? AND liga = ? AND temporada = ? AND fase = ? AND jornada = ?
-          AND fecha = ? AND local = ? AND visitante = ?
-    """, (
-        datos["g_local_1t"], datos["g_visitante_1t"],
-        datos["g_local_2t"], datos["g_visitante_2t"],
-        datos["minutos_local_1t"], datos["minutos_visitante_1t"],
-        datos["minutos_local_2t"], datos["minutos_visitante_2t"],
-        pais, liga, temporada, fase, jornada, fecha, local, visitante
-    ))
+            minutos_local_2t = ?, minutos_visitante_2t = ?,
+            estado_goles = 'ok', updated_at = {AHORA_SQL}
+        WHERE {condicion}
+          AND (g_local_1t IS NOT ? OR g_visitante_1t IS NOT ?
+               OR g_local_2t IS NOT ? OR g_visitante_2t IS NOT ?
+               OR minutos_local_1t IS NOT ? OR minutos_visitante_1t IS NOT ?
+               OR minutos_local_2t IS NOT ? OR minutos_visitante_2t IS NOT ?
+               OR estado_goles != 'ok')
+    """, valores + parametros + valores)
+    
+    if c.rowcount:
+        c.execute(f"SELECT id FROM partidos WHERE {condicion}", parametros)
+        fila = c.fetchone()
+        if fila:
+            guardar_eventos_gol(c, fila[0], datos)
+    conn.commit()
+    conn.close()
+
+def mark_failed(db_name, pais, liga, temporada, fase, jornada, fecha, local, visitante, match_id=None):
+    """
+    Marca un partido cuyos goles no se pudieron extraer como 'fallido' (no como 0-0).
+    Un partido que ya estaba 'ok' conserva sus datos. No renueva updated_at: no hay nada que exportar.
+    """
+    condicion, parametros = _donde((pais, liga, temporada, fase, jornada, fecha, local, visitante), match_id)
+    conn = sqlite3.connect(db_name)
+    c = conn.cursor()
+    c.execute(f"""
+        UPDATE partidos SET estado_goles = 'fallido'
+        WHERE {condicion} AND estado_goles = 'pendiente'
+    """, parametros)
     conn.commit()
-    conn.close()
\ No newline at end of file
+    conn.close()
@@ -1,6 +1,7 @@
 # fase_extractor.py
 import asyncio
 import re
+from helpers import extraer_match_id
 
 async def expand_all(page):
     """Expande todos los botones de expansión"""
@@ -47,7 +48,7 @@ def extraer_fase_nombre(fase_texto):
 async def extraer_fases_y_partidos(page):
     """
     Extrae las fases y partidos de la página actual usando la lógica de prueba.py
-    Retorna lista de diccionarios con: fase, jornada, fecha, local, visitante, url
+    Retorna lista de diccionarios con: fase, jornada, fecha, local, visitante, url, match_id
     """
     # Ejecutar script similar al de prueba.py pero adaptado
     datos = await page.evaluate("""
@@ -114,5 +115,6 @@ async def extraer_fases_y_partidos(page):
     for partido in datos:
         if partido['url'] and partido['url'].startswith('/'):
             partido['url'] = f"https://www.flashscore.co{partido['url']}"
+        partido['match_id'] = extraer_match_id(partido['url'])
     
     return datos
\ No newline at end of file
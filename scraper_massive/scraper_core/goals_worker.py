@@ -1,17 +1,22 @@
 # goals_worker.py - Versión mejorada
 import asyncio
-from db import update_match
-from config import MAX_PARTIDOS_POR_PAGINA
+import db
+import consolidado
+from helpers import orden_minuto
+from rate_limiter import navegar
+from config import MAX_PARTIDOS_POR_PAGINA, MODO_ALMACENAMIENTO, RETRIES
 
 class GoalsWorker:
-    def __init__(self, worker_id, context, page_pool, cola_partidos):
+    def __init__(self, worker_id, context, page_pool, cola_partidos, reintentos=None):
         self.worker_id = worker_id
         self.context = context
         self.page_pool = page_pool
         self.cola_partidos = cola_partidos
+        self.reintentos = reintentos  # colas.Reintentos compartido (None = sin reintentos)
         self.page = None
         self.contador_partidos = 0
         self.total_procesados = 0
+        self.total_fallidos = 0
 
     async def get_page(self):
         """Obtiene una página del pool"""
@@ -33,23 +38,19 @@ class GoalsWorker:
             await self.release_page()
             await asyncio.sleep(0.2)  # Pequeña pausa
 
-    async def extraer_detalles_goles(self, url):
-        """Extrae los goles de la página de detalle de un partido"""
-        try:
-            page = await self.get_page()
-            
-            # Intentar navegar con timeout reducido
-            for intento in range(2):
-                try:
-                    await page.goto(url, wait_until="domcontentloaded", timeout=5000)
-                    await page.wait_for_selector(".smv__verticalSections", timeout=3000)
-                    break
-                except:
-                    if intento == 1:
-                        return self._datos_vacios()
-                    await asyncio.sleep(0.5)
-        except:
-            return self._datos_vacios()
+    async def extraer_detalles_goles(self, url, intentos=0):
+        """
+        Extrae los goles de la página de detalle de un partido.
+        Si la página no carga lanza la excepción: los reintentos los gestiona colas.Reintentos.
+        """
+        page = await self.get_page()
+        
+        # Timeout reducido que crece en cada reintento (ritmo y pausas según rate_limiter)
+        await navegar(
+            page, url, "goles", selector=".smv__verticalSections",
+            wait_until="domcontentloaded", timeout=5000 * (intentos + 1),
+            timeout_selector=3000 * (intentos + 1)
+        )
         
         sections = await page.locator(".smv__verticalSections > div").all()
         current_half = None
@@ -74,58 +75,70 @@ class GoalsWorker:
                             goles[0][0 if is_home else 1].append(time)
                         elif current_half == 2:
                             goles[1][0 if is_home else 1].append(time)
-            except:
+            except Exception:
                 continue
         
-        def orden(x):
-            try:
-                if "+" in x:
-                    a, b = x.split("+")
-                    return int(a) * 100 + int(b)
-                return int(x) * 100
-            except:
-                return 0
-        
         return {
             "g_local_1t": len(goles[0][0]),
             "g_visitante_1t": len(goles[0][1]),
             "g_local_2t": len(goles[1][0]),
             "g_visitante_2t": len(goles[1][1]),
-            "minutos_local_1t": ", ".join(sorted(goles[0][0], key=orden)),
-            "minutos_visitante_1t": ", ".join(sorted(goles[0][1], key=orden)),
-            "minutos_local_2t": ", ".join(sorted(goles[1][0], key=orden)),
-            "minutos_visitante_2t": ", ".join(sorted(goles[1][1], key=orden)),
+            "minutos_local_1t": ", ".join(sorted(goles[0][0], key=orden_minuto)),
+            "minutos_visitante_1t": ", ".join(sorted(goles[0][1], key=orden_minuto)),
+            "minutos_local_2t": ", ".join(sorted(goles[1][0], key=orden_minuto)),
+            "minutos_visitante_2t": ", ".join(sorted(goles[1][1], key=orden_minuto)),
         }
 
-    def _datos_vacios(self):
-        """Retorna datos vacíos para partidos sin información"""
-        return {
-            "g_local_1t": 0, "g_visitante_1t": 0,
-            "g_local_2t": 0, "g_visitante_2t": 0,
-            "minutos_local_1t": "", "minutos_visitante_1t": "",
-            "minutos_local_2t": "", "minutos_visitante_2t": "",
-        }
+    def _clave(self, partido):
+        return (
+            partido['db_name'],
+            partido['pais'],
+            partido['liga'],
+            partido['temporada'],
+            partido['fase'],
+            partido['jornada'],
+            partido['fecha'],
+            partido['local'],
+            partido['visitante'],
+        )
+
+    def _registrar_fallo(self, partido, error, reintentar=True):
+        """
+        Programa un reintento; agotados (o si reintentar no puede ayudar), el partido queda
+        'fallido' (nunca se escribe un 0-0)
+        """
+        motivo = str(error).splitlines()[0][:80] if str(error) else type(error).__name__
+        if not reintentar and self.reintentos:
+            self.reintentos.descartar(partido, motivo)
+        elif self.reintentos and self.reintentos.programar(partido, motivo):
+            print(f"[GoalsWorker {self.worker_id}] 🔁 {partido['local']} vs {partido['visitante']}: "
+                  f"reintento {partido['intentos']}/{RETRIES} en {partido['espera']}s ({motivo})")
+            return
+        almacen = consolidado if MODO_ALMACENAMIENTO == "consolidado" else db
+        almacen.mark_failed(*self._clave(partido), match_id=partido.get('match_id'))
+        self.total_fallidos += 1
+        print(f"[GoalsWorker {self.worker_id}] ⚠️ Sin goles: {partido['local']} vs {partido['visitante']} (fallidos: {self.total_fallidos})")
 
     async def procesar_partido(self, partido):
         """Procesa un partido individual"""
         await self._reiniciar_pagina_si_necesario()
         
+        if not partido.get('url'):
+            # Sin URL no hay página que reintentar: 'fallido' directamente
+            self._registrar_fallo(partido, "Partido sin URL", reintentar=False)
+            return
+        
+        try:
+            datos_goles = await self.extraer_detalles_goles(partido['url'], partido.get('intentos', 0))
+        except Exception as e:
+            self.contador_partidos += 1
+            self._registrar_fallo(partido, e)
+            return
+        
         try:
-            datos_goles = await self.extraer_detalles_goles(partido['url'])
-            
             # Actualizar la base de datos
-            update_match(
-                partido['db_name'],
-                partido['pais'],
-                partido['liga'],
-                partido['temporada'],
-                partido['fase'],
-                partido['jornada'],
-                partido['fecha'],
-                partido['local'],
-                partido['visitante'],
-                datos_goles
-            )
+            almacen = consolidado if MODO_ALMACENAMIENTO == "consolidado" else db
+            almacen.update_match(*self._clave(partido), datos_goles, match_id=partido.get('match_id'))
             
             self.contador_partidos += 1
             self.total_procesados += 1
@@ -165,4 +178,4 @@ class GoalsWorker:
             print(f"[GoalsWorker {self.worker_id}] 💥 Error fatal: {e}")
         finally:
             await self.release_page()
-            print(f"[GoalsWorker {self.worker_id}] 🏁 Terminando worker. Procesados: {self.total_procesados}")
\ No newline at end of file
+            print(f"[GoalsWorker {self.worker_id}] 🏁 Terminando worker. Procesados: {self.total_procesados}, fallidos: {self.total_fallidos}")
\ No newline at end of file
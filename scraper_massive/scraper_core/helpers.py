@@ -1,6 +1,7 @@
 # helpers.py
 import re
-from config import get_temporada_actual
+from datetime import date
+from config import get_temporada_actual, MES_INICIO_TEMPORADA, LIGAS_AÑO_NATURAL
 
 def construir_url_resultados(url_base):
     """Añade /resultados/ a URL base"""
@@ -35,4 +36,86 @@ def extraer_año_url(url):
         return f"{year_matches[0]}-{year_matches[1]}"
     elif len(year_matches) == 1:
         return f"{year_matches[0]}-{int(year_matches[0])+1}"
-    return None
\ No newline at end of file
+    return None
+
+def extraer_match_id(url):
+    """
+    ID estable de Flashscore de la URL de un partido ("ABCD1234"), o None.
+    Admite '.../partido/futbol/local-x/visitante-y/?mid=ABCD1234' y '.../partido/ABCD1234/#/resumen'
+    """
+    if not url:
+        return None
+    encontrado = re.search(r'[?&#]mid=([A-Za-z0-9]{8})\b', url) \
+        or re.search(r'/partido/([A-Za-z0-9]{8})(?:[/?#]|$)', url)
+    return encontrado.group(1) if encontrado else None
+
+def fecha_iso(fecha, temporada, pais=None, liga=None):
+    """
+    Fecha de Flashscore sin año ("25.05. 14:00") → "2025-05-25 14:00" para la temporada "2024-2025".
+    Es la única regla de año del proyecto (scraper y exportadores): ver MES_INICIO_TEMPORADA
+    y LIGAS_AÑO_NATURAL. None si la fecha no se puede interpretar.
+    """
+    if not fecha or not temporada:
+        return None
+    if re.match(r'\d{4}-\d{2}-\d{2}', fecha):  # Ya en ISO (scraper_lite)
+        return fecha[:16].replace("T", " ")
+    encontrado = re.match(r'\s*(\d{1,2})\.(\d{1,2})\.(\d{4})?(?:\s+(\d{1,2}):(\d{2}))?', fecha)
+    años = [int(a) for a in re.findall(r'\d{4}', str(temporada))]
+    if not encontrado or not años:
+        return None
+    dia, mes = int(encontrado.group(1)), int(encontrado.group(2))
+    primero, segundo = años[0], años[-1] if len(años) > 1 else años[0]
+
+    if encontrado.group(3):
+        candidatos = [int(encontrado.group(3))]
+    elif (pais, liga) in LIGAS_AÑO_NATURAL:
+        candidatos = [primero]
+    elif mes >= MES_INICIO_TEMPORADA:
+        candidatos = [primero, segundo]
+    else:
+        candidatos = [segundo, primero]  # Un 29.02. pasa al año bisiesto de la temporada
+    hora = f" {int(encontrado.group(4)):02d}:{encontrado.group(5)}" if encontrado.group(4) else ""
+
+    for año in candidatos:
+        try:
+            return date(año, mes, dia).isoformat() + hora
+        except ValueError:
+            continue
+    return None
+
+def goles_ok(partido):
+    """
+    True si el partido tiene sus goles extraídos ('ok'). Los 'pendiente'/'fallido' no son 0-0
+    y no se exportan. Bases sin la columna estado_goles: basta con que exista g_local_1t.
+    """
+    if "estado_goles" in partido.keys():
+        return partido["estado_goles"] == "ok"
+    return partido["g_local_1t"] is not None
+
+def parse_minuto(texto):
+    """Convierte un minuto de gol ("39", "45+2", "90+1'") en (minuto, tiempo_añadido)"""
+    base, _, extra = texto.strip().rstrip("'").partition("+")
+    try:
+        return int(base), int(extra) if extra else 0
+    except ValueError:
+        return None
+
+def orden_minuto(texto):
+    """Clave de ordenación de un minuto de gol ("45+2" va entre "45" y "46")"""
+    minuto = parse_minuto(texto)
+    return minuto[0] * 100 + minuto[1] if minuto else 0
+
+def eventos_gol(datos):
+    """
+    Convierte las columnas minutos_* de un partido en eventos de gol:
+    lista de (mitad, lado, minuto, minuto_extra, orden)
+    """
+    eventos = []
+    for mitad in (1, 2):
+        for lado in ("local", "visitante"):
+            minutos = [m for m in (datos.get(f"minutos_{lado}_{mitad}t") or "").split(",") if m.strip()]
+            for orden, texto in enumerate(minutos):
+                minuto = parse_minuto(texto)
+                if minuto:
+                    eventos.append((mitad, lado, minuto[0], minuto[1], orden))
+    return eventos
\ No newline at end of file
@@ -5,7 +5,9 @@ from playwright.async_api import async_playwright
 from seasons import obtener_todas_temporadas
 from season_worker import SeasonWorker
 from goals_worker import GoalsWorker
-from config import SEASON_WORKERS, GOALS_WORKERS, BROWSER_ARGS, MEMORY_MANAGEMENT
+from config import SEASON_WORKERS, GOALS_WORKERS, BROWSER_ARGS, MEMORY_MANAGEMENT, DESCUBRIMIENTO_CONCURRENTE, QUEUE_MAXSIZE
+from colas import ColaPrioridad, Reintentos
+import rate_limiter
 from memory_manager import memory_manager
 from page_pool import PagePool
 
@@ -82,6 +84,7 @@ class ScraperManager:
 async def main_pipeline(urls_base):
     """Función principal con gestión de memoria mejorada - Windows compatible"""
     manager = ScraperManager()
+    reintentos = None
     
     # SOLUCIÓN: Para Windows, no usar signal handlers
     # En su lugar, usar asyncio.create_task para manejar interrupciones
@@ -98,41 +101,54 @@ async def main_pipeline(urls_base):
     try:
         await manager.setup()
         
-        # 1. CREACIÓN DE COLAS
-        cola_temporadas = asyncio.Queue(maxsize=5)    # Buffer reducido
-        cola_partidos = asyncio.Queue(maxsize=50)     # Buffer reducido
+        # 1. CREACIÓN DE COLAS (con prioridad: lo actual primero, el histórico rellena)
+        # Las temporadas ocupan poco: la cola admite todas para poder reordenarlas
+        cola_temporadas = ColaPrioridad(maxsize=QUEUE_MAXSIZE)
+        cola_partidos = ColaPrioridad(maxsize=50)     # Buffer reducido
+        reintentos = Reintentos(cola_partidos)        # Partidos fallidos: backoff y vuelta con prioridad baja
         
         # 2. TAREA PRODUCTORA CON CONTROL
-        async def productor_temporadas():
-            for idx, liga in enumerate(urls_base):
-                if manager.shutdown_event.is_set():
-                    break
-                    
-                if "|" in liga:
-                    url_base, nombre_base = liga.split("|")
-                    nombre_base = nombre_base.strip()
-                else:
-                    url_base = liga
-                    nombre_base = url_base.split("/")[-1]
-                
-                url_base = url_base.strip().rstrip('/')
-                
-                print(f"\n🔍 [{idx+1}/{len(urls_base)}] Procesando liga: {nombre_base}")
-                
-                # Chequear memoria antes de continuar
-                stats = memory_manager.get_stats()
-                if stats['percent_used'] > 70:
-                    print(f"⚠️  Memoria alta ({stats['percent_used']:.1f}%), esperando...")
-                    await memory_manager.force_memory_cleanup()
-                    await asyncio.sleep(2)
-                
-                # Obtener temporadas
-                async for temp_info in obtener_todas_temporadas(manager.context, url_base, nombre_base, max_temporadas=5):
+        # Todas las ligas se descubren a la vez; como mucho DESCUBRIMIENTO_CONCURRENTE
+        # páginas /archivo/ abiertas. Cada temporada entra en cola en cuanto se conoce.
+        semaforo_archivo = asyncio.Semaphore(DESCUBRIMIENTO_CONCURRENTE)
+
+        async def descubrir_liga(idx, liga):
+            if manager.shutdown_event.is_set():
+                return
+            
+            if "|" in liga:
+                url_base, nombre_base = liga.split("|")
+                nombre_base = nombre_base.strip()
+            else:
+                url_base = liga
+                nombre_base = url_base.split("/")[-1]
+            
+            url_base = url_base.strip().rstrip('/')
+            
+            print(f"\n🔍 [{idx+1}/{len(urls_base)}] Procesando liga: {nombre_base}")
+            
+            # Chequear memoria antes de continuar
+            stats = memory_manager.get_stats()
+            if stats['percent_used'] > 70:
+                print(f"⚠️  Memoria alta ({stats['percent_used']:.1f}%), esperando...")
+                await memory_manager.force_memory_cleanup()
+                await asyncio.sleep(2)
+            
+            # Obtener temporadas
+            try:
+                async for temp_info in obtener_todas_temporadas(
+                    manager.context, url_base, nombre_base, max_temporadas=5, semaforo=semaforo_archivo
+                ):
                     if manager.shutdown_event.is_set():
                         break
                     
                     await cola_temporadas.put(temp_info)
-                    print(f"[Productor] 📥 Temporada {temp_info['año']} puesta en cola.")
+                    print(f"[Productor] 📥 {nombre_base} {temp_info['año']} puesta en cola.")
+            except Exception as e:
+                print(f"[Productor] ❌ Error descubriendo temporadas de {nombre_base}: {e}")
+
+        async def productor_temporadas():
+            await asyncio.gather(*(descubrir_liga(idx, liga) for idx, liga in enumerate(urls_base)))
             
             # Señal de terminación
             for _ in range(SEASON_WORKERS):
@@ -156,7 +172,8 @@ async def main_pipeline(urls_base):
                 worker_id=i,
                 context=manager.context,
                 page_pool=manager.page_pools['goals'],
-                cola_partidos=cola_partidos
+                cola_partidos=cola_partidos,
+                reintentos=reintentos
             )
             goals_workers.append(worker)
         
@@ -167,10 +184,12 @@ async def main_pipeline(urls_base):
         tasks.append(asyncio.create_task(productor_temporadas()))
         
         # Workers de temporadas
+        season_tasks = []
         for worker in season_workers:
             task = asyncio.create_task(worker.worker_loop())
             task.add_done_callback(lambda t: print(f"✅ SeasonWorker terminado"))
-            tasks.append(task)
+            season_tasks.append(task)
+        tasks.extend(season_tasks)
         
         # Workers de goles
         for worker in goals_workers:
@@ -181,7 +200,11 @@ async def main_pipeline(urls_base):
         # Tarea para mostrar estadísticas periódicas
         async def show_stats():
             while not manager.shutdown_event.is_set():
-                await asyncio.sleep(30)
+                try:
+                    await asyncio.wait_for(manager.shutdown_event.wait(), timeout=30)
+                    break
+                except asyncio.TimeoutError:
+                    pass
                 mem_stats = memory_manager.get_stats()
                 season_stats = manager.page_pools['season'].get_stats()
                 goals_stats = manager.page_pools['goals'].get_stats()
@@ -191,9 +214,22 @@ async def main_pipeline(urls_base):
                 print(f"   📄 Season Pool: {season_stats['active_pages']}/{season_stats['max_pages']} páginas")
                 print(f"   ⚽ Goals Pool: {goals_stats['active_pages']}/{goals_stats['max_pages']} páginas")
                 print(f"   📊 Colas: T[{cola_temporadas.qsize()}] P[{cola_partidos.qsize()}]")
+                for host, info in rate_limiter.get_stats()['hosts'].items():
+                    print(f"   🚦 {host}: {info['tasa']:.2f} peticiones/s ({info['frenadas']} frenadas)")
         
         tasks.append(asyncio.create_task(show_stats()))
         
+        # Fin de la pasada: temporadas terminadas, cola de partidos vacía y sin reintentos pendientes
+        async def cerrar_al_terminar():
+            await asyncio.gather(*season_tasks, return_exceptions=True)
+            await reintentos.vaciar()
+            print("\n🏁 Pasada principal y reintentos completados")
+            for _ in range(GOALS_WORKERS):
+                await cola_partidos.put(None)
+            manager.shutdown_event.set()
+        
+        tasks.append(asyncio.create_task(cerrar_al_terminar()))
+        
         # 5. TAREA PARA MANEJAR INTERRUPCIONES EN WINDOWS
         if sys.platform == 'win32':
             async def windows_shutdown_handler():
@@ -266,6 +302,17 @@ async def main_pipeline(urls_base):
                 print(f"      Páginas reusadas: {stats['reused_count']}")
                 print(f"      Reuso efectivo: {stats['reused_percent']:.1f}%")
         
+        limites = rate_limiter.get_stats()
+        print(f"\n   🚦 LÍMITE DE PETICIONES:")
+        for host, info in limites['hosts'].items():
+            print(f"      {host}: {info['tasa']:.2f} peticiones/s al final, {info['frenadas']} frenadas")
+        for etapa, aperturas in limites['etapas'].items():
+            print(f"      Etapa '{etapa}': {aperturas} pausas por errores")
+        
+        if reintentos:
+            print(f"\n   🔁 REINTENTOS:")
+            reintentos.resumen()
+        
         mem_stats = memory_manager.get_stats()
         print(f"\n   🧠 USO DE MEMORIA:")
         print(f"      Máximo permitido: {mem_stats['max_memory_mb']}MB")
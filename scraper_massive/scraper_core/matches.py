@@ -1,6 +1,7 @@
 # matches.py
 import asyncio
 from fase_extractor import expand_all, click_mostrar_mas_partidos, extraer_fases_y_partidos
+from rate_limiter import navegar
 
 async def extraer_partidos_temporada(page, temp_info):
     """
@@ -13,7 +14,7 @@ async def extraer_partidos_temporada(page, temp_info):
     liga_nombre = temp_info['liga_nombre']
     url = temp_info['url']
 
-    await page.goto(url, timeout=60000, wait_until="networkidle")
+    await navegar(page, url, "temporadas", timeout=60000, wait_until="networkidle")
     
     try:
         # Cargar todos los partidos
@@ -0,0 +1,132 @@
+# rate_limiter.py - Límite de peticiones por host (token bucket + AIMD) y cortacircuitos por etapa
+import asyncio
+import time
+from collections import deque
+from urllib.parse import urlparse
+from playwright.async_api import TimeoutError as PlaywrightTimeout
+from config import RATE_LIMIT, CORTACIRCUITOS
+
+class Limitado(Exception):
+    """El host respondió 429/503: hay que bajar el ritmo"""
+
+class SinContenido(Exception):
+    """La página cargó pero no tiene el selector esperado (p. ej. partido aplazado o adjudicado)"""
+
+class LimitadorHost:
+    """
+    Token bucket: 'tasa' fichas por segundo hasta 'RAFAGA' acumuladas.
+    AIMD: cada éxito suma INCREMENTO a la tasa; cada timeout o 429/503 la multiplica por FACTOR_FRENADO.
+    """
+
+    def __init__(self, host):
+        self.host = host
+        self.tasa = RATE_LIMIT['TASA_INICIAL']
+        self.fichas = float(RATE_LIMIT['RAFAGA'])
+        self.ultimo = time.monotonic()
+        self.lock = asyncio.Lock()
+        self.frenadas = 0
+
+    async def adquirir(self):
+        """Espera (en orden de llegada) hasta que haya una ficha"""
+        async with self.lock:
+            while True:
+                ahora = time.monotonic()
+                self.fichas = min(RATE_LIMIT['RAFAGA'], self.fichas + (ahora - self.ultimo) * self.tasa)
+                self.ultimo = ahora
+                if self.fichas >= 1:
+                    self.fichas -= 1
+                    return
+                await asyncio.sleep((1 - self.fichas) / self.tasa)
+
+    def exito(self):
+        self.tasa = min(RATE_LIMIT['TASA_MAXIMA'], self.tasa + RATE_LIMIT['INCREMENTO'])
+
+    def frenar(self):
+        anterior = self.tasa
+        self.tasa = max(RATE_LIMIT['TASA_MINIMA'], self.tasa * RATE_LIMIT['FACTOR_FRENADO'])
+        self.fichas = 0.0  # Sin ráfaga inmediata tras la bajada
+        self.frenadas += 1
+        if self.tasa < anterior:
+            print(f"🐢 {self.host}: frenando a {self.tasa:.2f} peticiones/s")
+
+class Cortacircuitos:
+    """Si en las últimas VENTANA peticiones de la etapa fallan UMBRAL_ERRORES, la etapa se pausa"""
+
+    def __init__(self, etapa):
+        self.etapa = etapa
+        self.resultados = deque(maxlen=CORTACIRCUITOS['VENTANA'])
+        self.abierto_hasta = 0.0
+        self.aperturas = 0
+
+    async def esperar(self):
+        espera = self.abierto_hasta - time.monotonic()
+        if espera > 0:
+            await asyncio.sleep(espera)
+
+    def registrar(self, ok):
+        self.resultados.append(ok)
+        if len(self.resultados) < self.resultados.maxlen:
+            return
+        errores = self.resultados.count(False) / len(self.resultados)
+        if errores >= CORTACIRCUITOS['UMBRAL_ERRORES']:
+            pausa = CORTACIRCUITOS['PAUSA_SEGUNDOS']
+            self.abierto_hasta = time.monotonic() + pausa
+            self.resultados.clear()  # Tras la pausa se vuelve a medir desde cero
+            self.aperturas += 1
+            print(f"🔌 Etapa '{self.etapa}': {errores:.0%} de fallos, pausa de {pausa}s")
+
+# Instancias compartidas por todos los workers del proceso
+_limitadores = {}
+_circuitos = {}
+
+def limitador(url):
+    host = urlparse(url).netloc
+    if host not in _limitadores:
+        _limitadores[host] = LimitadorHost(host)
+    return _limitadores[host]
+
+def cortacircuitos(etapa):
+    if etapa not in _circuitos:
+        _circuitos[etapa] = Cortacircuitos(etapa)
+    return _circuitos[etapa]
+
+async def navegar(page, url, etapa, selector=None, timeout_selector=3000, **goto_kwargs):
+    """
+    page.goto con límite por host y cortacircuitos de la etapa.
+    Si se indica 'selector', también se espera a que aparezca; si no aparece se lanza SinContenido,
+    que no frena el host ni cuenta para el cortacircuitos (es un problema del contenido, no del ritmo).
+    Cualquier fallo se propaga al llamador.
+    """
+    if not url:
+        raise ValueError("Partido sin URL")
+    circuito = cortacircuitos(etapa)
+    host = limitador(url)
+    await circuito.esperar()
+    await host.adquirir()
+    try:
+        respuesta = await page.goto(url, **goto_kwargs)
+        if respuesta and respuesta.status in (429, 503):
+            raise Limitado(f"HTTP {respuesta.status}")
+    except (PlaywrightTimeout, Limitado):
+        host.frenar()
+        circuito.registrar(False)
+        raise
+    except Exception:
+        circuito.registrar(False)
+        raise
+    host.exito()
+    circuito.registrar(True)
+
+    if selector:
+        try:
+            await page.wait_for_selector(selector, timeout=timeout_selector)
+        except PlaywrightTimeout:
+            raise SinContenido(f"Sin '{selector}'") from None
+    return respuesta
+
+def get_stats():
+    """Tasa actual por host y aperturas de circuito por etapa"""
+    return {
+        'hosts': {h: {'tasa': l.tasa, 'frenadas': l.frenadas} for h, l in _limitadores.items()},
+        'etapas': {e: c.aperturas for e, c in _circuitos.items()},
+    }
@@ -1,9 +1,10 @@
 # season_worker.py - Versión mejorada
 import asyncio
 import os
-from db import init_db, save_empty_match
+import db
+import consolidado
 from matches import extraer_partidos_temporada
-from config import DB_FOLDER
+from config import DB_FOLDER, MODO_ALMACENAMIENTO, DB_CONSOLIDADA
 
 class SeasonWorker:
     def __init__(self, worker_id, context, page_pool, cola_temporadas, cola_partidos):
@@ -32,13 +33,19 @@ class SeasonWorker:
             # Obtener página del pool
             page = await self.get_page()
             
-            # Crear nombre de archivo para la base de datos
-            año_limpio = temp_info['año'].replace("-", "_")
-            nombre_archivo = f"{temp_info['liga_nombre']}_{año_limpio}"
-            db_name = os.path.join(DB_FOLDER, f"{nombre_archivo}.db")
-            
-            print(f"[SeasonWorker {self.worker_id}] 📄 Creando DB: {db_name}")
-            init_db(db_name)
+            if MODO_ALMACENAMIENTO == "consolidado":
+                db_name = DB_CONSOLIDADA
+                save_empty_match = consolidado.save_empty_match
+                consolidado.init_consolidado(db_name)
+            else:
+                # Crear nombre de archivo para la base de datos
+                año_limpio = temp_info['año'].replace("-", "_")
+                nombre_archivo = f"{temp_info['liga_nombre']}_{año_limpio}"
+                db_name = os.path.join(DB_FOLDER, f"{nombre_archivo}.db")
+                save_empty_match = db.save_empty_match
+                
+                print(f"[SeasonWorker {self.worker_id}] 📄 Creando DB: {db_name}")
+                db.init_db(db_name)
             
             # Extraer partidos de la temporada
             partidos = await extraer_partidos_temporada(page, temp_info)
@@ -63,7 +70,8 @@ class SeasonWorker:
                     partido['jornada'], 
                     partido['fecha'], 
                     partido['local'], 
-                    partido['visitante']
+                    partido['visitante'],
+                    match_id=partido.get('match_id')
                 )
                 
                 # Añadir db_name al partido
@@ -72,6 +80,9 @@ class SeasonWorker:
                 # Poner en la cola de partidos
                 await self.cola_partidos.put(partido)
             
+            # Estadísticas del planificador al día con los partidos recién insertados
+            db.analizar(db_name)
+            
             print(f"[SeasonWorker {self.worker_id}] ✅ Temporada {temp_info['año']} procesada. {len(partidos)} partidos encolados.")
             
         except Exception as e:
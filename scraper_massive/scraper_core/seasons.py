@@ -3,15 +3,20 @@ import re
 import asyncio
 from helpers import construir_url_resultados, construir_url_archivo, extraer_año_url, parse_url
 from config import get_temporada_actual, MAX_TEMPORADAS
+from rate_limiter import navegar
+
+async def obtener_temporadas_archivo(context, url_base, max_temporadas=4, semaforo=None):
+    """Obtiene temporadas pasadas desde la página de archivo (semaforo limita las páginas abiertas)"""
+    if semaforo:
+        async with semaforo:
+            return await obtener_temporadas_archivo(context, url_base, max_temporadas)
 
-async def obtener_temporadas_archivo(context, url_base, max_temporadas=4):
-    """Obtiene temporadas pasadas desde la página de archivo"""
     page = await context.new_page()
     temporadas_info = []
     
     try:
         archivo_url = construir_url_archivo(url_base)
-        await page.goto(archivo_url, timeout=60000, wait_until="networkidle")
+        await navegar(page, archivo_url, "archivo", timeout=60000, wait_until="networkidle")
         
         # Buscar elementos de temporadas
         season_elements = await page.locator("a.archiveLatte__text.archiveLatte__text--clickable").all()
@@ -68,14 +73,15 @@ async def obtener_temporadas_archivo(context, url_base, max_temporadas=4):
     temporadas_info.sort(key=lambda x: x['año'], reverse=True)
     return temporadas_info[:max_temporadas]
 
-async def obtener_todas_temporadas(context, url_base, nombre_base, max_temporadas=MAX_TEMPORADAS):
+async def obtener_todas_temporadas(context, url_base, nombre_base, max_temporadas=MAX_TEMPORADAS, semaforo=None):
     """
     Función generadora que obtiene temporadas (actual + pasadas)
-    y las va entregando UNA POR UNA para poner en cola inmediatamente
+    y las va entregando UNA POR UNA para poner en cola inmediatamente.
+    La actual no necesita página; solo la consulta del archivo pasa por el semáforo.
     """
     # 1. Añadir temporada actual
     pais, liga, _ = parse_url(url_base)
-    año_actual = get_temporada_actual()
+    año_actual = get_temporada_actual(pais, liga)
     
     temporada_actual = {
         "url": construir_url_resultados(url_base),
@@ -90,7 +96,7 @@ async def obtener_todas_temporadas(context, url_base, nombre_base, max_temporada
     yield temporada_actual
     
     # 2. Obtener temporadas pasadas
-    temporadas_pasadas = await obtener_temporadas_archivo(context, url_base, max_temporadas - 1)
+    temporadas_pasadas = await obtener_temporadas_archivo(context, url_base, max_temporadas - 1, semaforo)
     
     # 3. Combinar evitando duplicados
     años_existentes = {año_actual}
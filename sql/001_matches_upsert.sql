@@ -0,0 +1,21 @@
+-- 001_matches_upsert.sql
+-- Claves únicas que usan los upserts de data/migracion.py (MATCH_CONFLICT / MATCH_CONFLICT_FECHA).
+-- Permite re-ejecutar la migración sin duplicar partidos.
+--
+-- (season_id, matchday, home_team, away_team) no identifica un partido: en ligas con varias
+-- fases (Colombia, Bélgica) el mismo cruce se repite en la misma jornada de otra fase.
+-- Un partido es su ID de Flashscore (scraper_core/helpers.extraer_match_id) o, en filas
+-- antiguas sin ID, la fecha y los equipos dentro de la temporada.
+
+ALTER TABLE matches DROP CONSTRAINT IF EXISTS matches_season_matchday_teams_key;
+
+ALTER TABLE matches ADD COLUMN IF NOT EXISTS flashscore_id text;
+
+-- Sin fecha interpretable 'date' queda NULL (antes '<año>-01-01' juntaba la ida y la vuelta)
+ALTER TABLE matches ALTER COLUMN date DROP NOT NULL;
+
+-- NULL no choca con NULL: las filas sin ID solo las restringe la clave por fecha
+CREATE UNIQUE INDEX IF NOT EXISTS matches_flashscore_id_key ON matches(flashscore_id);
+
+CREATE UNIQUE INDEX IF NOT EXISTS matches_season_date_teams_key
+    ON matches(season_id, date, home_team, away_team);
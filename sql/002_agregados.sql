@@ -0,0 +1,137 @@
+-- 002_agregados.sql
+-- Capa de agregados precalculados que sirve la API de consultas.
+-- Se refresca por temporada (incremental) con refrescar_agregados_temporada(),
+-- que llaman data/export_to_supabase.py y api/scraper_lite.py tras cada escritura.
+
+-- Tramo de 15 minutos de un gol ("45+2" cuenta en 31-45, "90+3" en 76-90)
+CREATE OR REPLACE FUNCTION tramo_minuto(p_minuto text)
+RETURNS text
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT CASE
+        WHEN base <= 15 THEN '0-15'
+        WHEN base <= 30 THEN '16-30'
+        WHEN base <= 45 THEN '31-45'
+        WHEN base <= 60 THEN '46-60'
+        WHEN base <= 75 THEN '61-75'
+        ELSE '76-90'
+    END
+    FROM (SELECT split_part(trim(p_minuto), '+', 1)::int AS base) m
+$$;
+
+-- Clasificación y goles por equipo y temporada
+CREATE TABLE IF NOT EXISTS agregados_equipo_temporada (
+    temporada_id bigint NOT NULL REFERENCES temporadas(id) ON DELETE CASCADE,
+    equipo_id bigint NOT NULL REFERENCES equipos(id) ON DELETE CASCADE,
+    pj int NOT NULL DEFAULT 0,
+    pg int NOT NULL DEFAULT 0,
+    pe int NOT NULL DEFAULT 0,
+    pp int NOT NULL DEFAULT 0,
+    gf int NOT NULL DEFAULT 0,
+    gc int NOT NULL DEFAULT 0,
+    puntos int NOT NULL DEFAULT 0,
+    gf_1t int NOT NULL DEFAULT 0,
+    gc_1t int NOT NULL DEFAULT 0,
+    gf_2t int NOT NULL DEFAULT 0,
+    gc_2t int NOT NULL DEFAULT 0,
+    tramos_favor jsonb NOT NULL DEFAULT '{}'::jsonb,   -- {"0-15": 3, "16-30": 5, ...}
+    tramos_contra jsonb NOT NULL DEFAULT '{}'::jsonb,
+    actualizado_en timestamptz NOT NULL DEFAULT now(),
+    PRIMARY KEY (temporada_id, equipo_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_agregados_equipo ON agregados_equipo_temporada(equipo_id);
+
+-- Totales por temporada
+CREATE TABLE IF NOT EXISTS agregados_temporada (
+    temporada_id bigint PRIMARY KEY REFERENCES temporadas(id) ON DELETE CASCADE,
+    partidos int NOT NULL DEFAULT 0,
+    goles int NOT NULL DEFAULT 0,
+    goles_1t int NOT NULL DEFAULT 0,
+    goles_2t int NOT NULL DEFAULT 0,
+    tramos jsonb NOT NULL DEFAULT '{}'::jsonb,
+    actualizado_en timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE OR REPLACE FUNCTION refrescar_agregados_temporada(p_temporada_id bigint)
+RETURNS void
+LANGUAGE plpgsql AS $$
+BEGIN
+    DELETE FROM agregados_equipo_temporada WHERE temporada_id = p_temporada_id;
+
+    -- Cada partido jugado visto desde cada uno de los dos equipos
+    WITH filas AS (
+        SELECT local_id AS equipo_id,
+               coalesce(g_local_1t, 0) AS f1, coalesce(g_local_2t, 0) AS f2,
+               coalesce(g_visitante_1t, 0) AS c1, coalesce(g_visitante_2t, 0) AS c2,
+               concat_ws(',', minutos_local_1t, minutos_local_2t) AS min_favor,
+               concat_ws(',', minutos_visitante_1t, minutos_visitante_2t) AS min_contra
+        FROM partidos
+        WHERE temporada_id = p_temporada_id AND g_local_1t IS NOT NULL
+        UNION ALL
+        SELECT visitante_id,
+               coalesce(g_visitante_1t, 0), coalesce(g_visitante_2t, 0),
+               coalesce(g_local_1t, 0), coalesce(g_local_2t, 0),
+               concat_ws(',', minutos_visitante_1t, minutos_visitante_2t),
+               concat_ws(',', minutos_local_1t, minutos_local_2t)
+        FROM partidos
+        WHERE temporada_id = p_temporada_id AND g_local_1t IS NOT NULL
+    ),
+    tramos AS (
+        SELECT f.equipo_id, t.lado, tramo_minuto(s.m) AS tramo, count(*) AS n
+        FROM filas f
+        CROSS JOIN LATERAL (VALUES ('favor', f.min_favor), ('contra', f.min_contra)) AS t(lado, minutos)
+        CROSS JOIN LATERAL regexp_split_to_table(t.minutos, '\s*,\s*') AS s(m)
+        WHERE s.m ~ '^\d'
+        GROUP BY 1, 2, 3
+    )
+    INSERT INTO agregados_equipo_temporada (
+        temporada_id, equipo_id, pj, pg, pe, pp, gf, gc, puntos,
+        gf_1t, gc_1t, gf_2t, gc_2t, tramos_favor, tramos_contra
+    )
+    SELECT p_temporada_id, f.equipo_id,
+           count(*),
+           count(*) FILTER (WHERE f.f1 + f.f2 > f.c1 + f.c2),
+           count(*) FILTER (WHERE f.f1 + f.f2 = f.c1 + f.c2),
+           count(*) FILTER (WHERE f.f1 + f.f2 < f.c1 + f.c2),
+           sum(f.f1 + f.f2), sum(f.c1 + f.c2),
+           3 * count(*) FILTER (WHERE f.f1 + f.f2 > f.c1 + f.c2)
+             + count(*) FILTER (WHERE f.f1 + f.f2 = f.c1 + f.c2),
+           sum(f.f1), sum(f.c1), sum(f.f2), sum(f.c2),
+           coalesce((SELECT jsonb_object_agg(t.tramo, t.n) FROM tramos t
+                     WHERE t.equipo_id = f.equipo_id AND t.lado = 'favor'), '{}'::jsonb),
+           coalesce((SELECT jsonb_object_agg(t.tramo, t.n) FROM tramos t
+                     WHERE t.equipo_id = f.equipo_id AND t.lado = 'contra'), '{}'::jsonb)
+    FROM filas f
+    GROUP BY f.equipo_id;
+
+    INSERT INTO agregados_temporada (temporada_id, partidos, goles, goles_1t, goles_2t, tramos, actualizado_en)
+    SELECT p_temporada_id,
+           coalesce(sum(pj), 0) / 2,
+           coalesce(sum(gf), 0),
+           coalesce(sum(gf_1t), 0),
+           coalesce(sum(gf_2t), 0),
+           coalesce((
+               SELECT jsonb_object_agg(tramo, n) FROM (
+                   SELECT key AS tramo, sum(value::int) AS n
+                   FROM agregados_equipo_temporada a, jsonb_each_text(a.tramos_favor)
+                   WHERE a.temporada_id = p_temporada_id
+                   GROUP BY key
+               ) x
+           ), '{}'::jsonb),
+           now()
+    FROM agregados_equipo_temporada
+    WHERE temporada_id = p_temporada_id
+    ON CONFLICT (temporada_id) DO UPDATE SET
+        partidos = excluded.partidos,
+        goles = excluded.goles,
+        goles_1t = excluded.goles_1t,
+        goles_2t = excluded.goles_2t,
+        tramos = excluded.tramos,
+        actualizado_en = excluded.actualizado_en;
+END;
+$$;
+
+-- Precios de los nuevos tipos de consulta servidos desde los agregados
+INSERT INTO precios_consultas (tipo_consulta, coste_base, coste_por_fila)
+VALUES ('clasificacion', 0.02, 0), ('resumen_equipo', 0.02, 0)
+ON CONFLICT (tipo_consulta) DO NOTHING;
@@ -0,0 +1,49 @@
+-- 003_cache_consultas.sql
+-- Caché de resultados de la API de consultas (nodo "Ejecutar Consulta" y api/main.py /query).
+-- Clave: query_type + params normalizados. Las temporadas cerradas no caducan;
+-- las escrituras invalidan explícitamente vía refrescar_agregados_temporada().
+
+CREATE TABLE IF NOT EXISTS cache_consultas (
+    clave text PRIMARY KEY,                  -- 'liga_temporada:{"temporada":"12"}'
+    query_type text NOT NULL,
+    temporada_id bigint,                     -- para invalidar por temporada
+    equipo_id bigint,                        -- para invalidar por equipo
+    resultado jsonb NOT NULL,
+    filas int NOT NULL,
+    expira_en timestamptz,                   -- NULL = no caduca (temporada cerrada)
+    creado_en timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_cache_consultas_temporada ON cache_consultas(temporada_id);
+CREATE INDEX IF NOT EXISTS idx_cache_consultas_equipo ON cache_consultas(equipo_id);
+
+-- Borra las entradas afectadas por escrituras en una temporada:
+-- las de la propia temporada y las de cualquier equipo que juegue en ella
+CREATE OR REPLACE FUNCTION invalidar_cache_temporada(p_temporada_id bigint)
+RETURNS void
+LANGUAGE sql AS $$
+    DELETE FROM cache_consultas
+    WHERE temporada_id = p_temporada_id
+       OR equipo_id IN (
+           SELECT local_id FROM partidos WHERE temporada_id = p_temporada_id
+           UNION
+           SELECT visitante_id FROM partidos WHERE temporada_id = p_temporada_id
+       );
+$$;
+
+-- Limpieza de entradas caducadas (programable con pg_cron)
+CREATE OR REPLACE FUNCTION purgar_cache_consultas()
+RETURNS void
+LANGUAGE sql AS $$
+    DELETE FROM cache_consultas WHERE expira_en IS NOT NULL AND expira_en < now();
+$$;
+
+-- Toda escritura que refresca los agregados de una temporada invalida también su caché
+CREATE OR REPLACE FUNCTION refrescar_temporada(p_temporada_id bigint)
+RETURNS void
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM refrescar_agregados_temporada(p_temporada_id);
+    PERFORM invalidar_cache_temporada(p_temporada_id);
+END;
+$$;
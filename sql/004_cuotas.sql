@@ -0,0 +1,18 @@
+-- 004_cuotas.sql
+-- Soporte para los contadores diarios de api/cuotas.py y del nodo "Validar API Key y Saldo".
+-- La reconciliación cuenta las consultas de muchos clientes en una sola llamada.
+
+CREATE INDEX IF NOT EXISTS idx_transacciones_cliente_tipo_fecha
+    ON transacciones(cliente_id, tipo, created_at);
+
+CREATE OR REPLACE FUNCTION contar_consultas_dia(p_clientes bigint[], p_dia date)
+RETURNS TABLE (cliente_id bigint, consultas int)
+LANGUAGE sql STABLE AS $$
+    SELECT t.cliente_id, count(*)::int
+    FROM transacciones t
+    WHERE t.cliente_id = ANY(p_clientes)
+      AND t.tipo = 'consulta'
+      AND t.created_at >= p_dia
+      AND t.created_at < p_dia + 1
+    GROUP BY t.cliente_id;
+$$;
@@ -0,0 +1,41 @@
+-- 005_realizar_cobro.sql
+-- Cobro transaccional: descuenta el saldo, acumula totales, registra la transacción
+-- y devuelve el estado actualizado del cliente en la misma llamada
+-- (el nodo "Cobrar y Registrar" y api/main.py ya no releen 'clientes').
+-- Solo cobra si el saldo alcanza: con saldo insuficiente no devuelve ninguna fila
+-- ni registra la transacción (el saldo nunca queda negativo, aunque haya cobros a la vez).
+
+DROP FUNCTION IF EXISTS realizar_cobro(bigint, text, text, numeric, jsonb);
+
+CREATE OR REPLACE FUNCTION realizar_cobro(
+    p_cliente_id bigint,
+    p_tipo text,
+    p_descripcion text,
+    p_coste numeric,
+    p_metadata jsonb DEFAULT '{}'::jsonb
+)
+RETURNS TABLE (saldo numeric, total_consultas int, total_gastado numeric)
+LANGUAGE plpgsql AS $$
+BEGIN
+    RETURN QUERY
+    WITH actualizado AS (
+        UPDATE clientes c SET
+            saldo = c.saldo - p_coste,
+            total_consultas = coalesce(c.total_consultas, 0) + CASE WHEN p_tipo = 'consulta' THEN 1 ELSE 0 END,
+            total_gastado = coalesce(c.total_gastado, 0) + p_coste
+        WHERE c.id = p_cliente_id AND c.saldo >= p_coste
+        RETURNING c.saldo, c.total_consultas, c.total_gastado
+    )
+    SELECT a.saldo::numeric, a.total_consultas::int, a.total_gastado::numeric FROM actualizado a;
+
+    IF NOT FOUND THEN
+        IF NOT EXISTS (SELECT 1 FROM clientes c WHERE c.id = p_cliente_id) THEN
+            RAISE EXCEPTION 'Cliente % no encontrado', p_cliente_id;
+        END IF;
+        RETURN;  -- Saldo insuficiente
+    END IF;
+
+    INSERT INTO transacciones (cliente_id, tipo, descripcion, coste, metadata)
+    VALUES (p_cliente_id, p_tipo, p_descripcion, p_coste, p_metadata);
+END;
+$$;
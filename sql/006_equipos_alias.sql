@@ -0,0 +1,15 @@
+-- 006_equipos_alias.sql
+-- Variantes de nombre de un mismo equipo ("Athletic Club" / "Athletic Bilbao").
+-- api/equipos.py las carga en memoria junto a 'equipos' y registra aquí
+-- las coincidencias por nombre normalizado o aproximado que va encontrando.
+
+CREATE TABLE IF NOT EXISTS equipos_alias (
+    alias text PRIMARY KEY,
+    equipo_id bigint NOT NULL REFERENCES equipos(id) ON DELETE CASCADE,
+    creado_en timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_equipos_alias_equipo ON equipos_alias(equipo_id);
+
+-- Búsqueda exacta por nombre (la usan también los migradores antiguos)
+CREATE INDEX IF NOT EXISTS idx_equipos_nombre ON equipos(nombre);
@@ -0,0 +1,22 @@
+-- 007_goles_en_vivo.sql
+-- Goles de los partidos en juego, uno por fila y en cuanto aparecen en Flashscore.
+-- Los escribe el modo en vivo de api/scraper_lite.py (--daemon --vivo), que además
+-- mantiene al día g_*/minutos_* de la fila de 'partidos' (status 'LIVE' → 'FINISHED').
+-- Mismo vocabulario que goal_events del scraper (scraper_core/db.py): mitad, lado,
+-- minuto y minuto_extra ("45+2" → 45, 2). Aquí 'orden' solo distingue dos goles del
+-- mismo lado en el mismo minuto: un gol anulado por VAR no cambia la clave de los demás.
+
+CREATE TABLE IF NOT EXISTS goles_partido (
+    id bigserial PRIMARY KEY,
+    partido_id bigint NOT NULL REFERENCES partidos(id) ON DELETE CASCADE,
+    mitad smallint NOT NULL CHECK (mitad IN (1, 2)),
+    lado text NOT NULL CHECK (lado IN ('local', 'visitante')),
+    minuto smallint NOT NULL,
+    minuto_extra smallint NOT NULL DEFAULT 0,
+    orden smallint NOT NULL DEFAULT 1,
+    registrado_en timestamptz NOT NULL DEFAULT now(),
+    UNIQUE (partido_id, mitad, lado, minuto, minuto_extra, orden)
+);
+
+-- Consumidores que leen "lo último": goles registrados desde un instante dado
+CREATE INDEX IF NOT EXISTS idx_goles_partido_registrado ON goles_partido(registrado_en);